@@ -0,0 +1,257 @@
+"""
+Autocompletar dos campos do formulário de nova OS (cliente, máquina, local e cidade).
+
+Os valores já usados em cada campo são carregados uma vez, em segundo plano,
+em um IndicePrefixos: para cada campo, uma lista ordenada de chaves
+normalizadas (minúsculas, sem acentos). Cada valor entra com uma chave por
+palavra ("Hospital São Lucas": "hospital", "sao" e "lucas"), então digitar
+o começo de qualquer palavra encontra o valor. A busca é um bisect na lista pela
+palavra digitada mais longa, seguido da leitura das chaves que começam por
+ela; as outras palavras digitadas ("hosp ban") só filtram esses valores. Tudo
+roda na própria thread da interface, sem consultar o banco a cada tecla.
+
+Ao gravar uma OS, os valores dela entram no índice (adicionar), sem recarregar.
+
+Uso:
+    python autocompletar.py [texto]    # Carrega o índice e mede a busca dos prefixos
+"""
+
+import heapq
+import sys
+import time
+from bisect import bisect_left, insort
+from tkinter import Listbox
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+from os_trigramas import normalizar_termo
+
+# Campos do formulário com autocompletar
+CAMPOS_AUTOCOMPLETAR = ("cliente", "maquina", "local", "cidade")
+
+# Chaves lidas por busca; prefixos muito curtos ("h") param aqui
+MAXIMO_LIDAS = 3000
+
+
+class IndicePrefixos:
+    """Valores distintos de cada campo, pesquisáveis pelo começo de qualquer palavra"""
+
+    def __init__(self, valores):
+        """
+        Args:
+            valores (dict): campo -> lista de (valor, ocorrências), como
+                RepositorioOS.listar_valores_distintos
+        """
+        self._chaves = {}      # campo -> lista ordenada de (palavra, id do valor)
+        self._valores = {}     # campo -> lista de [valor, ocorrências, palavras normalizadas], pelo id
+        self._posicoes = {}    # campo -> {normalizado: id do valor}
+        for campo, lista in valores.items():
+            self._chaves[campo] = []
+            self._valores[campo] = []
+            self._posicoes[campo] = {}
+            for valor, ocorrencias in lista:
+                self._acrescentar(campo, valor, ocorrencias, ordenar=False)
+            self._chaves[campo].sort()
+
+    @classmethod
+    def carregar(cls, repo, campos=CAMPOS_AUTOCOMPLETAR):
+        """Lê os valores distintos dos campos no banco e monta o índice (rodar fora da thread da interface)"""
+        return cls(repo.listar_valores_distintos(campos))
+
+    def _acrescentar(self, campo, valor, ocorrencias, ordenar=True):
+        valor = (valor or "").strip()
+        normalizado = normalizar_termo(valor)
+        if not normalizado:
+            return
+        posicoes = self._posicoes[campo]
+        if normalizado in posicoes:
+            # Outra grafia do mesmo valor: fica a mais usada
+            registro = self._valores[campo][posicoes[normalizado]]
+            if ocorrencias > registro[1]:
+                registro[0] = valor
+            registro[1] += ocorrencias
+            return
+        id_valor = len(self._valores[campo])
+        palavras = normalizado.split()
+        self._valores[campo].append([valor, ocorrencias, palavras])
+        posicoes[normalizado] = id_valor
+        for palavra in set(palavras):
+            chave = (palavra, id_valor)
+            if ordenar:
+                insort(self._chaves[campo], chave)
+            else:
+                self._chaves[campo].append(chave)
+
+    def adicionar(self, dados):
+        """
+        Acrescenta os valores de uma OS gravada.
+
+        Args:
+            dados (dict): Colunas da OS (ou RegistroOS)
+        """
+        for campo in self._chaves:
+            self._acrescentar(campo, dados.get(campo), 1)
+
+    def sugerir(self, campo, texto, limite=8):
+        """
+        Valores do campo em que cada palavra digitada começa alguma palavra do valor.
+
+        Args:
+            campo (str): Campo do formulário (ex: "cliente")
+            texto (str): Texto digitado
+            limite (int): Quantidade máxima de sugestões
+
+        Returns:
+            list: Valores, primeiro os que começam pelo texto e depois os mais
+                usados
+        """
+        digitadas = normalizar_termo(texto).split()
+        chaves = self._chaves.get(campo)
+        if not digitadas or not chaves:
+            return []
+        # A palavra mais longa é a que menos chaves lê
+        prefixo = max(digitadas, key=len)
+        outras = list(digitadas)
+        outras.remove(prefixo)
+        valores = self._valores[campo]
+
+        encontrados = {}  # id do valor -> se o valor começa pela primeira palavra digitada
+        inicio = bisect_left(chaves, (prefixo,))
+        for chave, id_valor in chaves[inicio:inicio + MAXIMO_LIDAS]:
+            if not chave.startswith(prefixo):
+                break
+            if id_valor in encontrados:
+                continue
+            palavras = valores[id_valor][2]
+            if all(any(palavra.startswith(outra) for palavra in palavras) for outra in outras):
+                encontrados[id_valor] = palavras[0].startswith(digitadas[0])
+
+        melhores = heapq.nlargest(limite, encontrados, key=lambda i: (encontrados[i], valores[i][1]))
+        return [valores[i][0] for i in melhores]
+
+
+class CampoAutocompletar:
+    """Lista de sugestões sob um Entry, atualizada a cada tecla"""
+
+    def __init__(self, entry, campo, obter_indice, ao_escolher=None, limite=8):
+        """
+        Args:
+            entry: Entry do formulário
+            campo (str): Campo do índice (ex: "cliente")
+            obter_indice: Função () -> IndicePrefixos, ou None enquanto o
+                índice ainda está sendo carregado
+            ao_escolher: Função (valor) chamada quando uma sugestão é escolhida
+            limite (int): Quantidade máxima de sugestões exibidas
+        """
+        self.entry = entry
+        self.campo = campo
+        self.obter_indice = obter_indice
+        self.ao_escolher = ao_escolher
+        self.limite = limite
+        self._janela = None
+        self._lista = None
+
+        entry.bind("<KeyRelease>", self._tecla, add="+")
+        entry.bind("<Down>", self._descer, add="+")
+        entry.bind("<Escape>", lambda e: self.esconder(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(150, self._foco_saiu), add="+")
+
+    def _criar_janela(self):
+        self._janela = ttk.Toplevel(self.entry)
+        self._janela.overrideredirect(True)
+        self._janela.withdraw()
+        self._lista = Listbox(self._janela, height=self.limite, activestyle="dotbox", exportselection=False)
+        self._lista.pack(fill=BOTH, expand=YES)
+        self._lista.bind("<Return>", lambda e: self._escolher_selecionado())
+        self._lista.bind("<Double-Button-1>", lambda e: self._escolher_selecionado())
+        self._lista.bind("<Escape>", lambda e: (self.esconder(), self.entry.focus_set()))
+        self._lista.bind("<FocusOut>", lambda e: self.entry.after(150, self._foco_saiu))
+
+    def _tecla(self, evento):
+        if evento.keysym in ("Down", "Up", "Escape", "Return", "Tab", "ISO_Left_Tab"):
+            return
+        indice = self.obter_indice()
+        texto = self.entry.get()
+        sugestoes = indice.sugerir(self.campo, texto, self.limite) if indice is not None else []
+        # Não sugerir o que já está digitado por inteiro
+        if sugestoes == [texto]:
+            sugestoes = []
+        self.mostrar(sugestoes)
+
+    def mostrar(self, sugestoes):
+        """Exibe as sugestões sob o campo (ou esconde a lista, se não houver)"""
+        if not sugestoes:
+            self.esconder()
+            return
+        if self._janela is None:
+            self._criar_janela()
+        self._lista.delete(0, END)
+        for valor in sugestoes:
+            self._lista.insert(END, valor)
+        self._lista.config(height=len(sugestoes))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self._janela.geometry(f"{self.entry.winfo_width()}x{self._lista.winfo_reqheight()}+{x}+{y}")
+        self._janela.deiconify()
+        self._janela.lift()
+
+    def esconder(self):
+        if self._janela is not None:
+            self._janela.withdraw()
+
+    def _visivel(self):
+        return self._janela is not None and self._janela.winfo_viewable()
+
+    def _descer(self, evento):
+        if self._visivel():
+            self._lista.focus_set()
+            self._lista.selection_clear(0, END)
+            self._lista.selection_set(0)
+            self._lista.activate(0)
+            return "break"
+
+    def _foco_saiu(self):
+        foco = self.entry.focus_get()
+        if foco is not self.entry and foco is not self._lista:
+            self.esconder()
+
+    def _escolher_selecionado(self):
+        selecao = self._lista.curselection()
+        if selecao:
+            self.escolher(self._lista.get(selecao[0]))
+
+    def escolher(self, valor):
+        """Coloca o valor no campo e avisa ao_escolher"""
+        self.esconder()
+        self.entry.delete(0, END)
+        self.entry.insert(0, valor)
+        self.entry.focus_set()
+        self.entry.icursor(END)
+        if self.ao_escolher is not None:
+            self.ao_escolher(valor)
+
+
+if __name__ == "__main__":
+    from itertools import product
+
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    inicio = time.perf_counter()
+    indice = IndicePrefixos.carregar(repo)
+    print(f"Índice carregado em {(time.perf_counter() - inicio) * 1000:.0f} ms: "
+          + ", ".join(f"{campo} {len(indice._valores[campo])} valores" for campo in CAMPOS_AUTOCOMPLETAR))
+
+    if len(sys.argv) > 1:
+        for campo in CAMPOS_AUTOCOMPLETAR:
+            print(f"{campo}: {indice.sugerir(campo, sys.argv[1])}")
+
+    # Pior caso: todos os prefixos de 1 e 2 letras, em todos os campos
+    pior = 0.0
+    for campo, letras in product(CAMPOS_AUTOCOMPLETAR, ["".join(p) for n in (1, 2) for p in product("abcdefghijklmnopqrstuvwxyz", repeat=n)]):
+        inicio = time.perf_counter()
+        indice.sugerir(campo, letras)
+        pior = max(pior, time.perf_counter() - inicio)
+    print(f"Busca mais lenta: {pior * 1000:.2f} ms")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Gravações por segundo com várias estações e threads gravando ao mesmo tempo,
+sem e com a fila de escrita (fila_escrita.py).
+
+Cada processo faz o papel de uma estação (um RepositorioOS próprio, como cada
+computador com o sistema aberto) e cada thread grava OS novas (criar_os) e
+alterações de status, como a tela e as tarefas em segundo plano fazem:
+- sem fila: o RepositorioOS atual com agrupar_escritas=False, em que cada
+  gravação abre a própria transação na thread que a pediu;
+- com fila: as gravações da estação passam pela fila e são gravadas em lote.
+
+As duas medições usam o repositório atual (conexão de escrita única por
+estação e numeração pela tabela os_sequencia); não reproduzem as versões
+antigas do sistema, que abriam uma conexão por gravação e numeravam as OS
+com COUNT(*).
+
+Roda em um banco temporário, criado a cada medição; o moraca.db não é aberto.
+
+Uso:
+    python benchmark_escrita.py                              # 4 estações x 4 threads, WAL e DELETE
+    python benchmark_escrita.py --estacoes 8 --threads 2 --gravacoes 200
+    python benchmark_escrita.py --journal DELETE             # Como em um compartilhamento de rede
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from os_repositorio import RepositorioOS
+
+CLIENTES = ("Hospital São Lucas", "Clínica Santa Maria", "Hospital Regional", "Clínica Vida", "Santa Casa")
+MAQUINAS = ("Arco Cirúrgico Ziehm Vision", "Arco Cirúrgico Ziehm 8000", "Raio-X Móvel", "Mamógrafo")
+STATUS = ("ABERTA", "EM ANDAMENTO", "FECHADA")
+
+
+def _dados_os(estacao, thread, indice):
+    """Colunas de uma OS de teste"""
+    return {
+        "data": time.strftime("%d/%m/%Y"),
+        "tipo": "MANUTENÇÃO CORRETIVA" if indice % 3 else "MANUTENÇÃO PREVENTIVA",
+        "status": "ABERTA",
+        "cliente": CLIENTES[(estacao + indice) % len(CLIENTES)],
+        "cidade": "São Paulo",
+        "maquina": MAQUINAS[indice % len(MAQUINAS)],
+        "numero_serie": f"SN{estacao}{thread}{indice % 50:03d}",
+        "descricao": f"Teste de gravação {estacao}.{thread}.{indice}",
+    }
+
+
+def _estacao(caminho_banco, modo_journal, agrupar, estacao, threads, gravacoes, inicio, resultados):
+    """Processo de uma estação: várias threads gravando no mesmo repositório"""
+    repo = RepositorioOS(caminho_banco, modo_journal=modo_journal, agrupar_escritas=agrupar)
+    contagem = {"gravadas": 0, "erros": 0}
+    latencias = []
+    trava = threading.Lock()
+
+    def gravar(thread):
+        numeros = []
+        for indice in range(gravacoes):
+            antes = time.perf_counter()
+            try:
+                # Duas OS novas para cada alteração de status
+                if indice % 3 == 2 and numeros:
+                    repo.atualizar_status(numeros[-1], STATUS[indice % len(STATUS)])
+                else:
+                    numeros.append(repo.criar_os(_dados_os(estacao, thread, indice)))
+            except sqlite3.OperationalError as e:
+                with trava:
+                    contagem["erros"] += 1
+                print(f"Estação {estacao}, thread {thread}: {e}")
+                continue
+            with trava:
+                contagem["gravadas"] += 1
+                latencias.append(time.perf_counter() - antes)
+
+    inicio.wait()  # Todas as estações começam juntas
+    trabalhadores = [threading.Thread(target=gravar, args=(t,)) for t in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    fim = time.perf_counter()
+    transacoes = repo.transacoes_escrita
+    repo.fechar()
+    resultados.put((contagem["gravadas"], contagem["erros"], transacoes, fim, latencias))
+
+
+def medir(modo_journal, agrupar, estacoes, threads, gravacoes):
+    """
+    Mede uma configuração em um banco novo.
+
+    Returns:
+        dict: gravadas, erros, transacoes, por_segundo, latencia_p50/p99 (ms)
+    """
+    pasta = tempfile.mkdtemp(prefix="moraca_benchmark_")
+    caminho_banco = os.path.join(pasta, "moraca.db")
+    try:
+        repo = RepositorioOS(caminho_banco, modo_journal=modo_journal)
+        with contextlib.redirect_stdout(io.StringIO()):  # Mensagens das migrações
+            repo.criar_esquema()
+        repo.fechar()
+
+        contexto = multiprocessing.get_context("spawn")
+        inicio = contexto.Barrier(estacoes + 1)
+        resultados = contexto.Queue()
+        processos = [contexto.Process(target=_estacao,
+                                      args=(caminho_banco, modo_journal, agrupar, e, threads, gravacoes,
+                                            inicio, resultados))
+                     for e in range(estacoes)]
+        for processo in processos:
+            processo.start()
+        inicio.wait()
+        comeco = time.perf_counter()
+        medicoes = [resultados.get() for _ in processos]
+        for processo in processos:
+            processo.join()
+
+        gravadas = sum(m[0] for m in medicoes)
+        decorrido = max(m[3] for m in medicoes) - comeco
+        latencias = sorted(latencia for m in medicoes for latencia in m[4])
+        percentil = lambda p: latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000 if latencias else 0
+        return {
+            "gravadas": gravadas,
+            "erros": sum(m[1] for m in medicoes),
+            "transacoes": sum(m[2] for m in medicoes),
+            "por_segundo": gravadas / decorrido,
+            "latencia_p50": percentil(0.50),
+            "latencia_p99": percentil(0.99),
+        }
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede gravações/s sob concorrência, sem e com a fila de escrita.")
+    parser.add_argument("--estacoes", type=int, default=4, help="Processos gravando no mesmo banco (padrão: 4)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads gravando em cada estação (padrão: 4)")
+    parser.add_argument("--gravacoes", type=int, default=150, help="Gravações por thread (padrão: 150)")
+    parser.add_argument("--journal", nargs="+", choices=("WAL", "DELETE"), default=["WAL", "DELETE"],
+                        help="Modos de journal medidos (padrão: os dois)")
+    args = parser.parse_args(argv)
+
+    print(f"{args.estacoes} estações x {args.threads} threads x {args.gravacoes} gravações\n")
+    print(f"{'journal':8} {'modo':8} {'gravações/s':>12} {'transações':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erros':>6}")
+    for modo_journal in args.journal:
+        for nome, agrupar in (("sem fila", False), ("com fila", True)):
+            r = medir(modo_journal, agrupar, args.estacoes, args.threads, args.gravacoes)
+            print(f"{modo_journal:8} {nome:8} {r['por_segundo']:12.0f} {r['transacoes']:11d} "
+                  f"{r['latencia_p50']:9.1f} {r['latencia_p99']:9.1f} {r['erros']:6d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Pesquisa de OS enquanto o usuário digita.
+
+Cada tecla reinicia uma espera curta (debounce); só quando o usuário para de
+digitar a consulta é enviada ao ExecutorTarefas, e a janela não trava enquanto
+o banco responde. Cada consulta recebe um número de geração: ao chegar um
+resultado de uma geração antiga (o usuário continuou digitando), ele é
+descartado, e a tarefa anterior ainda não iniciada é cancelada.
+
+Quando o termo novo só acrescenta letras ao anterior ("hos" -> "hosp") e o
+resultado anterior estava completo (não foi cortado pelo limite), o resultado
+novo é um subconjunto dele: a lista é filtrada em memória, com a mesma regra
+do índice (os_busca.registro_corresponde), sem consultar o banco.
+
+Sem o FTS5 (busca por LIKE no número e no cliente), a pesquisa usa o índice
+em memória da lista (indice_lista.py) assim que ele estiver carregado, na
+própria thread da interface e sem espera.
+"""
+
+from os_busca import COLUNAS_FTS, palavras_busca, refina_termo, registro_corresponde
+from os_repositorio import COLUNAS_LISTA
+
+# Colunas lidas na busca: as da lista e as necessárias para refinar em memória
+COLUNAS_BUSCA = COLUNAS_LISTA + tuple(coluna for coluna in COLUNAS_FTS if coluna not in COLUNAS_LISTA)
+
+
+class BuscaIncremental:
+    """Liga o campo de pesquisa à busca no banco, com debounce e refinamento em memória"""
+
+    def __init__(self, root, executor, repo, ao_exibir, ao_limpar, espera_ms=80, limite=30):
+        """
+        Args:
+            root: Janela principal (usada para agendar a consulta)
+            executor (ExecutorTarefas): Executor onde as consultas rodam
+            repo (RepositorioOS): Repositório do banco
+            ao_exibir: Função (termo, registros) chamada na thread principal
+                com o resultado da busca
+            ao_limpar: Função () chamada quando o campo fica vazio
+            espera_ms (int): Tempo sem digitar antes de consultar o banco
+            limite (int): Quantidade máxima de resultados
+        """
+        self.root = root
+        self.executor = executor
+        self.repo = repo
+        self.ao_exibir = ao_exibir
+        self.ao_limpar = ao_limpar
+        self.espera_ms = espera_ms
+        self.limite = limite
+
+        self._agendada = None   # Id do root.after da próxima consulta
+        self._tarefa = None     # Consulta em andamento
+        self._geracao = 0
+        self._termo = None      # Termo do resultado guardado
+        self._registros = []    # Resultado guardado (colunas de COLUNAS_BUSCA)
+        self._completo = False  # Se o resultado guardado não foi cortado pelo limite
+        self.indice = None      # IndiceListaOS, quando carregado
+
+    def alterado(self, termo):
+        """
+        Chamado a cada alteração do texto digitado.
+
+        Args:
+            termo (str): Texto atual do campo de pesquisa
+        """
+        termo = termo.strip()
+        self._descartar_pendentes()
+
+        if not termo:
+            self.invalidar()
+            self.ao_limpar()
+            return
+
+        if self._usar_indice():
+            self._filtrar_indice(termo)
+            return
+
+        # Sem o FTS5 a busca é por LIKE, com outra regra: não refina em memória
+        if (self.repo.busca_fts and self._completo and self._termo is not None
+                and refina_termo(self._termo, termo)):
+            # Subconjunto do resultado anterior: filtra sem ir ao banco
+            palavras = palavras_busca(termo)
+            self._termo = termo
+            self._registros = [registro for registro in self._registros if registro_corresponde(registro, palavras)]
+            self.ao_exibir(termo, self._registros)
+            return
+
+        self._agendada = self.root.after(self.espera_ms, self._consultar, termo)
+
+    def buscar_agora(self, termo):
+        """
+        Consulta o banco imediatamente (botão Buscar / Enter).
+
+        Args:
+            termo (str): Texto a pesquisar
+        """
+        termo = termo.strip()
+        self._descartar_pendentes()
+        if not termo:
+            self.invalidar()
+            self.ao_limpar()
+            return
+        if self._usar_indice():
+            self._filtrar_indice(termo)
+            return
+        self._consultar(termo)
+
+    def _usar_indice(self):
+        """O índice em memória substitui o LIKE no banco, com a mesma regra (número e cliente)"""
+        return self.indice is not None and not self.repo.busca_fts
+
+    def _filtrar_indice(self, termo):
+        self._termo = None
+        self.ao_exibir(termo, self.indice.filtrar(texto=termo, limite=self.limite))
+
+    def _consultar(self, termo):
+        """Envia a consulta ao executor como uma nova geração"""
+        self._agendada = None
+        self._geracao += 1
+        geracao = self._geracao
+        # Um registro além do limite indica se o resultado foi cortado
+        self._tarefa = self.executor.submeter(
+            lambda tarefa: self.repo.buscar(termo, self.limite + 1, COLUNAS_BUSCA),
+            descricao=f"Pesquisando '{termo}'...",
+            ao_concluir=lambda registros: self._concluir(geracao, termo, registros),
+            ao_falhar=lambda erro: print(f"Erro ao pesquisar '{termo}': {erro}")
+        )
+
+    def _concluir(self, geracao, termo, registros):
+        """Recebe o resultado na thread principal; descarta os de buscas antigas"""
+        if geracao != self._geracao:
+            return
+        self._tarefa = None
+        self._termo = termo
+        self._completo = len(registros) <= self.limite
+        self._registros = list(registros[:self.limite])
+        self.ao_exibir(termo, self._registros)
+
+    def _descartar_pendentes(self):
+        """Cancela a consulta agendada e invalida a que estiver em andamento"""
+        if self._agendada is not None:
+            self.root.after_cancel(self._agendada)
+            self._agendada = None
+        if self._tarefa is not None:
+            self._tarefa.cancelar()
+            self._tarefa = None
+        self._geracao += 1
+
+    def cancelar(self):
+        """Descarta a consulta agendada ou em andamento (ex: a lista foi trocada)"""
+        self._descartar_pendentes()
+
+    def invalidar(self):
+        """Esquece o resultado guardado (ex: OS alteradas em outra estação)"""
+        self._termo = None
+        self._registros = []
+        self._completo = False
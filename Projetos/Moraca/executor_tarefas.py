@@ -0,0 +1,211 @@
+"""
+Execução de tarefas demoradas fora da thread da interface.
+
+Consultas ao banco, geração de planilhas/documentos e cópia de pastas rodam
+em um pool de threads, para que a janela continue respondendo. O resultado
+volta para a interface por uma fila que a thread principal esvazia com
+root.after.
+
+Regra: só a thread principal mexe em widgets. A função executada em segundo
+plano recebe a Tarefa e os argumentos, não pode chamar nada do Tk (nem
+mostrar_mensagem) e devolve um resultado; os callbacks ao_concluir/ao_falhar
+são sempre chamados na thread principal e podem usar a interface à vontade.
+"""
+
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro de uma tarefa quando o usuário pede o cancelamento"""
+
+
+class Tarefa:
+    """Uma tarefa enviada ao ExecutorTarefas"""
+
+    def __init__(self, executor, descricao, cancelavel):
+        self._executor = executor
+        self.descricao = descricao
+        self.cancelavel = cancelavel
+        self.progresso = 0.0
+        self.mensagem = descricao
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        """Pede o cancelamento; a tarefa para no próximo ponto de verificação"""
+        if self.cancelavel:
+            self._cancelada.set()
+
+    def verificar_cancelamento(self):
+        """
+        Ponto de verificação chamado pela função em segundo plano entre etapas.
+
+        Raises:
+            TarefaCancelada: Se o usuário pediu o cancelamento
+        """
+        if self.cancelada:
+            raise TarefaCancelada(self.descricao)
+
+    def informar_progresso(self, fracao, mensagem=None):
+        """
+        Atualiza o progresso exibido na barra de status (pode ser chamado da
+        thread da tarefa).
+
+        Args:
+            fracao (float): Progresso entre 0 e 1
+            mensagem (str): Texto da etapa atual
+        """
+        self._executor._fila.put(("progresso", self, (fracao, mensagem)))
+
+
+class ExecutorTarefas:
+    """Pool de threads com entrega dos resultados na thread do Tk"""
+
+    def __init__(self, root, max_threads=2, intervalo_ms=50):
+        """
+        Args:
+            root: Janela principal (usada para agendar a leitura da fila)
+            max_threads (int): Tarefas executadas ao mesmo tempo
+            intervalo_ms (int): Intervalo de leitura da fila de resultados
+        """
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="moraca")
+        self._fila = queue.Queue()
+        self._callbacks = {}
+        self.ativas = []
+        self.ouvintes = []
+        self.root.after(self.intervalo_ms, self._processar_fila)
+
+    def submeter(self, funcao, *args, descricao="", cancelavel=True,
+                 ao_concluir=None, ao_falhar=None, ao_cancelar=None):
+        """
+        Executa funcao(tarefa, *args) em segundo plano.
+
+        Args:
+            funcao: Função executada no pool; recebe a Tarefa como primeiro argumento
+            descricao (str): Texto exibido na barra de status
+            cancelavel (bool): Se o botão Cancelar pode interromper a tarefa
+            ao_concluir: Callback (resultado) chamado na thread principal
+            ao_falhar: Callback (exceção) chamado na thread principal
+            ao_cancelar: Callback () chamado na thread principal
+
+        Returns:
+            Tarefa: Objeto para acompanhar ou cancelar a execução
+        """
+        tarefa = Tarefa(self, descricao, cancelavel)
+        self._callbacks[tarefa] = (ao_concluir, ao_falhar, ao_cancelar)
+        self.ativas.append(tarefa)
+        self._notificar()
+        self._pool.submit(self._executar, tarefa, funcao, args)
+        return tarefa
+
+    def _executar(self, tarefa, funcao, args):
+        """Roda na thread do pool: nunca acessa o Tk"""
+        try:
+            tarefa.verificar_cancelamento()
+            resultado = funcao(tarefa, *args)
+        except TarefaCancelada:
+            self._fila.put(("cancelada", tarefa, None))
+        except Exception as e:
+            print(f"Erro na tarefa '{tarefa.descricao}': {e}")
+            traceback.print_exc()
+            self._fila.put(("falhou", tarefa, e))
+        else:
+            self._fila.put(("concluida", tarefa, resultado))
+
+    def _processar_fila(self):
+        """Roda na thread principal: entrega progresso e resultados"""
+        try:
+            while True:
+                evento, tarefa, dado = self._fila.get_nowait()
+                if evento == "progresso":
+                    tarefa.progresso, mensagem = dado
+                    if mensagem:
+                        tarefa.mensagem = mensagem
+                else:
+                    self._finalizar(evento, tarefa, dado)
+                self._notificar()
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(self.intervalo_ms, self._processar_fila)
+
+    def _finalizar(self, evento, tarefa, dado):
+        ao_concluir, ao_falhar, ao_cancelar = self._callbacks.pop(tarefa)
+        self.ativas.remove(tarefa)
+        try:
+            if evento == "concluida" and ao_concluir:
+                ao_concluir(dado)
+            elif evento == "falhou" and ao_falhar:
+                ao_falhar(dado)
+            elif evento == "cancelada" and ao_cancelar:
+                ao_cancelar()
+        except Exception as e:
+            print(f"Erro ao finalizar a tarefa '{tarefa.descricao}': {e}")
+            traceback.print_exc()
+
+    def _notificar(self):
+        for ouvinte in self.ouvintes:
+            ouvinte(self.ativas)
+
+    def encerrar(self):
+        """Cancela o que ainda não começou e libera as threads"""
+        for tarefa in self.ativas:
+            tarefa.cancelar()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class BarraTarefas(ttk.Frame):
+    """Barra de status com o progresso da tarefa atual e botão Cancelar"""
+
+    def __init__(self, parent, executor):
+        super().__init__(parent, padding=(10, 2))
+        self.executor = executor
+
+        self.texto = ttk.Label(self, text="Pronto")
+        self.texto.pack(side=LEFT)
+
+        self.botao_cancelar = ttk.Button(
+            self,
+            text="Cancelar",
+            command=self.cancelar,
+            style="secondary.TButton",
+            state=DISABLED
+        )
+        self.botao_cancelar.pack(side=RIGHT, padx=(10, 0))
+
+        self.progresso = ttk.Progressbar(self, length=200, maximum=1.0)
+        self.progresso.pack(side=RIGHT)
+
+        executor.ouvintes.append(self.atualizar)
+
+    def atualizar(self, ativas):
+        """Mostra a tarefa mais antiga ainda em execução"""
+        if not ativas:
+            self.texto.config(text="Pronto")
+            self.progresso.config(value=0)
+            self.botao_cancelar.config(state=DISABLED)
+            return
+
+        tarefa = ativas[0]
+        texto = tarefa.mensagem
+        if len(ativas) > 1:
+            texto += f" (+{len(ativas) - 1} na fila)"
+        self.texto.config(text=texto)
+        self.progresso.config(value=tarefa.progresso)
+        self.botao_cancelar.config(state=NORMAL if tarefa.cancelavel and not tarefa.cancelada else DISABLED)
+
+    def cancelar(self):
+        if self.executor.ativas:
+            self.executor.ativas[0].cancelar()
+            self.atualizar(self.executor.ativas)
@@ -0,0 +1,203 @@
+"""
+Fila única de escrita no banco, com commit em grupo.
+
+Todas as gravações do RepositorioOS (criar OS, alterar status, registrar
+documentos...) viram pedidos de escrita entregues a uma única thread, dona
+da conexão de escrita. A thread junta os pedidos que chegaram enquanto o
+commit anterior era feito e grava todos em uma só transação curta (BEGIN
+IMMEDIATE ... COMMIT): com várias telas e tarefas gravando ao mesmo tempo, o
+banco recebe um commit (e um fsync, fora do WAL) por lote em vez de um por
+pedido, e a trava do arquivo fica menos tempo com esta estação.
+
+Cada pedido roda dentro de um SAVEPOINT: se ele falhar, só ele é desfeito e
+os outros do lote são gravados. Quem pediu recebe um Future com o resultado,
+entregue depois do COMMIT.
+
+Quando outra estação segura o banco por mais que o busy_timeout da conexão
+(ex: uma migração demorada), BEGIN e COMMIT são repetidos com espera
+crescente e aleatória (backoff exponencial com jitter), para as estações
+não tentarem de novo todas no mesmo instante.
+"""
+
+import queue
+import random
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+
+# Pedido que encerra a thread de escrita
+_PARAR = object()
+
+
+def banco_ocupado(erro):
+    """Se o erro é de trava do SQLite (SQLITE_BUSY / SQLITE_LOCKED)"""
+    mensagem = str(erro).lower()
+    return isinstance(erro, sqlite3.OperationalError) and ("locked" in mensagem or "busy" in mensagem)
+
+
+def _falhar(futuro, erro):
+    """Entrega o erro a um pedido que ainda não terminou (cancelado ou não iniciado inclusive)"""
+    if not futuro.done() and (futuro.running() or futuro.set_running_or_notify_cancel()):
+        futuro.set_exception(erro)
+
+
+class FilaEscrita:
+    """Thread única que executa os pedidos de escrita em lotes (commit em grupo)"""
+
+    def __init__(self, conn, trava, max_lote=100, tentativas=6, espera_inicial=0.05, espera_maxima=2.0):
+        """
+        Args:
+            conn: Conexão de escrita em modo autocommit (isolation_level=None)
+            trava (threading.RLock): Trava da conexão, segurada durante cada
+                lote (quem usa a conexão fora da fila, como as migrações, usa
+                a mesma trava)
+            max_lote (int): Pedidos gravados no máximo por transação
+            tentativas (int): Novas tentativas de BEGIN/COMMIT com o banco ocupado
+            espera_inicial (float): Espera antes da primeira nova tentativa (s)
+            espera_maxima (float): Limite da espera entre tentativas (s)
+        """
+        self.conn = conn
+        self.trava = trava
+        self.max_lote = max_lote
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.lotes = 0    # Transações gravadas (estatística do benchmark)
+        self.pedidos = 0  # Pedidos gravados
+        self._fila = queue.Queue()
+        self._trava_fila = threading.Lock()  # Enfileirar x encerrar a thread
+        self._encerrada = False
+        self._thread = threading.Thread(target=self._executar, name="moraca-escrita", daemon=True)
+        self._thread.start()
+
+    def submeter(self, funcao, *args):
+        """
+        Enfileira funcao(conn, *args) para a próxima transação.
+
+        Args:
+            funcao: Função executada na thread de escrita, dentro da transação
+
+        Returns:
+            Future: Resultado da função, disponível depois do COMMIT (ou a
+                exceção que ela levantou)
+        """
+        futuro = Future()
+        if threading.current_thread() is self._thread:
+            # Pedido feito de dentro de outro pedido: já está na transação
+            try:
+                futuro.set_result(funcao(self.conn, *args))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        with self._trava_fila:
+            if self._encerrada or not self._thread.is_alive():
+                raise RuntimeError("A fila de escrita foi encerrada")
+            self._fila.put((futuro, funcao, args))
+        return futuro
+
+    def executar(self, funcao, *args):
+        """Enfileira funcao(conn, *args) e espera o resultado (ou a exceção)"""
+        return self.submeter(funcao, *args).result()
+
+    def encerrar(self):
+        """Grava os pedidos já enfileirados e encerra a thread"""
+        with self._trava_fila:
+            if self._encerrada or not self._thread.is_alive():
+                return
+            self._fila.put(_PARAR)
+        self._thread.join()
+
+    def _executar(self):
+        """Laço da thread de escrita: um lote por transação"""
+        try:
+            while True:
+                lote = [self._fila.get()]
+                # Tudo o que chegou enquanto o lote anterior era gravado
+                while len(lote) < self.max_lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                parar = _PARAR in lote
+                lote = [pedido for pedido in lote if pedido is not _PARAR]
+                if lote:
+                    self._gravar_lote(lote)
+                if parar:
+                    return
+        finally:
+            # Mesmo se a thread morrer por um erro inesperado, ninguém fica
+            # esperando por um pedido que não vai ser gravado
+            with self._trava_fila:
+                self._encerrada = True
+            erro = RuntimeError("A fila de escrita foi encerrada")
+            while True:
+                try:
+                    pedido = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is not _PARAR:
+                    _falhar(pedido[0], erro)
+
+    def _gravar_lote(self, lote):
+        """Grava um lote em uma transação e entrega os resultados"""
+        resultados = []
+        try:
+            try:
+                with self.trava:
+                    self._repetir_ocupado(lambda: self.conn.execute("BEGIN IMMEDIATE"))
+                    try:
+                        for futuro, funcao, args in lote:
+                            if not futuro.set_running_or_notify_cancel():
+                                continue
+                            self.conn.execute("SAVEPOINT pedido")
+                            try:
+                                resultado = (True, funcao(self.conn, *args))
+                            except Exception as e:
+                                self.conn.execute("ROLLBACK TO pedido")
+                                resultado = (False, e)
+                            self.conn.execute("RELEASE pedido")
+                            resultados.append((futuro, resultado))
+                        self._repetir_ocupado(lambda: self.conn.execute("COMMIT"))
+                    except BaseException:
+                        if self.conn.in_transaction:
+                            self.conn.execute("ROLLBACK")
+                        raise
+            except Exception as e:
+                # Transação perdida: nenhum pedido do lote foi gravado
+                print(f"Erro ao gravar {len(lote)} pedido(s) no banco: {e}")
+                traceback.print_exc()
+                for futuro, _, _ in lote:
+                    _falhar(futuro, e)
+                return
+
+            self.lotes += 1
+            self.pedidos += len(resultados)
+            for futuro, (sucesso, valor) in resultados:
+                if sucesso:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+        finally:
+            # Um BaseException (ex: KeyboardInterrupt) no meio do lote encerra a
+            # thread: quem ainda espera um pedido do lote recebe um erro
+            erro = RuntimeError("Pedido não gravado: a fila de escrita foi interrompida")
+            for futuro, _, _ in lote:
+                _falhar(futuro, erro)
+
+    def _repetir_ocupado(self, comando):
+        """
+        Executa o comando; com o banco ocupado além do busy_timeout, tenta de
+        novo com espera exponencial e aleatória.
+        """
+        espera = self.espera_inicial
+        for tentativa in range(self.tentativas + 1):
+            try:
+                return comando()
+            except sqlite3.OperationalError as e:
+                if not banco_ocupado(e) or tentativa == self.tentativas:
+                    raise
+                print(f"Banco ocupado por outra estação, tentando de novo em {espera:.2f}s ({e})")
+                time.sleep(espera * random.uniform(0.5, 1.5))
+                espera = min(espera * 2, self.espera_maxima)
@@ -0,0 +1,124 @@
+"""
+Filtros da lista de OS (painel de filtros da tela principal).
+
+Cada filtro vira uma condição "sargable", isto é, que o SQLite consegue
+resolver por um índice: igualdade ou IN na coluna, faixa de datas ISO
+(aaaa-mm-dd) e nenhuma função aplicada sobre a coluna. Os índices compostos
+criados na migração 10 começam pela coluna filtrada e terminam em
+(data_iso, numero), a ordem da lista, então a página por chave
+(RepositorioOS.listar_pagina) continua do ponto em que parou sem OFFSET.
+
+Status gravados por versões antigas ("Pendente", "Concluída"...) entram no
+filtro do status equivalente.
+
+Uso:
+    python filtros_os.py    # Confere, pelo EXPLAIN QUERY PLAN, que nenhuma
+                            # combinação de filtros lê a tabela os inteira
+"""
+
+from datetime import datetime
+from itertools import combinations
+
+# Status aceitos por cada opção do filtro (incluindo os nomes antigos)
+STATUS_EQUIVALENTES = {
+    "ABERTA": ("ABERTA", "Pendente", "Em Andamento"),
+    "FECHADA": ("FECHADA", "Concluída"),
+}
+
+# Opções do painel (além de "Todos"), na ordem exibida
+OPCOES_FILTROS = {
+    "status": tuple(STATUS_EQUIVALENTES),
+    "empresa": ("MORACA", "ZIEHM", "MORACA/ZIEHM"),
+    "urgencia": ("Normal", "Alta", "Crítica"),
+    "tipo": ("MANUTENÇÃO CORRETIVA", "MANUTENÇÃO PREVENTIVA", "ENTRADA DE MÁQUINA"),
+}
+
+
+def montar_condicoes(status=None, empresa=None, urgencia=None, tipo=None,
+                     data_inicio=None, data_fim=None, prazo_vencido=False, hoje=None):
+    """
+    Monta as condições SQL dos filtros escolhidos.
+
+    Args:
+        status (str): "ABERTA" ou "FECHADA"
+        empresa (str): Empresa exatamente como gravada (ex: "ZIEHM")
+        urgencia (str): Urgência exatamente como gravada
+        tipo (str): Tipo exatamente como gravado
+        data_inicio (str): Data de abertura mínima (aaaa-mm-dd)
+        data_fim (str): Data de abertura máxima (aaaa-mm-dd)
+        prazo_vencido (bool): Só OS em aberto com o prazo de entrega já passado
+        hoje (str, optional): Data de referência do prazo (padrão: hoje)
+
+    Returns:
+        tuple: (lista de condições, lista de parâmetros), para juntar com AND
+    """
+    condicoes = []
+    parametros = []
+    if status:
+        equivalentes = STATUS_EQUIVALENTES.get(status, (status,))
+        condicoes.append(f"status IN ({', '.join('?' for _ in equivalentes)})")
+        parametros += equivalentes
+    for coluna, valor in (("empresa", empresa), ("urgencia", urgencia), ("tipo", tipo)):
+        if valor:
+            condicoes.append(f"{coluna} = ?")
+            parametros.append(valor)
+    if data_inicio:
+        condicoes.append("data_iso >= ?")
+        parametros.append(data_inicio)
+    if data_fim:
+        condicoes.append("data_iso <= ?")
+        parametros.append(data_fim)
+    if prazo_vencido:
+        # A data de hoje vai como parâmetro: date('now') na condição também
+        # funcionaria, mas deixaria o plano dependente da função
+        abertas = STATUS_EQUIVALENTES["ABERTA"]
+        condicoes.append(f"prazo_iso < ? AND status IN ({', '.join('?' for _ in abertas)})")
+        parametros.append(hoje or datetime.now().strftime("%Y-%m-%d"))
+        parametros += abertas
+    return condicoes, parametros
+
+
+def _combinacoes_filtros():
+    """Todas as combinações de filtros do painel (inclusive nenhum), com um valor de exemplo para cada"""
+    exemplos = {
+        "status": "ABERTA",
+        "empresa": "ZIEHM",
+        "urgencia": "Alta",
+        "tipo": "MANUTENÇÃO CORRETIVA",
+        "data_inicio": "2025-01-01",
+        "data_fim": "2025-12-31",
+        "prazo_vencido": True,
+    }
+    nomes = list(exemplos)
+    for quantidade in range(len(nomes) + 1):
+        for escolhidos in combinations(nomes, quantidade):
+            yield {nome: exemplos[nome] for nome in escolhidos}
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+
+    # Primeira página, página seguinte e OS sem data, como listar_pagina executa
+    cursores = (None, ("2025-06-01", "OS25500"), (None, "OS25500"))
+    verificadas = 0
+    with repo.leitura() as conn:
+        for filtros in _combinacoes_filtros():
+            for apos in cursores:
+                for sql, parametros in repo.consultas_pagina(filtros, apos):
+                    plano = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros + [100]).fetchall()
+                    detalhes = [linha[3] for linha in plano]
+                    varreduras = [d for d in detalhes if d.startswith("SCAN os")]
+                    assert not varreduras, f"{filtros} {apos}: {varreduras}"
+                    verificadas += 1
+            # Total exibido ao filtrar (contar_os); sem filtro o COUNT lê um índice inteiro
+            if not filtros:
+                continue
+            sql, parametros = repo.consulta_contagem(filtros)
+            detalhes = [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+            varreduras = [d for d in detalhes if d.startswith("SCAN os")]
+            assert not varreduras, f"{filtros} (contagem): {varreduras}"
+            verificadas += 1
+    print(f"{verificadas} consultas conferidas: nenhuma lê a tabela os inteira")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Geração em lote dos documentos de OS, sem abrir a interface.
+
+Seleciona as OS pelos filtros e gera, para cada uma, os documentos pedidos
+usando os mesmos geradores da tela (criar_os_ziehm, criar_os_interna,
+criar_os_visita_tecnica e criar_os_interna_andamento). O trabalho é dividido
+entre vários processos. Documentos que já existem são mantidos como estão
+(os técnicos costumam editar as planilhas depois de geradas), a menos que a
+OS tenha sido alterada depois que o arquivo foi gravado: aí o documento é
+gerado de novo. As alterações só ficam registradas por alguns dias
+(os_alteracoes); use --forcar para gerar de novo todos os documentos.
+
+Uso:
+    python gerar_lote.py --ano 2024 --empresa ZIEHM --tipos ziehm
+    python gerar_lote.py --status FECHADA --cliente "São Lucas" --tipos interna visita_tecnica
+    python gerar_lote.py --ano 2025 --saida auditoria/    # Todos os tipos em uma pasta
+    python gerar_lote.py --ano 2025 --simular             # Só lista as OS selecionadas
+    python gerar_lote.py --ano 2025 --tipos interna --forcar   # Gera de novo mesmo os já existentes
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from os_repositorio import obter_repositorio
+
+TIPOS_DOCUMENTO = ("ziehm", "interna", "visita_tecnica", "andamento")
+
+
+def _caminho_documento(tipo, numero, pasta_destino):
+    """Caminho onde o gerador do tipo grava o documento da OS"""
+    if tipo == "ziehm":
+        from os_interna_andamento import caminho_os_ziehm
+        return caminho_os_ziehm(numero, pasta_destino)
+    if tipo == "interna":
+        from os_interna import caminho_os_interna
+        return caminho_os_interna(numero, pasta_destino)
+    if tipo == "visita_tecnica":
+        from os_visita_tecnica import caminho_os_visita_tecnica
+        return caminho_os_visita_tecnica(numero, pasta_destino)
+    from os_interna_andamento import caminho_os_interna_andamento
+    return caminho_os_interna_andamento(numero, pasta_destino)
+
+
+def _gerar_documento(tipo, numero, pasta_destino):
+    """Chama o gerador do tipo; retorna o caminho gravado ou None"""
+    if tipo == "ziehm":
+        from os_interna_andamento import criar_os_ziehm, dados_cliente_ziehm, COLUNAS_ZIEHM
+        os_data = obter_repositorio().obter_os(numero, COLUNAS_ZIEHM)
+        if os_data is None:
+            return None
+        return criar_os_ziehm(numero, dados_cliente_ziehm(os_data), pasta_destino)
+    if tipo == "interna":
+        from os_interna import criar_os_interna
+        return criar_os_interna(numero, pasta_destino)
+    if tipo == "visita_tecnica":
+        from os_visita_tecnica import criar_os_visita_tecnica
+        return criar_os_visita_tecnica(numero, pasta_destino)
+    from os_interna_andamento import criar_os_interna_andamento
+    return criar_os_interna_andamento(numero, pasta_destino)
+
+
+def _desatualizado(caminho, alterada_em):
+    """Se a OS foi alterada (UTC, como em os_alteracoes) depois que o arquivo foi gravado"""
+    if alterada_em is None:
+        return False
+    gravado_em = datetime.fromtimestamp(os.path.getmtime(caminho), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return alterada_em > gravado_em
+
+
+def gerar_documentos_os(numero, tipos, pasta_destino=None, forcar=False):
+    """
+    Gera os documentos de uma OS (executado nos processos do pool).
+
+    Args:
+        numero (str): Número da OS
+        tipos (list): Tipos de documento (ver TIPOS_DOCUMENTO)
+        pasta_destino (str, optional): Pasta única para todos os documentos.
+            Se None, cada gerador usa sua pasta padrão.
+        forcar (bool): Gerar de novo também os documentos em dia
+
+    Returns:
+        list: Tuplas (tipo, situacao, detalhe), com situacao "gerado",
+            "regerado" (existia, mas a OS mudou depois), "mantido" ou "erro"
+    """
+    resultados = []
+    alterada_em = None if forcar else obter_repositorio().alterada_em(numero)
+    for tipo in tipos:
+        try:
+            caminho = _caminho_documento(tipo, numero, pasta_destino)
+            existia = os.path.exists(caminho)
+            if existia and not forcar and not _desatualizado(caminho, alterada_em):
+                resultados.append((tipo, "mantido", caminho))
+                continue
+            caminho = _gerar_documento(tipo, numero, pasta_destino)
+            if caminho:
+                resultados.append((tipo, "regerado" if existia else "gerado", caminho))
+            else:
+                resultados.append((tipo, "erro", "OS não encontrada no banco"))
+        except Exception as e:
+            resultados.append((tipo, "erro", str(e)))
+    return resultados
+
+
+def gerar_lote(numeros, tipos, pasta_destino=None, processos=None, forcar=False):
+    """
+    Gera os documentos de várias OS em paralelo e mostra o andamento.
+
+    Args:
+        numeros (list): Números das OS
+        tipos (list): Tipos de documento (ver TIPOS_DOCUMENTO)
+        pasta_destino (str, optional): Pasta única para todos os documentos
+        processos (int, optional): Quantidade de processos (padrão: núcleos da CPU)
+        forcar (bool): Gerar de novo também os documentos em dia
+
+    Returns:
+        dict: Quantidade de documentos por situação ("gerado", "regerado", "mantido", "erro")
+    """
+    contagem = {"gerado": 0, "regerado": 0, "mantido": 0, "erro": 0}
+    if not numeros:
+        return contagem
+
+    inicio = time.perf_counter()
+    # Lotes pequenos por processo: poucas idas e vindas sem deixar processos ociosos no final
+    tamanho_lote = max(1, min(16, len(numeros) // ((processos or os.cpu_count() or 1) * 4)))
+    # spawn também no Linux: um processo criado por fork herdaria as conexões
+    # SQLite abertas pelo processo principal
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        args_tipos = [tipos] * len(numeros)
+        args_pasta = [pasta_destino] * len(numeros)
+        args_forcar = [forcar] * len(numeros)
+        for indice, (numero, resultados) in enumerate(
+                zip(numeros, pool.map(gerar_documentos_os, numeros, args_tipos, args_pasta, args_forcar,
+                                      chunksize=tamanho_lote)), 1):
+            for tipo, situacao, detalhe in resultados:
+                contagem[situacao] += 1
+                if situacao == "erro":
+                    print(f"Erro em {numero} ({tipo}): {detalhe}")
+            if indice % 50 == 0 or indice == len(numeros):
+                decorrido = time.perf_counter() - inicio
+                print(f"{indice}/{len(numeros)} OS processadas "
+                      f"({(contagem['gerado'] + contagem['regerado']) / decorrido:.1f} docs/s)")
+
+    decorrido = time.perf_counter() - inicio
+    print(f"\nDocumentos gerados: {contagem['gerado']}")
+    print(f"Gerados de novo (OS alterada depois do arquivo): {contagem['regerado']}")
+    print(f"Já existentes e em dia (mantidos): {contagem['mantido']}")
+    print(f"Erros: {contagem['erro']}")
+    print(f"Tempo: {decorrido:.1f}s - {(contagem['gerado'] + contagem['regerado']) / decorrido:.1f} docs/s")
+    return contagem
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera documentos de várias OS de uma vez.")
+    parser.add_argument("--ano", type=int, help="Ano da OS (ex: 2024)")
+    parser.add_argument("--empresa", help="Empresa, como gravada no cadastro (ex: ZIEHM)")
+    parser.add_argument("--status", help="Status, como gravado no cadastro (ex: FECHADA)")
+    parser.add_argument("--cliente", help="Parte do nome do cliente")
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS_DOCUMENTO, default=list(TIPOS_DOCUMENTO),
+                        help="Documentos a gerar (padrão: todos)")
+    parser.add_argument("--saida", help="Pasta única para os documentos (padrão: pastas de cada tipo)")
+    parser.add_argument("--processos", type=int, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--simular", action="store_true", help="Só lista as OS selecionadas")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Gera de novo também os documentos que já existem e estão em dia")
+    args = parser.parse_args(argv)
+
+    pasta_destino = os.path.abspath(args.saida) if args.saida else None
+
+    # Os geradores usam caminhos relativos à pasta do sistema (moraca.db, MORACA/...)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    registros = repo.filtrar_os(ano=args.ano, empresa=args.empresa, status=args.status, cliente=args.cliente)
+    numeros = [registro["numero"] for registro in registros]
+
+    print(f"{len(numeros)} OS selecionadas; documentos: {', '.join(args.tipos)}")
+    if args.simular:
+        for registro in registros:
+            print(f"  {registro['numero']} - {registro['cliente']} ({registro['data']}, {registro['status']})")
+        return 0
+
+    contagem = gerar_lote(numeros, args.tipos, pasta_destino, args.processos, args.forcar)
+    return 1 if contagem["erro"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
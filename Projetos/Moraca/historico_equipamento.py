@@ -0,0 +1,100 @@
+"""
+Histórico de atendimentos de um equipamento (todas as OS do mesmo nº de série).
+
+O equipamento de cada OS vem do cadastro (os.equipamento_id, ver
+os_cadastros.py), identificado pelo número de série normalizado ou, sem ele,
+pelo patrimônio dentro do cliente; grafias diferentes do mesmo número ("SN
+1234", "sn-1234") caem no mesmo histórico.
+
+As duas consultas do painel leem só o índice idx_os_equipamento_historico
+(equipamento_id, data_iso, numero, tipo, status), sem abrir as linhas da
+tabela os, então o custo acompanha o número de OS do equipamento e não o
+tamanho do banco:
+- linha do tempo: as OS do equipamento, da mais recente para a mais antiga;
+- resumo: uma única consulta de agregação com as contagens, o primeiro e o
+  último atendimento e o tempo médio entre falhas (MTBF), isto é, os dias
+  entre a primeira e a última corretiva divididos pelos intervalos entre elas.
+
+Uso:
+    python historico_equipamento.py    # Confere pelo EXPLAIN QUERY PLAN que as
+                                       # consultas usam só o índice
+"""
+
+from datetime import date
+
+from filtros_os import STATUS_EQUIVALENTES
+
+# Tipos de OS contados como falha (MTBF) e como manutenção programada
+TIPO_CORRETIVA = "MANUTENÇÃO CORRETIVA"
+TIPO_PREVENTIVA = "MANUTENÇÃO PREVENTIVA"
+
+# Linha do tempo (parâmetro: equipamento_id)
+SQL_LINHA_TEMPO = '''SELECT data_iso, numero, tipo, status FROM os
+            WHERE equipamento_id = ?
+            ORDER BY data_iso DESC, numero DESC'''
+
+
+def sql_resumo():
+    """
+    Consulta de agregação do resumo do equipamento.
+
+    Returns:
+        tuple: (sql, parâmetros); falta acrescentar o equipamento_id
+    """
+    abertas = STATUS_EQUIVALENTES["ABERTA"]
+    falha = "CASE WHEN tipo = ? THEN data_iso END"
+    sql = f'''SELECT COUNT(*) AS total,
+                     COALESCE(SUM(tipo = ?), 0) AS corretivas,
+                     COALESCE(SUM(tipo = ?), 0) AS preventivas,
+                     COALESCE(SUM(status IN ({", ".join("?" for _ in abertas)})), 0) AS abertas,
+                     MIN(data_iso) AS primeira,
+                     MAX(data_iso) AS ultima,
+                     (julianday(MAX({falha})) - julianday(MIN({falha})))
+                         / NULLIF(COUNT({falha}) - 1, 0) AS mtbf_dias
+              FROM os WHERE equipamento_id = ?'''
+    return sql, [TIPO_CORRETIVA, TIPO_PREVENTIVA, *abertas, TIPO_CORRETIVA, TIPO_CORRETIVA, TIPO_CORRETIVA]
+
+
+def formatar_data(data_iso):
+    """aaaa-mm-dd -> dd/mm/aaaa ("" se a data não foi reconhecida)"""
+    return date.fromisoformat(data_iso).strftime("%d/%m/%Y") if data_iso else ""
+
+
+def intervalos(linhas):
+    """
+    Dias entre cada OS e a anterior do mesmo equipamento.
+
+    Args:
+        linhas (list): Linha do tempo, da mais recente para a mais antiga
+
+    Returns:
+        list: Dias para cada linha (None na mais antiga ou sem data)
+    """
+    dias = []
+    for atual, anterior in zip(linhas, list(linhas[1:]) + [None]):
+        if anterior is None or not atual["data_iso"] or not anterior["data_iso"]:
+            dias.append(None)
+        else:
+            dias.append((date.fromisoformat(atual["data_iso"]) - date.fromisoformat(anterior["data_iso"])).days)
+    return dias
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    sql, parametros = sql_resumo()
+    with repo.leitura() as conn:
+        # Uma leitura antes: o EXPLAIN não recarrega o esquema se a migração acabou de rodar
+        conn.execute("SELECT 1 FROM os LIMIT 1").fetchall()
+        for consulta, argumentos in ((SQL_LINHA_TEMPO, [1]), (sql, parametros + [1])):
+            plano = [linha[3] for linha in conn.execute(f"EXPLAIN QUERY PLAN {consulta}", argumentos)]
+            assert plano and all("COVERING INDEX idx_os_equipamento_historico" in d for d in plano), plano
+            print(plano[0])
+        equipamento = conn.execute('''SELECT equipamento_id FROM os WHERE equipamento_id IS NOT NULL
+                    GROUP BY equipamento_id ORDER BY COUNT(*) DESC LIMIT 1''').fetchone()
+    if equipamento is not None:
+        resumo, linhas = repo.historico_equipamento(equipamento[0])
+        print(f"Equipamento {equipamento[0]}: {dict(resumo)}")
+    print("Consultas do histórico usam só o índice")
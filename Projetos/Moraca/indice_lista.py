@@ -0,0 +1,370 @@
+"""
+Índice em memória das colunas da lista de OS (número, cliente, data e status).
+
+Filtrar a lista no SQLite por LIKE '%texto%' lê a tabela inteira a cada tecla.
+O IndiceListaOS carrega essas colunas uma vez, em arrays paralelos compactos:
+
+- cliente, data e status: um código por OS (arrays 'I' e 'B') e a lista dos
+  valores distintos à parte, já que a mesma clínica e a mesma data se repetem
+  em muitas OS;
+- dia: aaaammdd como inteiro de 4 bytes (array 'i'), 0 quando a data não foi
+  reconhecida, para os filtros de período;
+- texto de busca: número e cliente de cada OS, em minúsculas e sem acentos,
+  concatenados em uma única string separada por '\\0'. Procurar um trecho é
+  um str.find na string inteira (feito em C), e a OS de cada ocorrência sai
+  por bisect no array de inícios.
+
+Com o NumPy instalado (opcional), os filtros de status e data são aplicados
+sobre os arrays sem copiá-los (numpy.frombuffer); sem ele, por máscaras de
+bytes montadas em C (bytes.translate) e geradores que param assim que o
+limite de resultados é atingido. O consumo de memória é informado ao carregar
+e, acima do limite, o índice não é usado (as telas voltam a consultar o
+banco).
+
+O índice é mantido pelas alterações de os_alteracoes (ver
+monitor_alteracoes.py): OS removidas ou alteradas são marcadas como mortas e
+a versão atual entra em uma área de acréscimos, percorrida à parte. Quando os
+acréscimos crescem, o índice é reorganizado em memória, sem reler o banco.
+
+Uso:
+    python indice_lista.py [texto]    # Carrega o índice e mede um filtro
+"""
+
+import heapq
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from itertools import islice
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from os_busca import normalizar_texto
+from os_repositorio import RegistroOS
+
+# Separador das chaves na string de busca (não aparece em número nem cliente)
+SEPARADOR = "\0"
+
+
+def _dia(data_iso):
+    """aaaa-mm-dd -> aaaammdd (0 se a data não foi reconhecida)"""
+    return int(data_iso.replace("-", "")) if data_iso else 0
+
+
+class _Dicionario:
+    """Valores distintos de uma coluna, cada um com um código sequencial"""
+
+    def __init__(self, maximo=None):
+        self.valores = []
+        self.codigos = {}
+        self.maximo = maximo
+
+    def codigo(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            if self.maximo is not None and len(self.valores) == self.maximo:
+                raise ValueError(f"Mais de {self.maximo} valores distintos no índice da lista")
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def memoria(self):
+        return (sys.getsizeof(self.valores) + sys.getsizeof(self.codigos)
+                + sum(sys.getsizeof(valor) for valor in self.valores if valor is not None))
+
+
+class IndiceListaOS:
+    """Colunas da lista de OS em arrays paralelos, para filtrar sem ir ao banco"""
+
+    def __init__(self, linhas, ultima_alteracao=0):
+        """
+        Args:
+            linhas (list): Tuplas (numero, cliente, data, status, data_iso), na
+                ordem da lista (RepositorioOS.listar_indice)
+            ultima_alteracao (int): Id de os_alteracoes já refletido nas linhas
+        """
+        self.ultima_alteracao = ultima_alteracao
+        self._montar(linhas, (_dia(linha[4]) for linha in linhas))
+
+    @classmethod
+    def carregar(cls, repo, memoria_max_mb=64):
+        """
+        Lê as OS do banco e monta o índice (pode rodar fora da thread da interface).
+
+        Args:
+            repo (RepositorioOS): Repositório do banco
+            memoria_max_mb (float): Memória máxima que o índice pode ocupar
+
+        Returns:
+            IndiceListaOS: Índice montado, ou None se passar do limite de memória
+        """
+        inicio = time.perf_counter()
+        # Lida antes das OS: alterações repetidas depois são inofensivas, perdidas não
+        ultima = repo.ultima_alteracao()
+        indice = cls(repo.listar_indice(), ultima)
+        memoria_mb = indice.memoria() / (1024 * 1024)
+        print(f"Índice da lista: {len(indice)} OS, {memoria_mb:.1f} MB "
+              f"(limite {memoria_max_mb} MB), {(time.perf_counter() - inicio) * 1000:.0f} ms"
+              f"{'' if numpy is not None else ', sem NumPy'}")
+        if memoria_mb > memoria_max_mb:
+            print("Índice da lista desativado: acima do limite de memória")
+            return None
+        return indice
+
+    def _montar(self, linhas, dias):
+        """(Re)cria todos os arrays a partir das linhas, já ordenadas, e das datas (aaaammdd)"""
+        self._nomes_clientes = _Dicionario()
+        self._nomes_datas = _Dicionario()
+        self._nomes_status = _Dicionario(maximo=256)
+        self._chaves_clientes = []  # Cliente normalizado, por código de cliente
+
+        self._numeros = [linha[0] for linha in linhas]
+        self._clientes = array("I", (self._codigo_cliente(linha[1]) for linha in linhas))
+        self._datas = array("I", (self._nomes_datas.codigo(linha[2]) for linha in linhas))
+        self._status = array("B", (self._nomes_status.codigo(linha[3]) for linha in linhas))
+        self._dias = array("i", dias)
+        self._vivas = bytearray(b"\1") * len(linhas)
+        self._posicoes = {numero: posicao for posicao, numero in enumerate(self._numeros)}
+
+        # Linhas da string de busca: a chave da OS i começa em _inicios[i]
+        chaves = [self._chave_busca(i) for i in range(len(linhas))]
+        self._inicios = array("i")
+        posicao = 1
+        for chave in chaves:
+            self._inicios.append(posicao)
+            posicao += len(chave) + 1
+        self._texto = SEPARADOR + SEPARADOR.join(chaves)
+
+        # OS incluídas ou alteradas depois da montagem ficam no fim, fora da string
+        self._base = len(linhas)
+        self._chaves_acrescidas = []
+
+    def _codigo_cliente(self, cliente):
+        codigo = self._nomes_clientes.codigo(cliente)
+        if codigo == len(self._chaves_clientes):
+            # Cada cliente distinto é normalizado uma única vez
+            self._chaves_clientes.append(normalizar_texto(cliente).replace(SEPARADOR, " "))
+        return codigo
+
+    def _chave_busca(self, posicao):
+        """Texto procurado pelo filtro: número (com e sem "OS") e cliente, normalizados"""
+        numero = normalizar_texto(self._numeros[posicao]).replace(SEPARADOR, " ")
+        return f"{numero} {numero[2:]} {self._chaves_clientes[self._clientes[posicao]]}"
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def __contains__(self, numero):
+        return numero in self._posicoes
+
+    def memoria(self):
+        """Bytes ocupados pelo índice (arrays, strings, listas e dicionários)"""
+        total = sys.getsizeof(self._texto) + sys.getsizeof(self._vivas)
+        for arr in (self._clientes, self._datas, self._status, self._dias, self._inicios):
+            total += arr.buffer_info()[1] * arr.itemsize
+        total += sys.getsizeof(self._numeros) + sum(sys.getsizeof(numero) for numero in self._numeros)
+        total += sys.getsizeof(self._posicoes)
+        total += sum(sys.getsizeof(chave) for chave in self._chaves_clientes)
+        for dicionario in (self._nomes_clientes, self._nomes_datas, self._nomes_status):
+            total += dicionario.memoria()
+        return total
+
+    # ============== ALTERAÇÕES ==============
+
+    def aplicar(self, alteracoes):
+        """
+        Atualiza o índice com linhas de RepositorioOS.listar_alteracoes.
+
+        Args:
+            alteracoes (list): Alterações (id, numero, cliente, data, status,
+                data_iso, removida); aplicar a mesma alteração duas vezes não
+                muda o resultado
+        """
+        for alteracao in alteracoes:
+            numero = alteracao["numero"]
+            posicao = self._posicoes.pop(numero, None)
+            if posicao is not None:
+                self._vivas[posicao] = 0
+            if not alteracao["removida"]:
+                posicao = len(self._numeros)
+                self._posicoes[numero] = posicao
+                self._numeros.append(numero)
+                self._clientes.append(self._codigo_cliente(alteracao["cliente"]))
+                self._datas.append(self._nomes_datas.codigo(alteracao["data"]))
+                self._status.append(self._nomes_status.codigo(alteracao["status"]))
+                self._dias.append(_dia(alteracao["data_iso"]))
+                self._vivas.append(1)
+                self._chaves_acrescidas.append(self._chave_busca(posicao))
+            self.ultima_alteracao = max(self.ultima_alteracao, alteracao["id"])
+
+        # Muitos acréscimos deixam o filtro lento: reorganizar em memória
+        if len(self._chaves_acrescidas) > max(1000, self._base // 10):
+            self.reorganizar()
+
+    def reorganizar(self):
+        """Remonta os arrays só com as OS vivas, na ordem da lista"""
+        vivas = sorted(self._posicoes.values(), key=self._ordem, reverse=True)
+        linhas = [
+            (
+                self._numeros[i],
+                self._nomes_clientes.valores[self._clientes[i]],
+                self._nomes_datas.valores[self._datas[i]],
+                self._nomes_status.valores[self._status[i]],
+            )
+            for i in vivas
+        ]
+        self._montar(linhas, [self._dias[i] for i in vivas])
+
+    def _ordem(self, posicao):
+        """Chave da ordem da lista (data e número, usada em ordem decrescente)"""
+        return self._dias[posicao], self._numeros[posicao]
+
+    # ============== FILTROS ==============
+
+    def filtrar(self, texto=None, status=None, data_inicio=None, data_fim=None, limite=None):
+        """
+        OS que atendem a todos os filtros, na ordem da lista.
+
+        Args:
+            texto (str): Trecho do número ou do cliente (sem diferenciar
+                maiúsculas nem acentos)
+            status (list): Status aceitos, exatamente como gravados
+            data_inicio (str): Data mínima (aaaa-mm-dd)
+            data_fim (str): Data máxima (aaaa-mm-dd)
+            limite (int): Quantidade máxima de resultados
+
+        Returns:
+            list: RegistroOS com numero, cliente, data e status
+        """
+        codigos = None
+        if status is not None:
+            codigos = {self._nomes_status.codigos[nome] for nome in status if nome in self._nomes_status.codigos}
+        inicio = _dia(data_inicio) if data_inicio else None
+        fim = _dia(data_fim) if data_fim else None
+
+        chave = normalizar_texto(texto).strip() if texto else ""
+        candidatas = self._ocorrencias(chave) if chave else None
+        base = self._filtrar_base(candidatas, codigos, inicio, fim)
+
+        acrescidas = [
+            self._base + i for i, chave_acrescida in enumerate(self._chaves_acrescidas)
+            if (not chave or chave in chave_acrescida)
+            and self._aceita(self._base + i, codigos, inicio, fim)
+        ]
+        if acrescidas:
+            acrescidas.sort(key=self._ordem, reverse=True)
+            posicoes = heapq.merge(base, acrescidas, key=self._ordem, reverse=True)
+        else:
+            posicoes = base
+
+        clientes, datas, status = self._nomes_clientes.valores, self._nomes_datas.valores, self._nomes_status.valores
+        return [
+            RegistroOS(
+                numero=self._numeros[posicao],
+                cliente=clientes[self._clientes[posicao]],
+                data=datas[self._datas[posicao]],
+                status=status[self._status[posicao]]
+            )
+            for posicao in islice(posicoes, limite)
+        ]
+
+    def _ocorrencias(self, chave):
+        """Posições (da área principal) cujo texto de busca contém a chave, em ordem"""
+        texto, inicios = self._texto, self._inicios
+        achado = texto.find(chave)
+        while achado != -1:
+            posicao = bisect_right(inicios, achado) - 1
+            yield posicao
+            # Continuar na OS seguinte: uma ocorrência por OS basta
+            proxima = inicios[posicao + 1] if posicao + 1 < len(inicios) else len(texto)
+            achado = texto.find(chave, proxima)
+
+    def _aceita(self, posicao, codigos, inicio, fim):
+        if not self._vivas[posicao]:
+            return False
+        if codigos is not None and self._status[posicao] not in codigos:
+            return False
+        dia = self._dias[posicao]
+        return (inicio is None or dia >= inicio) and (fim is None or dia <= fim)
+
+    def _filtrar_base(self, candidatas, codigos, inicio, fim):
+        """Aplica os filtros de status e data na área principal (iterador, em ordem)"""
+        if numpy is not None:
+            return self._filtrar_base_numpy(candidatas, codigos, inicio, fim)
+
+        # Máscara (1 byte por OS) das vivas com status aceito, montada em C:
+        # translate troca cada código pelo seu 0/1 e o "e" bit a bit é feito
+        # sobre os bytes convertidos em um único inteiro
+        base = self._base
+        mascara = bytes(self._vivas[:base])
+        if codigos is not None:
+            tabela = bytes(1 if codigo in codigos else 0 for codigo in range(256))
+            aceitos = self._status.tobytes().translate(tabela)[:base]
+            mascara = (int.from_bytes(mascara, "big") & int.from_bytes(aceitos, "big")).to_bytes(base, "big")
+
+        if candidatas is None:
+            candidatas = self._posicoes_marcadas(mascara)
+        else:
+            candidatas = (posicao for posicao in candidatas if mascara[posicao])
+
+        if inicio is None and fim is None:
+            return candidatas
+        dias = self._dias
+        return (
+            posicao for posicao in candidatas
+            if (inicio is None or dias[posicao] >= inicio) and (fim is None or dias[posicao] <= fim)
+        )
+
+    @staticmethod
+    def _posicoes_marcadas(mascara):
+        """Posições com 1 na máscara, em ordem"""
+        posicao = mascara.find(1)
+        while posicao != -1:
+            yield posicao
+            posicao = mascara.find(1, posicao + 1)
+
+    def _filtrar_base_numpy(self, candidatas, codigos, inicio, fim):
+        """Mesmos filtros, sobre visões NumPy dos arrays (sem cópia)"""
+        # As visões são descartadas ao sair: enquanto existem, os arrays não podem crescer
+        base = self._base
+        mascara = numpy.frombuffer(self._vivas, dtype=numpy.uint8, count=base).astype(bool)
+        if codigos is not None:
+            status = numpy.frombuffer(self._status, dtype=numpy.uint8, count=base)
+            mascara &= numpy.isin(status, numpy.fromiter(codigos, dtype=numpy.uint8, count=len(codigos)))
+        if inicio is not None or fim is not None:
+            dias = numpy.frombuffer(self._dias, dtype=numpy.int32, count=base)
+            if inicio is not None:
+                mascara &= dias >= inicio
+            if fim is not None:
+                mascara &= dias <= fim
+        if candidatas is None:
+            return numpy.flatnonzero(mascara).tolist()
+        candidatas = numpy.fromiter(candidatas, dtype=numpy.int64)
+        return candidatas[mascara[candidatas]].tolist()
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    indice = IndiceListaOS.carregar(repo, memoria_max_mb=1024)
+    texto = sys.argv[1] if len(sys.argv) > 1 else "a"
+
+    inicio = time.perf_counter()
+    resultado = indice.filtrar(texto=texto)
+    print(f"Filtro '{texto}': {len(resultado)} OS em {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+    # Conferência com o banco: mesmas OS, na mesma ordem da lista
+    chave = normalizar_texto(texto).strip()
+    with repo.leitura() as conn:
+        esperado = [
+            row["numero"] for row in conn.execute(
+                "SELECT numero, cliente FROM os ORDER BY data_iso DESC, numero DESC")
+            if chave in normalizar_texto(f"{row['numero']} {row['numero'][2:]} {row['cliente'] or ''}")
+        ]
+    assert [registro.numero for registro in resultado] == esperado
+    print("Resultado igual ao da consulta no banco")
@@ -0,0 +1,113 @@
+"""
+Lista de OS carregada sob demanda.
+
+O Treeview do Tk cria um item para cada linha inserida, então exibir todas
+as OS de uma vez trava a janela e ocupa memória proporcional ao total de OS.
+A ListaPaginadaOS insere apenas a primeira página e vai buscando as próximas
+no banco (paginação por chave, sem OFFSET) conforme o usuário rola a tabela
+e se aproxima do fim das linhas já carregadas.
+"""
+
+
+class ListaPaginadaOS:
+    """Controla o carregamento por páginas de um Treeview de OS"""
+
+    def __init__(self, tabela, scrollbar, carregar_pagina, exibir_registros,
+                 tamanho_pagina=100, linhas_reserva=50):
+        """
+        Args:
+            tabela: Treeview onde as linhas são exibidas
+            scrollbar: Barra de rolagem vertical da tabela
+            carregar_pagina: Função (apos, limite) -> registros, como
+                RepositorioOS.listar_pagina
+            exibir_registros: Função (registros, substituir) que mostra os
+                registros na tabela; substituir=True na primeira página (a
+                tabela passa a ter só essas linhas) e False nas seguintes
+                (acrescentadas no fim)
+            tamanho_pagina (int): OS buscadas por vez
+            linhas_reserva (int): Quantas linhas carregadas e ainda não vistas
+                devem existir abaixo da área visível antes de buscar a próxima
+                página
+        """
+        self.tabela = tabela
+        self.scrollbar = scrollbar
+        self.carregar_pagina = carregar_pagina
+        self.exibir_registros = exibir_registros
+        self.tamanho_pagina = tamanho_pagina
+        self.linhas_reserva = linhas_reserva
+
+        self.ativa = False
+        self.esgotada = False
+        self.carregadas = 0
+        self._cursor = None
+        self._agendado = False
+
+        # A tabela passa a avisar esta classe sempre que a área visível muda
+        self.tabela.configure(yscrollcommand=self._ao_rolar)
+
+    def ativar(self):
+        """
+        Começa a exibir as OS a partir da mais recente (a primeira página substitui a tabela).
+
+        Returns:
+            int: Quantidade de OS da primeira página
+        """
+        self.ativa = True
+        self.esgotada = False
+        self.carregadas = 0
+        self._cursor = None
+        return self.carregar_proxima()
+
+    def carregada(self, data_iso, numero):
+        """
+        Se uma OS nesta posição da ordem da lista cai nas páginas já carregadas.
+
+        A ordem é a de RepositorioOS.listar_pagina: OS com data (data_iso e
+        numero decrescentes) e depois as sem data (numero decrescente).
+        """
+        if self.esgotada:
+            return True
+        if self._cursor is None:
+            return False
+        data_cursor, numero_cursor = self._cursor
+        if data_iso is None:
+            return data_cursor is None and numero >= numero_cursor
+        return data_cursor is None or (data_iso, numero) >= (data_cursor, numero_cursor)
+
+    def desativar(self):
+        """Para de carregar páginas (a tabela vai exibir outro conteúdo)"""
+        self.ativa = False
+
+    def carregar_proxima(self):
+        """
+        Busca a próxima página no banco e insere no fim da tabela.
+
+        Returns:
+            int: Quantidade de OS inseridas
+        """
+        self._agendado = False
+        if not self.ativa or self.esgotada:
+            return 0
+
+        registros = self.carregar_pagina(self._cursor, self.tamanho_pagina)
+        self.exibir_registros(registros, self._cursor is None)
+
+        if len(registros) < self.tamanho_pagina:
+            self.esgotada = True
+        if registros:
+            ultimo = registros[-1]
+            self._cursor = (ultimo["data_iso"], ultimo["numero"])
+        self.carregadas += len(registros)
+        return len(registros)
+
+    def _ao_rolar(self, primeiro, ultimo):
+        """Repassa a posição para a barra de rolagem e busca mais linhas perto do fim"""
+        self.scrollbar.set(primeiro, ultimo)
+        if not self.ativa or self.esgotada or self._agendado:
+            return
+
+        nao_vistas = (1.0 - float(ultimo)) * self.carregadas
+        if nao_vistas < self.linhas_reserva:
+            # Carregar fora do callback de rolagem, que é chamado pelo próprio Tk
+            self._agendado = True
+            self.tabela.after_idle(self.carregar_proxima)
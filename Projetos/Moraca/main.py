@@ -1,6 +1,5 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import sqlite3
 from datetime import datetime
 import os
 from tkinter import messagebox
@@ -17,15 +16,30 @@ import openpyxl
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image
-from os_interna_andamento import criar_os_interna_andamento, criar_os_ziehm
+from os_interna_andamento import (criar_os_interna_andamento, criar_os_ziehm, montar_os_ziehm, caminho_os_ziehm,
+                                  dados_cliente_ziehm, COLUNAS_ZIEHM)
 import subprocess
 import platform
 import sys
 from licenca import verificar_licenca, carregar_licenca, gerar_nova_licenca_demo
 from ativar_licenca import AtivadorLicenca
-import re
 from os_visita_tecnica import criar_os_visita_tecnica
 from os_interna import criar_os_interna
+from numero_os import normalizar_numero_os
+from os_repositorio import obter_repositorio, RegistroOS, normalizar_data, COLUNAS_CONTATO
+from filtros_os import OPCOES_FILTROS
+from os_documentos import caminho_documento
+from pastas_os import ResolvedorPastas, PASTA_BASE_OS, MESES, retomar_movimentacoes
+from lista_paginada import ListaPaginadaOS
+from visao_tabela import VisaoTabela
+from busca_incremental import BuscaIncremental
+from indice_lista import IndiceListaOS
+from autocompletar import IndicePrefixos, CampoAutocompletar
+from historico_equipamento import formatar_data, intervalos
+from monitor_alteracoes import MonitorAlteracoes
+from executor_tarefas import ExecutorTarefas, BarraTarefas
+from modelos_planilha import preencher_modelo
+from pacote_documentos import PacoteDocumentos, gravar_documento, renderizar_xlsx, renderizar_docx
 
 # Classe de diálogo personalizada para substituir messagebox
 class DialogoPersonalizado:
@@ -151,9 +165,26 @@ class MoracaOS:
         # Verificar e copiar logo se necessário
         self.verificar_logo()
         
+        # Repositório compartilhado (conexões com o banco ficam abertas)
+        self.repo = obter_repositorio()
+        self.pastas = ResolvedorPastas(self.repo)
+        
         # Criar banco de dados
         self.criar_banco()
         
+        # Tarefas demoradas (banco, documentos, pastas) rodam fora da thread da interface
+        self.executor = ExecutorTarefas(self.root)
+        BarraTarefas(self.root, self.executor).pack(side=BOTTOM, fill=X)
+        
+        # Movimentações de pasta interrompidas (queda, rede) são concluídas em segundo plano
+        if self.repo.listar_movimentacoes_pendentes():
+            self.executor.submeter(
+                lambda tarefa: retomar_movimentacoes(self.repo, tarefa.informar_progresso),
+                descricao="Concluindo movimentação de pastas...",
+                cancelavel=False,
+                ao_concluir=lambda concluidas: self.pastas.invalidar()
+            )
+        
         # Container principal para permitir scrolling
         main_container = ttk.Frame(self.root)
         main_container.pack(fill=BOTH, expand=YES)
@@ -203,8 +234,11 @@ class MoracaOS:
             text="Pesquisar OS:"
         ).pack(side=LEFT, padx=5)
         
-        self.search_entry = ttk.Entry(self.search_frame, width=30)
+        # A pesquisa acompanha a digitação (ver busca_incremental.py)
+        self.termo_busca = ttk.StringVar()
+        self.search_entry = ttk.Entry(self.search_frame, width=30, textvariable=self.termo_busca)
         self.search_entry.pack(side=LEFT, padx=5)
+        self.search_entry.bind("<Return>", lambda e: self.buscar_os())
         
         ttk.Button(
             self.search_frame,
@@ -220,6 +254,19 @@ class MoracaOS:
             style="secondary.Outline.TButton"
         ).pack(side=LEFT, padx=5)
         
+        # Quantidade de OS encontradas (no lugar das mensagens a cada busca)
+        self.resultado_busca = ttk.Label(self.search_frame, text="")
+        self.resultado_busca.pack(side=LEFT, padx=5)
+        
+        # "Você quis dizer" quando a pesquisa não encontra nada (clique para pesquisar)
+        self.sugestao = None
+        self.sugestao_busca = ttk.Label(self.search_frame, text="", cursor="hand2", style="info.TLabel")
+        self.sugestao_busca.pack(side=LEFT, padx=5)
+        self.sugestao_busca.bind("<Button-1>", lambda e: self.usar_sugestao())
+        
+        # Filtros por status, empresa, urgência, tipo, período e prazo
+        self.criar_painel_filtros()
+        
         # Frame para botões
         self.button_frame = ttk.Frame(self.main_frame)
         self.button_frame.pack(pady=10)
@@ -361,8 +408,199 @@ class MoracaOS:
         # Adicionar evento de clique duplo para abrir a aba de impressão
         self.tabela.bind("<Double-1>", self.abrir_aba_impressao)
         
+        # Cores das linhas conforme o status e dos resultados de busca (configuradas uma vez)
+        self.tabela.tag_configure("aberta", background=self.cores["aberta"])
+        self.tabela.tag_configure("fechada", background=self.cores["fechada"])
+        self.tabela.tag_configure("encontrado", background=self.cores["encontrado"])
+        
+        # Todas as alterações da tabela passam pela visão, que só aplica as diferenças
+        self.visao_tabela = VisaoTabela(self.tabela)
+        
+        # Lista completa carregada por páginas conforme a rolagem
+        self.lista_paginada = ListaPaginadaOS(
+            self.tabela,
+            y_scrollbar,
+            lambda apos, limite: self.repo.listar_pagina(apos, limite, self.filtros),
+            self.exibir_registros_os
+        )
+        
         # Atualizar lista
+        self.exibindo_busca = False
         self.atualizar_lista()
+        
+        # Pesquisa feita enquanto o usuário digita, em segundo plano
+        self.busca = BuscaIncremental(
+            self.root, self.executor, self.repo, self.exibir_resultado_busca, self.limpar_busca
+        )
+        self.termo_busca.trace_add("write", lambda *args: self.busca.alterado(self.termo_busca.get()))
+        
+        # OS gravadas em qualquer estação aparecem na lista em até meio segundo
+        self.monitor_alteracoes = MonitorAlteracoes(
+            self.root, self.repo, self.aplicar_alteracoes, self.recarregar_lista
+        )
+        self.monitor_alteracoes.iniciar()
+        
+        # Índice em memória da lista (número, cliente, data e status), carregado em segundo plano
+        self.indice_lista = None
+        self._alteracoes_indice = None  # Alterações recebidas enquanto o índice é montado
+        self.carregar_indice_lista()
+        
+        # Valores já usados nos campos do formulário de nova OS (autocompletar)
+        self.indice_autocompletar = None
+        self.executor.submeter(
+            lambda tarefa: IndicePrefixos.carregar(self.repo),
+            descricao="Carregando sugestões do formulário...",
+            cancelavel=False,
+            ao_concluir=lambda indice: setattr(self, "indice_autocompletar", indice),
+            ao_falhar=lambda erro: print(f"Autocompletar indisponível: {erro}")
+        )
+    
+    def carregar_indice_lista(self):
+        """Monta o índice em memória da lista em segundo plano (ver indice_lista.py)"""
+        if self._alteracoes_indice is None:
+            self._alteracoes_indice = []
+        
+        def falhou(erro):
+            self._alteracoes_indice = None
+            print(f"Índice da lista indisponível: {erro}")
+        
+        self.executor.submeter(
+            lambda tarefa: self._montar_indice_lista(),
+            descricao="Carregando índice da lista...",
+            cancelavel=False,
+            ao_concluir=self._indice_lista_carregado,
+            ao_falhar=falhou
+        )
+    
+    def _montar_indice_lista(self):
+        """Lê o índice e aplica as alterações gravadas enquanto ele era lido (fora da thread da interface)"""
+        indice = IndiceListaOS.carregar(self.repo)
+        if indice is not None:
+            while True:
+                alteracoes = self.repo.listar_alteracoes(indice.ultima_alteracao, limite=5000)
+                if not alteracoes:
+                    break
+                indice.aplicar(alteracoes)
+        return indice
+    
+    def _indice_lista_carregado(self, indice):
+        """Põe o índice em uso com as alterações que chegaram depois da última leitura"""
+        pendentes, self._alteracoes_indice = self._alteracoes_indice or [], None
+        if indice is not None:
+            indice.aplicar([alteracao for alteracao in pendentes
+                            if alteracao["id"] > indice.ultima_alteracao])
+        self.indice_lista = indice
+        self.busca.indice = indice
+    
+    def criar_painel_filtros(self):
+        """Cria a linha de filtros da lista (ver filtros_os.py)"""
+        self.filtros = None
+        self._recarga_filtro = None  # Recarga da lista filtrada agendada (ver _aplicar_alteracoes_filtro)
+        self.filtros_frame = ttk.Frame(self.main_frame)
+        self.filtros_frame.pack(pady=(0, 10))
+        
+        self.filtros_vars = {}
+        for nome, rotulo in (("status", "Status"), ("empresa", "Empresa"), ("urgencia", "Urgência"), ("tipo", "Tipo")):
+            ttk.Label(self.filtros_frame, text=f"{rotulo}:").pack(side=LEFT, padx=(5, 2))
+            var = ttk.StringVar(value="Todos")
+            ttk.Combobox(
+                self.filtros_frame,
+                textvariable=var,
+                values=["Todos", *OPCOES_FILTROS[nome]],
+                state="readonly",
+                width=max(8, max(len(opcao) for opcao in OPCOES_FILTROS[nome]))
+            ).pack(side=LEFT, padx=(0, 5))
+            self.filtros_vars[nome] = var
+        
+        # Período de abertura (dd/mm/aaaa; em branco = sem limite)
+        for nome, rotulo in (("data_inicio", "De:"), ("data_fim", "Até:")):
+            ttk.Label(self.filtros_frame, text=rotulo).pack(side=LEFT, padx=(5, 2))
+            var = ttk.StringVar()
+            ttk.Entry(self.filtros_frame, textvariable=var, width=11).pack(side=LEFT, padx=(0, 5))
+            self.filtros_vars[nome] = var
+        
+        self.filtros_vars["prazo_vencido"] = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.filtros_frame,
+            text="Prazo vencido",
+            variable=self.filtros_vars["prazo_vencido"]
+        ).pack(side=LEFT, padx=5)
+        
+        ttk.Button(
+            self.filtros_frame,
+            text="Filtrar",
+            command=self.aplicar_filtros,
+            style="secondary.TButton"
+        ).pack(side=LEFT, padx=5)
+        
+        ttk.Button(
+            self.filtros_frame,
+            text="Limpar",
+            command=self.limpar_filtros,
+            style="secondary.Outline.TButton"
+        ).pack(side=LEFT, padx=5)
+    
+    def aplicar_filtros(self):
+        """Exibe, por páginas, as OS que atendem aos filtros escolhidos"""
+        filtros = {}
+        for nome in ("status", "empresa", "urgencia", "tipo"):
+            valor = self.filtros_vars[nome].get()
+            if valor and valor != "Todos":
+                filtros[nome] = valor
+        
+        for nome, rotulo in (("data_inicio", "inicial"), ("data_fim", "final")):
+            texto = self.filtros_vars[nome].get().strip()
+            if not texto:
+                continue
+            data_iso = normalizar_data(texto)
+            if data_iso is None:
+                mostrar_mensagem(self.root, "Filtros", f"Data {rotulo} inválida: '{texto}'. Use dd/mm/aaaa.", "aviso")
+                return
+            filtros[nome] = data_iso
+        
+        if self.filtros_vars["prazo_vencido"].get():
+            filtros["prazo_vencido"] = True
+        
+        if not filtros:
+            self.limpar_filtros()
+            return
+        
+        # Uma pesquisa ainda em andamento não deve substituir a lista filtrada
+        self.busca.cancelar()
+        self.filtros = filtros
+        self.contar_filtro()
+        self.limpar_sugestao()
+        # OS novas só entram na lista filtrada ao filtrar de novo
+        self.exibindo_busca = True
+        self.lista_paginada.ativar()
+    
+    def contar_filtro(self):
+        """Conta em segundo plano as OS do filtro atual e exibe o total"""
+        filtros = self.filtros
+        self.resultado_busca.config(text="")
+        
+        def exibir_total(total):
+            # Outro filtro pode ter sido aplicado enquanto a contagem rodava
+            if self.filtros is filtros:
+                self.resultado_busca.config(text=f"{total} OS no filtro")
+        
+        self.executor.submeter(
+            lambda tarefa: self.repo.contar_os(filtros),
+            descricao="Contando OS do filtro...",
+            ao_concluir=exibir_total,
+            ao_falhar=lambda erro: print(f"Erro ao contar as OS do filtro: {erro}")
+        )
+    
+    def limpar_filtros(self):
+        """Desmarca os filtros e volta a mostrar as últimas OS"""
+        self._desmarcar_filtros()
+        self.resultado_busca.config(text="")
+        self.atualizar_lista()
+    
+    def _desmarcar_filtros(self):
+        for nome, var in self.filtros_vars.items():
+            var.set(False if nome == "prazo_vencido" else ("" if nome.startswith("data") else "Todos"))
+        self.filtros = None
     
     def criar_estrutura_pastas(self):
         # Caminho base dos documentos técnicos
@@ -392,7 +630,7 @@ class MoracaOS:
     def criar_estrutura_os_ano_mes(self):
         """Cria a estrutura de pastas organizadas por ano e mês para as OS"""
         # Caminho base para a nova organização
-        base_path = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "os")
+        base_path = PASTA_BASE_OS
         if not os.path.exists(base_path):
             os.makedirs(base_path)
             
@@ -403,23 +641,8 @@ class MoracaOS:
             os.makedirs(pasta_ano)
             
         # Criar pasta do mês atual
-        meses = {
-            "01": "janeiro",
-            "02": "fevereiro",
-            "03": "marco",
-            "04": "abril",
-            "05": "maio",
-            "06": "junho",
-            "07": "julho",
-            "08": "agosto",
-            "09": "setembro",
-            "10": "outubro",
-            "11": "novembro",
-            "12": "dezembro"
-        }
-        
         mes_atual = datetime.now().strftime("%m")
-        nome_mes = meses.get(mes_atual, "outros")
+        nome_mes = MESES.get(mes_atual, "outros")
         pasta_mes = os.path.join(pasta_ano, f"os-{nome_mes}")
         if not os.path.exists(pasta_mes):
             os.makedirs(pasta_mes)
@@ -429,64 +652,18 @@ class MoracaOS:
         Obtém o caminho da pasta específica para uma OS
         Formato: /MORACA/MORACA1/DOCUMENTOS/tecnico/os/OS-[ANO]/os-[MES]/OS [ANO] [NUMERO] - [CLIENTE]
         
+        O mês vem da data da OS e a pasta fica gravada no banco (ver
+        pastas_os.py). A pasta não é criada aqui: quem grava arquivos cria as
+        pastas que faltarem.
+        
         Args:
             numero: Número da OS (ex: OS2519)
-            cliente: Nome do cliente
+            cliente: Nome do cliente (usado só se a OS não estiver no banco)
             
         Returns:
             str: Caminho completo da pasta para a OS específica
         """
-        # Extrair ano e número da OS
-        match = re.search(r'OS(\d{2})(\d+)', numero)
-        if match:
-            ano = match.group(1)
-            sequencia = match.group(2)
-            ano_completo = f"20{ano}"
-        else:
-            # Se não conseguir extrair, usar ano atual
-            ano = datetime.now().strftime("%y")
-            sequencia = re.sub(r'[^\d]', '', numero)
-            ano_completo = datetime.now().strftime("%Y")
-        
-        # Determinar o mês baseado na data de criação da OS
-        # Para este exemplo, usaremos o mês atual, mas idealmente seria baseado na data da OS
-        meses = {
-            "01": "janeiro",
-            "02": "fevereiro",
-            "03": "marco",
-            "04": "abril",
-            "05": "maio",
-            "06": "junho",
-            "07": "julho",
-            "08": "agosto",
-            "09": "setembro",
-            "10": "outubro",
-            "11": "novembro",
-            "12": "dezembro"
-        }
-        
-        mes_atual = datetime.now().strftime("%m")
-        nome_mes = meses.get(mes_atual, "outros")
-        
-        # Nome da pasta específica da OS
-        nome_cliente_simplificado = re.sub(r'[^\w\s-]', '', cliente).strip()[:30]  # Limitar tamanho e remover caracteres especiais
-        nome_pasta_os = f"OS {ano} {sequencia} - {nome_cliente_simplificado}"
-        
-        # Caminho completo
-        base_path = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "os")
-        pasta_ano = os.path.join(base_path, f"OS-{ano_completo}")
-        pasta_mes = os.path.join(pasta_ano, f"os-{nome_mes}")
-        pasta_os = os.path.join(pasta_mes, nome_pasta_os)
-        
-        # Garantir que as pastas existam
-        if not os.path.exists(pasta_ano):
-            os.makedirs(pasta_ano)
-        if not os.path.exists(pasta_mes):
-            os.makedirs(pasta_mes)
-        if not os.path.exists(pasta_os):
-            os.makedirs(pasta_os)
-            
-        return pasta_os
+        return self.pastas.pasta_os(numero, cliente)
     
     def verificar_logo(self):
         """Verifica se a logo existe na pasta assets, se não existir, cria uma logo placeholder"""
@@ -595,55 +772,58 @@ class MoracaOS:
             ttk.Label(frame, text="MORACA SISTEMAS - ZIEHM IMAGING", font=("Helvetica", 12, "bold")).pack()
     
     def criar_banco(self):
-        conn = sqlite3.connect('moraca.db')
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS os
-                    (numero TEXT PRIMARY KEY,
-                     cliente TEXT,
-                     maquina TEXT,
-                     descricao TEXT,
-                     urgencia TEXT,
-                     data TEXT,
-                     status TEXT,
-                     tipo TEXT,
-                     patrimonio TEXT,
-                     numero_serie TEXT,
-                     local TEXT,
-                     endereco TEXT,
-                     cidade TEXT,
-                     telefone TEXT,
-                     cep TEXT,
-                     contato_nome TEXT,
-                     contato_telefone1 TEXT,
-                     contato_telefone2 TEXT,
-                     descricao_servico TEXT,
-                     necessita_viagem TEXT,
-                     tipo_hospedagem TEXT,
-                     prazo_entrega TEXT,
-                     empresa TEXT)''')
-        conn.commit()
-        
-        # Verificar se a coluna 'empresa' existe, e adicionar se não existir
-        c.execute("PRAGMA table_info(os)")
-        colunas = [info[1] for info in c.fetchall()]
-        if 'empresa' not in colunas:
-            try:
-                c.execute("ALTER TABLE os ADD COLUMN empresa TEXT")
-                print("Coluna 'empresa' adicionada com sucesso ao banco de dados.")
-                conn.commit()
-            except sqlite3.OperationalError as e:
-                print(f"Erro ao adicionar coluna 'empresa': {e}")
+        self.repo.criar_esquema()
+        self.repo.limpar_alteracoes()
+    
+    def destinos_arquivo_os(self, numero, cliente, status, extensao):
+        """
+        Caminhos onde os arquivos principais de uma OS são gravados.
+        
+        Returns:
+            list: Arquivo na pasta do cliente (principal) e na pasta de
+                compatibilidade OSs/<status>/<numero>/
+        """
+        # Obter o caminho da pasta específica para esta OS
+        pasta_os = self.get_pasta_os_cliente(numero, cliente)
+        
+        # Manter o salvamento original para compatibilidade
+        pasta_status = {"ABERTA": "Pendentes", "FECHADA": "Concluidas"}.get(status, "Pendentes")
+        pasta_compat = os.path.join("OSs", pasta_status, numero)
         
-        conn.close()
+        return [
+            os.path.join(pasta_os, f"{numero}.{extensao}"),
+            os.path.join(pasta_compat, f"{numero}.{extensao}")
+        ]
     
-    def gerar_arquivo_excel_os(self, numero, cliente, maquina, descricao, urgencia, data, status, tipo,
-                        patrimonio, numero_serie, local, endereco, cidade, telefone, cep,
-                        contato_nome, contato_telefone1, contato_telefone2, descricao_servico,
-                        necessita_viagem, tipo_hospedagem, prazo_entrega, empresa):
+    def gerar_arquivo_excel_os(self, registro):
+        """Gera a planilha da OS (RegistroOS) e grava na pasta do cliente e na de compatibilidade"""
+        wb = self.montar_planilha_os(registro)
+        destinos = self.destinos_arquivo_os(registro.numero, registro.cliente, registro.status, "xlsx")
+        arquivo_excel = gravar_documento(renderizar_xlsx(wb), destinos, (registro.numero, "planilha"))
+        print(f"Arquivo Excel salvo em: {arquivo_excel}")
+        return arquivo_excel
+    
+    def montar_planilha_os(self, registro):
+        """Monta a planilha padrão da OS (RegistroOS) sem gravar em disco"""
+        valores = {
+            'numero': registro.numero,
+            'cliente': registro.cliente,
+            'prazo_entrega': registro.prazo_entrega,
+            'maquina': registro.maquina,
+            'numero_serie': registro.numero_serie,
+            'patrimonio': registro.patrimonio,
+            'data': registro.data,
+            'local': registro.local,
+            'descricao': registro.descricao,
+        }
+        return preencher_modelo("os_padrao", self._construir_planilha_os, valores)
+    
+    def _construir_planilha_os(self, valores):
+        """Monta o layout da planilha padrão da OS (compilado uma vez por modelos_planilha)"""
         # Criar uma nova planilha
         wb = openpyxl.Workbook()
         ws = wb.active
-        ws.title = f"OS {numero}"
+        ws.title = f"OS {valores['numero']}"
         
         # Ajustar a altura da linha
         ws.row_dimensions[1].height = 25
@@ -675,31 +855,31 @@ class MoracaOS:
         
         # Título
         ws.merge_cells('A1:E1')
-        ws['A1'] = f"O.S. {numero}"
+        ws['A1'] = f"O.S. {valores['numero']}"
         ws['A1'].font = titulo_font
         ws['A1'].alignment = center_align
         ws['A1'].border = medium_border
         
         # Cliente e Prazo
         ws.merge_cells('A2:E2')
-        ws['A2'] = f"Cliente: {cliente}"
+        ws['A2'] = f"Cliente: {valores['cliente']}"
         ws['A2'].font = cabecalho_font
         ws['A2'].alignment = center_align
         ws['A2'].border = medium_border
         
         ws.merge_cells('A3:E3')
-        ws['A3'] = f"Prazo de Entrega Final: {prazo_entrega}"
+        ws['A3'] = f"Prazo de Entrega Final: {valores['prazo_entrega']}"
         ws['A3'].font = cabecalho_font
         ws['A3'].alignment = center_align
         ws['A3'].border = medium_border
         
         # Informações básicas
         info_rows = [
-            ("Equipamento:", maquina),
-            ("Número de Série:", numero_serie),
-            ("Nº de Patrimônio:", patrimonio),
-            ("Data de abertura O.S.I.:", data),
-            ("Local:", local)
+            ("Equipamento:", valores['maquina']),
+            ("Número de Série:", valores['numero_serie']),
+            ("Nº de Patrimônio:", valores['patrimonio']),
+            ("Data de abertura O.S.I.:", valores['data']),
+            ("Local:", valores['local'])
         ]
         
         row = 4
@@ -747,7 +927,7 @@ class MoracaOS:
         
         # Texto completo da descrição
         ws.merge_cells(f'A{row}:E{row+5}')
-        ws[f'A{row}'] = descricao
+        ws[f'A{row}'] = valores['descricao']
         ws[f'A{row}'].font = normal_font
         ws[f'A{row}'].alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
         ws[f'A{row}'].border = medium_border
@@ -760,28 +940,18 @@ class MoracaOS:
         ws.page_setup.fitToHeight = 1
         ws.page_setup.fitToWidth = 1
         
-        # Obter o caminho da pasta específica para esta OS
-        pasta_os = self.get_pasta_os_cliente(numero, cliente)
-        
-        # Salvar arquivo Excel na nova estrutura
-        arquivo_excel = os.path.join(pasta_os, f"{numero}.xlsx")
-        wb.save(arquivo_excel)
-        
-        print(f"Arquivo Excel salvo em: {arquivo_excel}")
-        
-        # Manter o salvamento original para compatibilidade
-        pasta_status = {"ABERTA": "Pendentes", "FECHADA": "Concluidas"}.get(status, "Pendentes")
-        pasta_compat = os.path.join("OSs", pasta_status, numero)
-        if not os.path.exists(pasta_compat):
-            os.makedirs(pasta_compat)
-        
-        arquivo_excel_compat = os.path.join(pasta_compat, f"{numero}.xlsx")
-        wb.save(arquivo_excel_compat)
+        return wb
+    
+    def gerar_arquivo_os(self, registro):
+        """Gera o documento Word da OS (RegistroOS) e grava na pasta do cliente e na de compatibilidade"""
+        doc = self.montar_documento_os(registro)
+        destinos = self.destinos_arquivo_os(registro.numero, registro.cliente, registro.status, "docx")
+        arquivo_word = gravar_documento(renderizar_docx(doc), destinos, (registro.numero, "word"))
+        print(f"Arquivo Word salvo em: {arquivo_word}")
+        return arquivo_word
     
-    def gerar_arquivo_os(self, numero, cliente, maquina, descricao, urgencia, data, status, tipo,
-                        patrimonio, numero_serie, local, endereco, cidade, telefone, cep,
-                        contato_nome, contato_telefone1, contato_telefone2, descricao_servico,
-                        necessita_viagem, tipo_hospedagem, prazo_entrega, empresa):
+    def montar_documento_os(self, registro):
+        """Monta o documento Word da OS (RegistroOS) sem gravar em disco"""
         # Criar documento
         doc = Document()
         
@@ -796,128 +966,108 @@ class MoracaOS:
         heading_style.font.bold = True
         
         # Título do documento
-        doc.add_heading(f"Ordem de Serviço: {numero}", 0)
+        doc.add_heading(f"Ordem de Serviço: {registro.numero}", 0)
         
         # Adicionar logo
-        self.adicionar_cabecalho(doc, numero)
+        self.adicionar_cabecalho(doc, registro.numero)
         
         # Adicionar informações da OS
         p = doc.add_paragraph()
         p.add_run("Empresa: ").bold = True
-        p.add_run(empresa)
+        p.add_run(registro.empresa)
         
         p = doc.add_paragraph()
         p.add_run("Cliente: ").bold = True
-        p.add_run(cliente)
+        p.add_run(registro.cliente)
         
         p = doc.add_paragraph()
         p.add_run("Máquina: ").bold = True
-        p.add_run(maquina)
+        p.add_run(registro.maquina)
         
         # Adicionar campos novos
-        if numero_serie:
+        if registro.numero_serie:
             p = doc.add_paragraph()
             p.add_run("Número de Série: ").bold = True
-            p.add_run(numero_serie)
+            p.add_run(registro.numero_serie)
             
-        if patrimonio:
+        if registro.patrimonio:
             p = doc.add_paragraph()
             p.add_run("Patrimônio: ").bold = True
-            p.add_run(patrimonio)
+            p.add_run(registro.patrimonio)
             
-        if local:
+        if registro.local:
             p = doc.add_paragraph()
             p.add_run("Local: ").bold = True
-            p.add_run(local)
+            p.add_run(registro.local)
             
-        if endereco:
+        if registro.endereco:
             p = doc.add_paragraph()
             p.add_run("Endereço: ").bold = True
-            p.add_run(endereco)
+            p.add_run(registro.endereco)
             
-        if cidade:
+        if registro.cidade:
             p = doc.add_paragraph()
             p.add_run("Cidade: ").bold = True
-            p.add_run(cidade)
+            p.add_run(registro.cidade)
             
-        if telefone:
+        if registro.telefone:
             p = doc.add_paragraph()
             p.add_run("Telefone: ").bold = True
-            p.add_run(telefone)
+            p.add_run(registro.telefone)
             
-        if contato_nome:
+        if registro.contato_nome:
             p = doc.add_paragraph()
             p.add_run("Contato: ").bold = True
-            p.add_run(contato_nome)
+            p.add_run(registro.contato_nome)
         
-        if contato_telefone1:
+        if registro.contato_telefone1:
             p = doc.add_paragraph()
             p.add_run("Telefone Contato: ").bold = True
-            p.add_run(contato_telefone1)
+            p.add_run(registro.contato_telefone1)
             
-        if contato_telefone2:
+        if registro.contato_telefone2:
             p = doc.add_paragraph()
             p.add_run("Telefone Contato Alternativo: ").bold = True
-            p.add_run(contato_telefone2)
+            p.add_run(registro.contato_telefone2)
             
         # Campos adicionais
         p = doc.add_paragraph()
         p.add_run("Urgência: ").bold = True
-        p.add_run(urgencia)
+        p.add_run(registro.urgencia)
         
         p = doc.add_paragraph()
         p.add_run("Tipo de OS: ").bold = True
-        p.add_run(tipo)
+        p.add_run(registro.tipo)
         
         p = doc.add_paragraph()
         p.add_run("Data: ").bold = True
-        p.add_run(data)
+        p.add_run(registro.data)
         
-        if necessita_viagem:
+        if registro.necessita_viagem:
             p = doc.add_paragraph()
             p.add_run("Necessita Viagem: ").bold = True
-            p.add_run(necessita_viagem)
+            p.add_run(registro.necessita_viagem)
             
-        if tipo_hospedagem:
+        if registro.tipo_hospedagem:
             p = doc.add_paragraph()
             p.add_run("Tipo de Hospedagem: ").bold = True
-            p.add_run(tipo_hospedagem)
+            p.add_run(registro.tipo_hospedagem)
             
-        if prazo_entrega:
+        if registro.prazo_entrega:
             p = doc.add_paragraph()
             p.add_run("Prazo de Entrega: ").bold = True
-            p.add_run(prazo_entrega)
+            p.add_run(registro.prazo_entrega)
         
         # Descrição do problema
         doc.add_heading("Descrição do Problema", 1)
-        doc.add_paragraph(descricao)
+        doc.add_paragraph(registro.descricao)
         
         # Descrição do serviço a ser executado
-        if descricao_servico:
+        if registro.descricao_servico:
             doc.add_heading("Descrição do Serviço", 1)
-            doc.add_paragraph(descricao_servico)
+            doc.add_paragraph(registro.descricao_servico)
         
-        # Obter o caminho da pasta específica para esta OS
-        pasta_os = self.get_pasta_os_cliente(numero, cliente)
-        
-        # Garantir que a pasta existe
-        if not os.path.exists(pasta_os):
-            os.makedirs(pasta_os)
-            
-        # Salvar documento Word na nova estrutura
-        arquivo_word = os.path.join(pasta_os, f"{numero}.docx")
-        doc.save(arquivo_word)
-        
-        print(f"Arquivo Word salvo em: {arquivo_word}")
-        
-        # Manter o salvamento original para compatibilidade
-        pasta_status = {"ABERTA": "Pendentes", "FECHADA": "Concluidas"}.get(status, "Pendentes")
-        pasta_compat = os.path.join("OSs", pasta_status, numero)
-        if not os.path.exists(pasta_compat):
-            os.makedirs(pasta_compat)
-            
-        arquivo_word_compat = os.path.join(pasta_compat, f"{numero}.docx")
-        doc.save(arquivo_word_compat)
+        return doc
     
     def criar_nova_os(self):
         # Criar nova janela
@@ -1183,6 +1333,40 @@ class MoracaOS:
         urgencia_combo.grid(row=current_row, column=1, sticky=W, padx=10, pady=5)
         current_row += 1
         
+        # Autocompletar (ver autocompletar.py); escolher um cliente já atendido
+        # preenche local, endereço e contatos com os da OS mais recente dele
+        campos_contato = {
+            "local": local_entry,
+            "endereco": endereco_entry,
+            "cidade": cidade_entry,
+            "telefone": telefone_entry,
+            "cep": cep_entry,
+            "contato_nome": contato_nome_entry,
+            "contato_telefone1": contato_telefone1_entry,
+            "contato_telefone2": contato_telefone2_entry,
+        }
+        preenchidos = {}  # Campo -> valor colocado pelo último cliente escolhido
+        
+        def preencher_cliente(nome):
+            contato = self.repo.obter_contato_cliente(nome)
+            if contato is None:
+                return
+            for coluna in COLUNAS_CONTATO:
+                entry = campos_contato[coluna]
+                atual = entry.get()
+                # Não apagar o que o usuário digitou (só campos vazios ou preenchidos aqui)
+                if atual.strip() and atual != preenchidos.get(coluna):
+                    continue
+                entry.delete(0, END)
+                entry.insert(0, contato[coluna] or "")
+                preenchidos[coluna] = entry.get()
+        
+        obter_indice = lambda: self.indice_autocompletar
+        CampoAutocompletar(cliente_entry, "cliente", obter_indice, ao_escolher=preencher_cliente)
+        CampoAutocompletar(maquina_entry, "maquina", obter_indice)
+        CampoAutocompletar(local_entry, "local", obter_indice)
+        CampoAutocompletar(cidade_entry, "cidade", obter_indice)
+        
         # Botões
         button_frame = ttk.Frame(form_frame)
         button_frame.grid(row=current_row, column=0, columnspan=2, pady=20)
@@ -1202,111 +1386,113 @@ class MoracaOS:
                 mostrar_mensagem(nova_janela, "Erro", "Descrição do problema é obrigatória!", "erro")
                 return
             
-            # Gerar número da OS
-            ano = datetime.now().strftime("%y")
-            conn = sqlite3.connect('moraca.db')
-            c = conn.cursor()
-            c.execute("SELECT COUNT(*) FROM os")
-            count = c.fetchone()[0]
-            numero = f"OS{ano}{str(count + 1).zfill(3)}"
-            
-            # Preparar dados
-            cliente = cliente_entry.get()
-            maquina = maquina_entry.get()
-            descricao = descricao_text.get("1.0", END)
-            urgencia = urgencia_var.get()
-            tipo = tipo_var.get()
-            data = data_var.get()
-            status = "ABERTA"  # Status padrão é ABERTA
-            
-            # Novos campos
-            patrimonio = patrimonio_entry.get()
-            numero_serie = numero_serie_entry.get()
-            local = local_entry.get()
-            endereco = endereco_entry.get()
-            cidade = cidade_entry.get()  # Obter o valor do campo cidade
-            telefone = telefone_entry.get()
-            cep = cep_entry.get()
-            contato_nome = contato_nome_entry.get()
-            contato_telefone1 = contato_telefone1_entry.get()
-            contato_telefone2 = contato_telefone2_entry.get()
-            descricao_servico = descricao_servico_text.get("1.0", END)
-            
-            # Campos adicionais
-            necessita_viagem = viagem_var.get()
-            tipo_hospedagem = hospedagem_var.get()
-            prazo_entrega = prazo_var.get()
-            empresa = empresa_var.get()
-            
-            # Inserir no banco
-            c.execute('''INSERT INTO os (numero, cliente, maquina, descricao, urgencia, 
-                data, status, tipo, patrimonio, numero_serie, local, endereco, cidade, 
-                telefone, cep, contato_nome, contato_telefone1, contato_telefone2, 
-                descricao_servico, necessita_viagem, tipo_hospedagem, prazo_entrega, empresa) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                     (numero, cliente, maquina, descricao, urgencia, data, status, tipo,
-                      patrimonio, numero_serie, local, endereco, cidade, telefone, cep,
-                      contato_nome, contato_telefone1, contato_telefone2, descricao_servico,
-                      necessita_viagem, tipo_hospedagem, prazo_entrega, empresa))
-            conn.commit()
-            conn.close()
-            
-            # Criar dicionário com os dados do cliente para o modelo Ziehm
-            dados_cliente = {
-                'cliente': cliente,
-                'equipamento': maquina,
-                'modelo': maquina,
-                'numero_serie': numero_serie,
-                'patrimonio': patrimonio,
-                'endereco': endereco,
-                'contato': contato_nome,
-                'telefone': telefone,
-                'telefone1': contato_telefone1,
-                'telefone2': contato_telefone2,
-                'local': local,
-                'cep': cep,
-                'descricao': descricao,
-                'descricao_servico': descricao_servico,
-                'urgencia': urgencia,
-                'tipo': tipo,
-                'data': data,
-                'prazo_entrega': prazo_entrega,
-                'necessita_viagem': necessita_viagem,
-                'tipo_hospedagem': tipo_hospedagem,
-                'status': status
-            }
-            
-            # Gerar arquivos Excel - Verificar qual modelo usar
-            if empresa == "ZIEHM":
-                # Usar o modelo da Ziehm
-                criar_os_ziehm(numero, dados_cliente)
-            else:
-                # Usar o modelo padrão da Moraca
-                self.gerar_arquivo_excel_os(numero, cliente, maquina, descricao, urgencia, data, status, tipo,
-                                    patrimonio, numero_serie, local, endereco, cidade, telefone, cep,
-                                    contato_nome, contato_telefone1, contato_telefone2, descricao_servico,
-                                    necessita_viagem, tipo_hospedagem, prazo_entrega, empresa)
-
-            # Gerar arquivos Word (sempre usa o mesmo modelo)
-            self.gerar_arquivo_os(numero, cliente, maquina, descricao, urgencia, data, status, tipo,
-                                patrimonio, numero_serie, local, endereco, cidade, telefone, cep,
-                                contato_nome, contato_telefone1, contato_telefone2, descricao_servico,
-                                necessita_viagem, tipo_hospedagem, prazo_entrega, empresa)
+            # Um único registro com os dados do formulário, usado no banco e em todos os documentos
+            registro = RegistroOS(
+                cliente=cliente_entry.get(),
+                maquina=maquina_entry.get(),
+                descricao=descricao_text.get("1.0", END),
+                urgencia=urgencia_var.get(),
+                data=data_var.get(),
+                status="ABERTA",  # Status padrão é ABERTA
+                tipo=tipo_var.get(),
+                patrimonio=patrimonio_entry.get(),
+                numero_serie=numero_serie_entry.get(),
+                local=local_entry.get(),
+                endereco=endereco_entry.get(),
+                cidade=cidade_entry.get(),
+                telefone=telefone_entry.get(),
+                cep=cep_entry.get(),
+                contato_nome=contato_nome_entry.get(),
+                contato_telefone1=contato_telefone1_entry.get(),
+                contato_telefone2=contato_telefone2_entry.get(),
+                descricao_servico=descricao_servico_text.get("1.0", END),
+                necessita_viagem=viagem_var.get(),
+                tipo_hospedagem=hospedagem_var.get(),
+                prazo_entrega=prazo_var.get(),
+                empresa=empresa_var.get()
+            )
+            
+            def criar_em_segundo_plano(tarefa):
+                # Roda no executor: não acessar widgets aqui
+                tarefa.informar_progresso(0.05, "Gravando OS no banco...")
+                
+                # Gerar o número e inserir no banco na mesma transação
+                numero = self.repo.criar_os(registro)
+                registro.numero = numero
+            
+                # Cada documento é montado e serializado uma vez e gravado em
+                # todos os destinos (ver pacote_documentos.py)
+                tarefa.informar_progresso(0.2, f"OS {numero}: gerando documentos...")
+                pacote = PacoteDocumentos()
+                
+                # Gerar arquivos Excel - Verificar qual modelo usar
+                if registro.empresa == "ZIEHM":
+                    # Usar o modelo da Ziehm
+                    pacote.adicionar(
+                        "planilha Ziehm",
+                        lambda: renderizar_xlsx(montar_os_ziehm(numero, dados_cliente_ziehm(registro))),
+                        [caminho_os_ziehm(numero)],
+                        (numero, "ziehm")
+                    )
+                else:
+                    # Usar o modelo padrão da Moraca
+                    pacote.adicionar(
+                        "planilha",
+                        lambda: renderizar_xlsx(self.montar_planilha_os(registro)),
+                        self.destinos_arquivo_os(numero, registro.cliente, registro.status, "xlsx"),
+                        (numero, "planilha")
+                    )
+                
+                # Gerar arquivos Word (sempre usa o mesmo modelo)
+                pacote.adicionar(
+                    "documento Word",
+                    lambda: renderizar_docx(self.montar_documento_os(registro)),
+                    self.destinos_arquivo_os(numero, registro.cliente, registro.status, "docx"),
+                    (numero, "word")
+                )
+                
+                pacote.gravar()
+                
+                tarefa.informar_progresso(1.0, f"OS {numero} criada")
+                return numero
             
-            # Mostrar mensagem de sucesso
-            mostrar_mensagem(nova_janela, "Sucesso", f"OS {numero} criada com sucesso!", "sucesso")
+            def concluido(numero):
+                # Os valores da OS passam a ser sugeridos nas próximas
+                if self.indice_autocompletar is not None:
+                    self.indice_autocompletar.adicionar(registro)
+                # Mostrar mensagem de sucesso
+                if nova_janela.winfo_exists():
+                    mostrar_mensagem(nova_janela, "Sucesso", f"OS {numero} criada com sucesso!", "sucesso")
+                    nova_janela.destroy()
+                self.atualizar_lista()
             
-            self.atualizar_lista()
-            nova_janela.destroy()
+            def falhou(erro):
+                self.atualizar_lista()
+                if nova_janela.winfo_exists():
+                    botao_criar.config(state=NORMAL)
+                    mostrar_mensagem(nova_janela, "Erro", f"Erro ao criar OS: {str(erro)}", "erro")
+                else:
+                    mostrar_mensagem(self.root, "Erro", f"Erro ao criar OS: {str(erro)}", "erro")
+            
+            # Evitar criar a mesma OS duas vezes enquanto os documentos são gerados
+            botao_criar.config(state=DISABLED)
+            self.executor.submeter(
+                criar_em_segundo_plano,
+                descricao="Criando OS...",
+                cancelavel=False,
+                ao_concluir=concluido,
+                ao_falhar=falhou
+            )
         
         # Botões
-        ttk.Button(
+        botao_criar = ttk.Button(
             button_frame,
             text="Criar OS",
             command=salvar_os,
             style="primary.TButton",
             width=15
-        ).pack(side=LEFT, padx=5)
+        )
+        botao_criar.pack(side=LEFT, padx=5)
     
         ttk.Button(
             button_frame,
@@ -1324,120 +1510,247 @@ class MoracaOS:
         canvas.bind_all("<MouseWheel>", lambda event: canvas.yview_scroll(int(-1*(event.delta/120)), "units"))
     
     def buscar_os(self):
-        termo = self.search_entry.get().strip()
-        # Limpar tabela
-        for item in self.tabela.get_children():
-            self.tabela.delete(item)
+        """Pesquisa o texto digitado sem esperar (botão Buscar / Enter)"""
+        self.busca.buscar_agora(self.search_entry.get())
+    
+    def exibir_resultado_busca(self, termo, registros):
+        """
+        Mostra o resultado da pesquisa, destacado, no lugar da lista.
         
-        # Se o termo estiver vazio, mostrar as últimas OS
-        if not termo:
-            self.atualizar_lista()
-            return
+        Args:
+            termo (str): Texto pesquisado
+            registros (list): OS encontradas, por relevância
+        """
+        self.lista_paginada.desativar()
+        self.exibindo_busca = True
+        # Só as linhas diferentes das atuais são alteradas
+        self.exibir_registros_os(registros, tags=("encontrado",))
+        
+        if registros:
+            self.resultado_busca.config(text=f"{len(registros)} OS encontrada(s)")
+            self.limpar_sugestao()
+        else:
+            self.resultado_busca.config(text=f"Nenhuma OS encontrada para '{termo}'")
+            # Cliente, máquina ou local parecidos (ver os_trigramas.py)
+            self.executor.submeter(
+                lambda tarefa: self.repo.sugerir_termos(termo, limite=1),
+                descricao=f"Procurando sugestões para '{termo}'...",
+                ao_concluir=lambda sugestoes: self.exibir_sugestao(termo, sugestoes),
+                ao_falhar=lambda erro: print(f"Erro ao procurar sugestões para '{termo}': {erro}")
+            )
+    
+    def exibir_sugestao(self, termo, sugestoes):
+        """
+        Mostra "Você quis dizer" com a sugestão mais parecida.
         
-        # Buscar no banco com limite maior
-        conn = sqlite3.connect('moraca.db')
-        c = conn.cursor()
-        c.execute('''SELECT numero, cliente, data, status FROM os
-                    WHERE numero LIKE ? OR cliente LIKE ?
-                    ORDER BY data DESC LIMIT 30''', (f"%{termo}%", f"%{termo}%"))
-        
-        registros = c.fetchall()
-        conn.close()
-        
-        # Verificar se encontrou resultados
-        if not registros:
-            # Não há resultados, mostrar mensagem
-            mostrar_mensagem(self.root, "Busca", f"Nenhuma OS encontrada para '{termo}'", "aviso")
-            # Recarregar a lista original
-            self.atualizar_lista()
+        Args:
+            termo (str): Texto pesquisado
+            sugestoes (list): Resultado de repo.sugerir_termos
+        """
+        # O usuário já digitou outra coisa: a sugestão não vale mais
+        if self.termo_busca.get().strip() != termo or not sugestoes:
+            self.limpar_sugestao()
             return
+        self.sugestao = sugestoes[0]["valor"]
+        self.sugestao_busca.config(text=f"Você quis dizer: {self.sugestao}?")
+    
+    def usar_sugestao(self):
+        """Pesquisa a sugestão clicada"""
+        if self.sugestao:
+            # A alteração do campo dispara a pesquisa
+            self.termo_busca.set(self.sugestao)
+            self.search_entry.icursor(END)
+    
+    def limpar_sugestao(self):
+        self.sugestao = None
+        self.sugestao_busca.config(text="")
+    
+    def limpar_busca(self):
+        """Campo de pesquisa vazio: volta a mostrar as últimas OS"""
+        self.resultado_busca.config(text="")
+        self.limpar_sugestao()
+        self.atualizar_lista()
+    
+    def _linha_os(self, numero, cliente, data, status):
+        """Valores e tags de uma linha da tabela (cor conforme o status)"""
+        # Verificar se o status está no formato antigo e converter
+        if status in self.mapeamento_status:
+            status = self.mapeamento_status[status]
+        
+        # Adicionar tags baseadas no status para colorir as linhas
+        if status == "ABERTA":
+            tags = ("aberta",)
+        elif status == "FECHADA":
+            tags = ("fechada",)
+        else:
+            # Se por algum motivo o status não estiver nos formatos esperados
+            tags = ()
+        return (numero, cliente, data, status), tags
+    
+    def exibir_registros_os(self, registros, substituir=True, tags=None):
+        """
+        Mostra OS na tabela pela VisaoTabela (id do item = número da OS).
         
-        # Inserir os resultados na tabela
+        Args:
+            registros (list): Linhas com numero, cliente, data e status
+            substituir (bool): Se True, a tabela passa a ter só estas OS
+                (aplicando só as diferenças); se False, são acrescentadas no fim
+            tags (tuple, optional): Tags de todas as linhas; se None, a cor
+                vem do status
+        """
+        linhas = []
         for row in registros:
-            self.tabela.insert("", END, values=row, tags=("encontrado",))
+            valores, tags_status = self._linha_os(row["numero"], row["cliente"], row["data"], row["status"])
+            linhas.append((row["numero"], valores, tags if tags is not None else tags_status))
+        if substituir:
+            self.visao_tabela.sincronizar(linhas)
+        else:
+            self.visao_tabela.anexar(linhas)
+    
+    def aplicar_alteracoes(self, alteracoes):
+        """
+        Corrige a tabela com as OS gravadas por qualquer estação (ver monitor_alteracoes.py).
         
-        # Estilizar os resultados encontrados
-        self.tabela.tag_configure("encontrado", background=self.cores["encontrado"])
+        Só os itens das OS alteradas são tocados. OS novas entram no topo da
+        lista, exceto quando a tabela mostra o resultado de uma busca. Na
+        lista filtrada, as OS alteradas são conferidas com o filtro (ver
+        _aplicar_alteracoes_filtro).
         
-        # Mostrar mensagem com o número de resultados
-        mostrar_mensagem(self.root, "Busca", f"Foram encontradas {len(registros)} OS para '{termo}'", "sucesso")
+        Args:
+            alteracoes (list): Linhas de RepositorioOS.listar_alteracoes
+        """
+        # O resultado guardado para refinar a pesquisa pode ter ficado desatualizado
+        self.busca.invalidar()
+        if self.indice_lista is not None:
+            self.indice_lista.aplicar(alteracoes)
+        if self._alteracoes_indice is not None:
+            self._alteracoes_indice.extend(alteracoes)
+        
+        filtrada = bool(self.filtros) and self.exibindo_busca and self.lista_paginada.ativa
+        conferir = []
+        for alteracao in alteracoes:
+            numero = alteracao["numero"]
+            # Fechada em outra estação, a OS tem a pasta movida para "OS-fechada"
+            self.pastas.invalidar(numero)
+            if alteracao["removida"]:
+                self.visao_tabela.remover(numero)
+                continue
+            if filtrada:
+                conferir.append(alteracao)
+                continue
+            
+            valores, tags = self._linha_os(numero, alteracao["cliente"], alteracao["data"], alteracao["status"])
+            if numero in self.visao_tabela:
+                if "encontrado" in self.visao_tabela.tags(numero):
+                    tags = ("encontrado",)
+                self.visao_tabela.definir(numero, valores, tags)
+            elif not self.exibindo_busca:
+                self.visao_tabela.definir(numero, valores, tags, indice=0)
+        
+        if conferir:
+            self._aplicar_alteracoes_filtro(conferir)
     
-    def atualizar_lista(self):
-        # Limpar tabela
-        for item in self.tabela.get_children():
-            self.tabela.delete(item)
-        
-        # Buscar últimas OS (aumentando o limite para mostrar mais)
-        conn = sqlite3.connect('moraca.db')
-        c = conn.cursor()
-        c.execute('''SELECT numero, cliente, data, status FROM os
-                    ORDER BY data DESC LIMIT 20''')
-        
-        for row in c.fetchall():
-            # Converter status antigos para os novos formatos se necessário
-            numero, cliente, data, status = row
-            # Verificar se o status está no formato antigo e converter
-            if status in self.mapeamento_status:
-                status = self.mapeamento_status[status]
-            
-            # Adicionar tags baseadas no status para colorir as linhas
-            if status == "ABERTA":
-                self.tabela.insert("", END, values=(numero, cliente, data, status), tags=("aberta",))
-            elif status == "FECHADA":
-                self.tabela.insert("", END, values=(numero, cliente, data, status), tags=("fechada",))
+    def _aplicar_alteracoes_filtro(self, alteracoes):
+        """
+        Confere em segundo plano se as OS alteradas ainda atendem ao filtro.
+        
+        As que deixaram de atender saem da lista e as exibidas são
+        atualizadas no lugar. Se alguma OS que passou a atender cai nas
+        páginas já carregadas mas não está na lista, a lista filtrada é
+        recarregada (uma vez para várias alterações seguidas), para que ela
+        entre na posição certa; as das páginas seguintes aparecem ao rolar.
+        """
+        filtros = self.filtros
+        numeros = [alteracao["numero"] for alteracao in alteracoes]
+        
+        def aplicar(atendem):
+            # Outro filtro (ou outra lista) pode ter sido aberto enquanto a consulta rodava
+            if self.filtros is not filtros or not self.lista_paginada.ativa:
+                return
+            recarregar = False
+            for alteracao in alteracoes:
+                numero = alteracao["numero"]
+                if numero not in atendem:
+                    self.visao_tabela.remover(numero)
+                elif numero in self.visao_tabela:
+                    valores, tags = self._linha_os(numero, alteracao["cliente"], alteracao["data"], alteracao["status"])
+                    self.visao_tabela.definir(numero, valores, tags)
+                elif self.lista_paginada.carregada(alteracao["data_iso"], numero):
+                    recarregar = True
+            if recarregar:
+                if self._recarga_filtro is None:
+                    self._recarga_filtro = self.root.after(500, self._recarregar_filtro)
             else:
-                # Se por algum motivo o status não estiver nos formatos esperados
-                self.tabela.insert("", END, values=(numero, cliente, data, status))
+                self.contar_filtro()
         
-        conn.close()
+        self.executor.submeter(
+            lambda tarefa: self.repo.numeros_no_filtro(numeros, filtros),
+            descricao="Atualizando a lista filtrada...",
+            ao_concluir=aplicar,
+            ao_falhar=lambda erro: print(f"Erro ao conferir as OS alteradas com o filtro: {erro}")
+        )
+    
+    def _recarregar_filtro(self):
+        self._recarga_filtro = None
+        if self.filtros and self.exibindo_busca and self.lista_paginada.ativa:
+            self.contar_filtro()
+            self.lista_paginada.ativar()
+    
+    def recarregar_lista(self):
+        """Recarrega a lista exibida (usado quando chegam alterações demais de uma vez)"""
+        self.pastas.invalidar()
+        if self.indice_lista is not None:
+            self.carregar_indice_lista()
+        if self.exibindo_busca:
+            # Lista filtrada: as linhas alteradas e o total também são recarregados
+            # (o resultado de uma pesquisa de texto fica como está)
+            if self.filtros and self.lista_paginada.ativa:
+                self.contar_filtro()
+                self.lista_paginada.ativar()
+            return
+        if self.lista_paginada.ativa:
+            self.lista_paginada.ativar()
+        else:
+            self.atualizar_lista()
+    
+    def atualizar_lista(self):
+        self.lista_paginada.desativar()
+        self.exibindo_busca = False
         
-        # Configurar cores para os diferentes status
-        self.tabela.tag_configure("aberta", background=self.cores["aberta"])
-        self.tabela.tag_configure("fechada", background=self.cores["fechada"])
+        # Últimas OS; só as linhas que mudaram desde a última atualização são alteradas
+        self.exibir_registros_os(self.repo.listar_ultimas(limite=20))
     
     def mostrar_todas_os(self):
-        """Exibe todas as OS no sistema."""
-        # Limpar tabela
-        for item in self.tabela.get_children():
-            self.tabela.delete(item)
-        
-        # Buscar todas as OS
-        conn = sqlite3.connect('moraca.db')
-        c = conn.cursor()
-        c.execute('''SELECT numero, cliente, data, status FROM os
-                    ORDER BY data DESC''')
-        
-        registros = c.fetchall()
-        conn.close()
-        
-        # Verificar se existem OS
-        if not registros:
+        """
+        Exibe todas as OS no sistema.
+        
+        Só a primeira página é inserida na tabela; as seguintes são buscadas
+        no banco conforme o usuário rola a lista (ver lista_paginada.py); o
+        total é contado em segundo plano.
+        """
+        # Uma pesquisa ainda em andamento não deve substituir a lista
+        self.busca.cancelar()
+        self.resultado_busca.config(text="")
+        self.limpar_sugestao()
+        self._desmarcar_filtros()
+        self.exibindo_busca = False
+        
+        # Verificar se existem OS (pela primeira página, sem contar a tabela)
+        if not self.lista_paginada.ativar():
             mostrar_mensagem(self.root, "Informação", "Não existem OS cadastradas no sistema.", "info")
             return
         
-        # Inserir todas as OS na tabela
-        for row in registros:
-            # Converter status antigos para os novos formatos se necessário
-            numero, cliente, data, status = row
-            # Verificar se o status está no formato antigo e converter
-            if status in self.mapeamento_status:
-                status = self.mapeamento_status[status]
-            
-            # Adicionar tags baseadas no status para colorir as linhas
-            if status == "ABERTA":
-                self.tabela.insert("", END, values=(numero, cliente, data, status), tags=("aberta",))
-            elif status == "FECHADA":
-                self.tabela.insert("", END, values=(numero, cliente, data, status), tags=("fechada",))
-            else:
-                # Se por algum motivo o status não estiver nos formatos esperados
-                self.tabela.insert("", END, values=(numero, cliente, data, status))
-        
-        # Configurar cores para os diferentes status
-        self.tabela.tag_configure("aberta", background=self.cores["aberta"])
-        self.tabela.tag_configure("fechada", background=self.cores["fechada"])
+        def exibir_total(total):
+            # A lista pode ter sido trocada (pesquisa, filtro) enquanto a contagem rodava
+            if self.lista_paginada.ativa and self.filtros is None and not self.exibindo_busca:
+                self.resultado_busca.config(text=f"Exibindo todas as {total} OS do sistema")
         
-        # Mostrar mensagem com o número total de OS
-        mostrar_mensagem(self.root, "Lista Completa", f"Exibindo todas as {len(registros)} OS do sistema.", "info")
+        self.executor.submeter(
+            lambda tarefa: self.repo.contar_os(),
+            descricao="Contando OS...",
+            ao_concluir=exibir_total,
+            ao_falhar=lambda erro: print(f"Erro ao contar as OS: {erro}")
+        )
     
     def adicionar_cabecalho(self, doc, numero_os):
         """Adiciona o cabeçalho com o timbre da empresa no documento"""
@@ -1550,6 +1863,92 @@ class MoracaOS:
             width=15
         ).pack(side=LEFT, padx=5)
 
+    def abrir_historico_equipamento(self, equipamento_id, janela_pai):
+        """
+        Mostra a linha do tempo e o resumo dos atendimentos de um equipamento.
+        
+        Args:
+            equipamento_id (int): Id do cadastro do equipamento
+            janela_pai: Janela de onde o histórico foi aberto
+        """
+        equipamento = self.repo.obter_equipamento(equipamento_id)
+        if equipamento is None:
+            mostrar_mensagem(janela_pai, "Erro", "Equipamento não encontrado no cadastro.", "erro")
+            return
+        # Resumo (uma consulta de agregação) e linha do tempo, só pelo índice
+        resumo, linhas = self.repo.historico_equipamento(equipamento_id)
+        
+        janela = ttk.Toplevel(janela_pai)
+        janela.title(f"Histórico do Equipamento - {equipamento['maquina'] or ''}")
+        janela.geometry("700x550")
+        
+        frame_principal = ttk.Frame(janela, padding=20)
+        frame_principal.pack(fill=BOTH, expand=YES)
+        
+        ttk.Label(
+            frame_principal,
+            text=equipamento["maquina"] or "Equipamento",
+            font=("Helvetica", 14, "bold")
+        ).pack(anchor="w")
+        identificacao = []
+        if equipamento["numero_serie"]:
+            identificacao.append(f"Nº de Série: {equipamento['numero_serie']}")
+        if equipamento["patrimonio"]:
+            identificacao.append(f"Patrimônio: {equipamento['patrimonio']}")
+        if equipamento["cliente"]:
+            identificacao.append(f"Cliente: {equipamento['cliente']}")
+        ttk.Label(frame_principal, text="   ".join(identificacao), font=("Helvetica", 11)).pack(anchor="w", pady=(0, 10))
+        
+        # Resumo
+        resumo_frame = ttk.LabelFrame(frame_principal, text="Resumo", padding=10)
+        resumo_frame.pack(fill=X, pady=(0, 10))
+        if resumo["mtbf_dias"] is not None:
+            mtbf = f"{resumo['mtbf_dias']:.0f} dias"
+        else:
+            mtbf = "— (menos de duas corretivas)"
+        ultimo = f"{formatar_data(resumo['ultima'])} ({linhas[0]['numero']})" if linhas and resumo["ultima"] else "—"
+        for texto in (
+            f"Total de OS: {resumo['total']}   Corretivas: {resumo['corretivas']}   "
+            f"Preventivas: {resumo['preventivas']}   Em aberto: {resumo['abertas']}",
+            f"Primeiro atendimento: {formatar_data(resumo['primeira']) or '—'}   Último atendimento: {ultimo}",
+            f"Tempo médio entre falhas (MTBF): {mtbf}",
+        ):
+            ttk.Label(resumo_frame, text=texto, font=("Helvetica", 10)).pack(anchor="w")
+        
+        # Linha do tempo, da OS mais recente para a mais antiga
+        tabela_frame = ttk.Frame(frame_principal)
+        tabela_frame.pack(fill=BOTH, expand=YES)
+        scrollbar = ttk.Scrollbar(tabela_frame, orient=VERTICAL)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        tabela = ttk.Treeview(
+            tabela_frame,
+            columns=("data", "numero", "tipo", "status", "intervalo"),
+            show="headings",
+            yscrollcommand=scrollbar.set,
+            height=12
+        )
+        scrollbar.config(command=tabela.yview)
+        for coluna, titulo, largura in (("data", "Data", 90), ("numero", "Número", 90), ("tipo", "Tipo", 200),
+                                        ("status", "Status", 90), ("intervalo", "Dias desde a anterior", 140)):
+            tabela.heading(coluna, text=titulo)
+            tabela.column(coluna, width=largura, minwidth=60)
+        tabela.pack(fill=BOTH, expand=YES)
+        
+        for linha, dias in zip(linhas, intervalos(linhas)):
+            status = self.mapeamento_status.get(linha["status"], linha["status"])
+            tabela.insert("", END, values=(
+                formatar_data(linha["data_iso"]), linha["numero"], linha["tipo"] or "", status,
+                "" if dias is None else dias
+            ))
+        
+        ttk.Button(
+            frame_principal,
+            text="Fechar",
+            command=janela.destroy,
+            style="secondary.TButton",
+            width=15
+        ).pack(pady=(10, 0))
+    
     def abrir_aba_impressao(self, event):
         """Abre uma nova aba com opções de impressão para a OS selecionada"""
         # Obter o item selecionado
@@ -1569,14 +1968,9 @@ class MoracaOS:
         if status_atual in self.mapeamento_status:
             status_atual = self.mapeamento_status[status_atual]
         
-        # Buscar dados completos do banco
-        conn = sqlite3.connect('moraca.db')
-        c = conn.cursor()
-        c.execute("SELECT * FROM os WHERE numero = ?", (numero_os,))
-        os_completa = c.fetchone()
-        conn.close()
-        
-        if not os_completa:
+        # Só confirma que a OS existe (e qual o equipamento); cada documento busca as colunas que usa
+        registro = self.repo.obter_os(numero_os, ("numero", "equipamento_id"))
+        if not registro:
             mostrar_mensagem(self.root, "Erro", f"Não foi possível encontrar os dados da OS {numero_os}", "erro")
             return
         
@@ -1612,6 +2006,15 @@ class MoracaOS:
             font=("Helvetica", 12)
         ).pack(anchor="w")
         
+        # Todas as OS do mesmo equipamento (nº de série ou patrimônio)
+        ttk.Button(
+            info_frame,
+            text="Histórico do Equipamento",
+            command=lambda: self.abrir_historico_equipamento(registro.equipamento_id, janela_impressao),
+            style="secondary.Outline.TButton",
+            state=NORMAL if registro.equipamento_id else DISABLED
+        ).pack(anchor="w", pady=(5, 0))
+        
         # Frame para gestão de status
         status_frame = ttk.LabelFrame(frame_principal, text="Status da OS", padding=10)
         status_frame.pack(fill=X, pady=10)
@@ -1664,103 +2067,70 @@ class MoracaOS:
             if not confirmar:
                 return
             
-            try:
-                # Atualizar o banco de dados
-                conn = sqlite3.connect('moraca.db')
-                c = conn.cursor()
-                c.execute("UPDATE os SET status = ? WHERE numero = ?", (novo_status, numero_os))
-                conn.commit()
+            def alterar_em_segundo_plano(tarefa):
+                # Roda no executor: não acessar widgets aqui
+                tarefa.informar_progresso(0.1, f"OS {numero_os}: alterando status...")
                 
-                # Obter o cliente para localizarmos a pasta da OS
-                c.execute("SELECT cliente FROM os WHERE numero = ?", (numero_os,))
-                resultado = c.fetchone()
-                conn.close()
+                # Mensagens exibidas pela thread principal ao final
+                mensagens = []
                 
-                if resultado and resultado[0]:
-                    cliente = resultado[0]
-                    
-                    # Mover a pasta da OS para "OS fechada" quando o status for FECHADA
-                    if novo_status == "FECHADA":
-                        # Obter o caminho atual da pasta da OS
-                        pasta_origem = self.get_pasta_os_cliente(numero_os, cliente)
-                        
-                        # Criar caminho para a pasta "OS fechada" mantendo a mesma estrutura
-                        base_path = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "os")
-                        
-                        # Extrair ano da OS
-                        match = re.search(r'OS(\d{2})(\d+)', numero_os)
-                        if match:
-                            ano = match.group(1)
-                            ano_completo = f"20{ano}"
-                        else:
-                            ano_completo = datetime.now().strftime("%Y")
-                            
-                        # Criar estrutura na pasta "OS fechada"
-                        pasta_os_fechada = os.path.join(base_path, "OS-fechada", f"OS-{ano_completo}")
-                        
-                        # Garantir que o diretório de destino exista
-                        if not os.path.exists(pasta_os_fechada):
-                            os.makedirs(pasta_os_fechada)
-                            
-                        # Extrair o nome da pasta da OS do caminho origem
-                        nome_pasta_os = os.path.basename(pasta_origem)
-                        
-                        # Caminho de destino completo
-                        pasta_destino = os.path.join(pasta_os_fechada, nome_pasta_os)
-                        
-                        # Verificar se a pasta origem existe
-                        if os.path.exists(pasta_origem):
-                            # Se o destino já existir, precisamos lidar com isso
-                            if os.path.exists(pasta_destino):
-                                # Adicionar timestamp para evitar duplicidade
-                                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                                pasta_destino = os.path.join(pasta_os_fechada, f"{nome_pasta_os}_{timestamp}")
-                            
-                            try:
-                                # Copiar a pasta inteira com seu conteúdo
-                                shutil.copytree(pasta_origem, pasta_destino)
-                                
-                                # Remover pasta original após copiar
-                                shutil.rmtree(pasta_origem)
-                                
-                                mostrar_mensagem(
-                                    janela_impressao, 
-                                    "Sucesso", 
-                                    f"Pasta da OS {numero_os} movida para 'OS fechada'.",
-                                    "sucesso"
-                                )
-                            except Exception as e:
-                                mostrar_mensagem(
-                                    janela_impressao, 
-                                    "Aviso", 
-                                    f"Status alterado, mas não foi possível mover a pasta: {str(e)}",
-                                    "aviso"
-                                )
-                        
-                    # Código existente para mover entre pendentes e concluídas, se ainda necessário
-                    # [...]
+                # Atualizar o banco de dados; ao fechar a OS, a pasta vai para
+                # "OS fechada" (movimentação registrada junto com o status)
+                try:
+                    if self.pastas.alterar_status(numero_os, novo_status, tarefa.informar_progresso):
+                        mensagens.append((
+                            "Sucesso", 
+                            f"Pasta da OS {numero_os} movida para 'OS fechada'.",
+                            "sucesso"
+                        ))
+                except OSError as e:
+                    mensagens.append((
+                        "Aviso", 
+                        f"Status alterado, mas não foi possível mover a pasta: {str(e)}\n"
+                        "A movimentação será retomada na próxima abertura do sistema.",
+                        "aviso"
+                    ))
                 
+                tarefa.informar_progresso(1.0, f"Status da OS {numero_os} alterado")
+                return mensagens
+            
+            def concluido(mensagens):
                 # Atualizar a lista na tela principal
                 self.atualizar_lista()
                 
+                # A janela pode ter sido fechada enquanto a tarefa rodava
+                janela = janela_impressao if janela_impressao.winfo_exists() else self.root
+                for titulo, texto, tipo in mensagens:
+                    mostrar_mensagem(janela, titulo, texto, tipo)
+                
                 # Mostrar mensagem de sucesso
                 mostrar_mensagem(
-                    janela_impressao, 
+                    janela, 
                     "Sucesso", 
                     f"Status da OS {numero_os} alterado para '{novo_status}'.",
                     "sucesso"
                 )
                 
                 # Fechar a janela após a alteração
-                janela_impressao.destroy()
-                
-            except Exception as e:
+                if janela_impressao.winfo_exists():
+                    janela_impressao.destroy()
+            
+            def falhou(erro):
+                janela = janela_impressao if janela_impressao.winfo_exists() else self.root
                 mostrar_mensagem(
-                    janela_impressao, 
+                    janela, 
                     "Erro", 
-                    f"Erro ao alterar status: {str(e)}",
+                    f"Erro ao alterar status: {str(erro)}",
                     "erro"
                 )
+            
+            self.executor.submeter(
+                alterar_em_segundo_plano,
+                descricao=f"Alterando status da OS {numero_os}...",
+                cancelavel=False,
+                ao_concluir=concluido,
+                ao_falhar=falhou
+            )
                 
         # Botão para alterar status
         ttk.Button(
@@ -1864,57 +2234,54 @@ class MoracaOS:
     
     def imprimir_os_andamento(self, numero_os):
         """Gera e abre documento de OS de andamento"""
-        try:
-            # Buscar os dados da OS primeiro para ter informações do cliente
-            conn = sqlite3.connect('moraca.db')
-            c = conn.cursor()
-            c.execute("SELECT cliente FROM os WHERE numero = ?", (numero_os,))
-            resultado = c.fetchone()
-            conn.close()
-            
-            if not resultado:
-                mostrar_mensagem(self.root, "Erro", f"Não foi possível encontrar os dados da OS {numero_os}", "erro")
-                return
-                
-            cliente = resultado[0]
-            
-            # Verificar primeiro na nova estrutura de pastas
-            pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
-            arquivo_excel = os.path.join(pasta_os, f"{numero_os}.xlsx")
-            
-            # Verificar se o arquivo existe na nova estrutura
-            if os.path.exists(arquivo_excel):
-                # Se o arquivo já existe, apenas abre sem recriar
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Verificar se o arquivo já existe no caminho antigo
-            caminho_arquivo = self.get_caminho_arquivo('andamento', numero_os)
-            if caminho_arquivo and os.path.exists(caminho_arquivo):
-                # Se o arquivo já existe no local antigo, copiar para a nova estrutura
-                os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
-                shutil.copy2(caminho_arquivo, arquivo_excel)
-                
-                # Abrir o arquivo da nova localização
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente copiado e aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Se não existe, continua com a criação do documento
-            # Gerar o documento usando a função existente
-            caminho_arquivo = criar_os_interna_andamento(numero_os)
+        self._imprimir_em_segundo_plano(
+            self._gerar_os_andamento,
+            numero_os,
+            "Gerando OS de Andamento",
+            "Erro ao gerar OS de Andamento"
+        )
+    
+    def _gerar_os_andamento(self, tarefa, numero_os):
+        """
+        Parte de imprimir_os_andamento executada em segundo plano (não acessa widgets).
+
+        Returns:
+            tuple: (caminho do arquivo, mensagem de sucesso)
+        """
+        # Buscar os dados da OS primeiro para ter informações do cliente
+        cliente = self.repo.obter_cliente(numero_os)
+        
+        if cliente is None:
+            raise ValueError(f"Não foi possível encontrar os dados da OS {numero_os}")
+        
+        # Verificar primeiro na nova estrutura de pastas
+        pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
+        arquivo_excel = os.path.join(pasta_os, f"{numero_os}.xlsx")
+        
+        # Verificar se o arquivo existe na nova estrutura
+        if os.path.exists(arquivo_excel):
+            # Se o arquivo já existe, apenas abre sem recriar
+            return arquivo_excel, f"Documento existente aberto em:\n{arquivo_excel}"
             
-            # Copiar para a nova estrutura
+        # Verificar se o arquivo já existe no caminho antigo
+        caminho_arquivo = self.get_caminho_arquivo('andamento', numero_os)
+        if caminho_arquivo and os.path.exists(caminho_arquivo):
+            # Se o arquivo já existe no local antigo, copiar para a nova estrutura
             os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
             shutil.copy2(caminho_arquivo, arquivo_excel)
             
-            # Abrir o documento com o aplicativo padrão (já da nova localização)
-            self.abrir_arquivo(arquivo_excel)
+            # Devolver o arquivo da nova localização para ser aberto
+            return arquivo_excel, f"Documento existente copiado e aberto em:\n{arquivo_excel}"
             
-            mostrar_mensagem(self.root, "Sucesso", f"OS de Andamento gerada com sucesso em:\n{arquivo_excel}", "sucesso")
-        except Exception as e:
-            mostrar_mensagem(self.root, "Erro", f"Erro ao gerar OS de Andamento: {str(e)}", "erro")
+        # Se não existe, continua com a criação do documento
+        # Gerar o documento usando a função existente
+        caminho_arquivo = criar_os_interna_andamento(numero_os)
+        
+        # Copiar para a nova estrutura
+        os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
+        shutil.copy2(caminho_arquivo, arquivo_excel)
+        
+        return arquivo_excel, f"OS de Andamento gerada com sucesso em:\n{arquivo_excel}"
     
     def imprimir_os_preventiva(self, numero_os):
         """Gera e abre documento de OS preventiva"""
@@ -1935,123 +2302,138 @@ class MoracaOS:
     
     def imprimir_os_interna(self, numero_os):
         """Gera e abre documento de OS interna"""
-        try:
-            # Buscar os dados da OS primeiro para ter informações do cliente
-            conn = sqlite3.connect('moraca.db')
-            c = conn.cursor()
-            c.execute("SELECT cliente FROM os WHERE numero = ?", (numero_os,))
-            resultado = c.fetchone()
-            conn.close()
-            
-            if not resultado:
-                mostrar_mensagem(self.root, "Erro", f"Não foi possível encontrar os dados da OS {numero_os}", "erro")
-                return
-                
-            cliente = resultado[0]
-            
-            # Verificar primeiro na nova estrutura de pastas
-            pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
-            arquivo_excel = os.path.join(pasta_os, f"{numero_os}_interna.xlsx")
-            
-            # Verificar se o arquivo existe na nova estrutura
-            if os.path.exists(arquivo_excel):
-                # Se o arquivo já existe, apenas abre sem recriar
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Verificar se o arquivo já existe no caminho antigo
-            caminho_arquivo = self.get_caminho_arquivo('interna', numero_os)
-            if caminho_arquivo and os.path.exists(caminho_arquivo):
-                # Se o arquivo já existe no local antigo, copiar para a nova estrutura
-                os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
-                shutil.copy2(caminho_arquivo, arquivo_excel)
-                
-                # Abrir o arquivo da nova localização
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente copiado e aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Se não existe, usamos a nova função específica para OS Interna
-            # O import já foi feito no início do arquivo
-            caminho_arquivo = criar_os_interna(numero_os)
-            
-            if not caminho_arquivo:
-                mostrar_mensagem(self.root, "Erro", f"Não foi possível gerar a OS Interna para {numero_os}", "erro")
-                return
+        self._imprimir_em_segundo_plano(
+            self._gerar_os_interna,
+            numero_os,
+            "Gerando OS Interna",
+            "Erro ao gerar OS Interna"
+        )
+    
+    def _gerar_os_interna(self, tarefa, numero_os):
+        """
+        Parte de imprimir_os_interna executada em segundo plano (não acessa widgets).
+
+        Returns:
+            tuple: (caminho do arquivo, mensagem de sucesso)
+        """
+        # Buscar os dados da OS primeiro para ter informações do cliente
+        cliente = self.repo.obter_cliente(numero_os)
+        
+        if cliente is None:
+            raise ValueError(f"Não foi possível encontrar os dados da OS {numero_os}")
+        
+        # Verificar primeiro na nova estrutura de pastas
+        pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
+        arquivo_excel = os.path.join(pasta_os, f"{numero_os}_interna.xlsx")
+        
+        # Verificar se o arquivo existe na nova estrutura
+        if os.path.exists(arquivo_excel):
+            # Se o arquivo já existe, apenas abre sem recriar
+            return arquivo_excel, f"Documento existente aberto em:\n{arquivo_excel}"
             
-            # Copiar para a nova estrutura
+        # Verificar se o arquivo já existe no caminho antigo
+        caminho_arquivo = self.get_caminho_arquivo('interna', numero_os)
+        if caminho_arquivo and os.path.exists(caminho_arquivo):
+            # Se o arquivo já existe no local antigo, copiar para a nova estrutura
             os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
             shutil.copy2(caminho_arquivo, arquivo_excel)
             
-            # Abrir o documento com o aplicativo padrão (já da nova localização)
-            self.abrir_arquivo(arquivo_excel)
+            # Devolver o arquivo da nova localização para ser aberto
+            return arquivo_excel, f"Documento existente copiado e aberto em:\n{arquivo_excel}"
             
-            mostrar_mensagem(self.root, "Sucesso", f"OS Interna gerada com sucesso em:\n{arquivo_excel}", "sucesso")
-        except Exception as e:
-            mostrar_mensagem(self.root, "Erro", f"Erro ao gerar OS Interna: {str(e)}", "erro")
+        # Se não existe, usamos a nova função específica para OS Interna
+        # O import já foi feito no início do arquivo
+        caminho_arquivo = criar_os_interna(numero_os)
+        
+        if not caminho_arquivo:
+            raise ValueError(f"Não foi possível gerar a OS Interna para {numero_os}")
+        
+        # Copiar para a nova estrutura
+        os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
+        shutil.copy2(caminho_arquivo, arquivo_excel)
+        
+        return arquivo_excel, f"OS Interna gerada com sucesso em:\n{arquivo_excel}"
     
     def imprimir_os_ziehm(self, numero_os):
         """Gera e abre documento de OS Ziehm"""
-        try:
-            # Buscar dados do cliente para a OS
-            conn = sqlite3.connect('moraca.db')
-            c = conn.cursor()
-            c.execute("SELECT * FROM os WHERE numero = ?", (numero_os,))
-            os_data = c.fetchone()
-            conn.close()
-            
-            if not os_data:
-                mostrar_mensagem(self.root, "Erro", f"Não foi possível encontrar os dados da OS {numero_os}", "erro")
-                return
-            
-            # Converter dados do BD para dicionário
-            colunas = ["id", "numero", "cliente", "maquina", "descricao", "urgencia", 
-                      "data", "status", "tipo", "patrimonio", "numero_serie", 
-                      "local", "endereco", "telefone", "cep", "contato_nome", 
-                      "contato_telefone1", "contato_telefone2", "descricao_servico", 
-                      "necessita_viagem", "tipo_hospedagem", "prazo_entrega", "empresa"]
-            
-            dados_cliente = {colunas[i]: os_data[i] for i in range(len(colunas)) if i < len(os_data)}
-            cliente = dados_cliente.get("cliente", "")
-            
-            # Verificar primeiro na nova estrutura de pastas
-            pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
-            arquivo_ziehm = os.path.join(pasta_os, f"{numero_os}_ziehm.xlsx")
-            
-            # Verificar se o arquivo existe na nova estrutura
-            if os.path.exists(arquivo_ziehm):
-                # Se o arquivo já existe, apenas abre sem recriar
-                self.abrir_arquivo(arquivo_ziehm)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento Ziehm existente aberto em:\n{arquivo_ziehm}", "sucesso")
-                return
-                
-            # Verificar se o arquivo já existe no caminho antigo
-            caminho_arquivo = self.get_caminho_arquivo('ziehm', numero_os)
-            if caminho_arquivo and os.path.exists(caminho_arquivo):
-                # Se o arquivo já existe no local antigo, copiar para a nova estrutura
-                os.makedirs(os.path.dirname(arquivo_ziehm), exist_ok=True)
-                shutil.copy2(caminho_arquivo, arquivo_ziehm)
-                
-                # Abrir o arquivo da nova localização
-                self.abrir_arquivo(arquivo_ziehm)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento Ziehm existente copiado e aberto em:\n{arquivo_ziehm}", "sucesso")
-                return
-                
-            # Se não existe, continua com a criação do documento
-            # Gerar o documento usando a função existente
-            caminho_arquivo = criar_os_ziehm(numero_os, dados_cliente)
+        self._imprimir_em_segundo_plano(
+            self._gerar_os_ziehm,
+            numero_os,
+            "Gerando OS Ziehm",
+            "Erro ao gerar OS Ziehm"
+        )
+    
+    def _gerar_os_ziehm(self, tarefa, numero_os):
+        """
+        Parte de imprimir_os_ziehm executada em segundo plano (não acessa widgets).
+
+        Returns:
+            tuple: (caminho do arquivo, mensagem de sucesso)
+        """
+        # Buscar só as colunas usadas na planilha Ziehm
+        os_data = self.repo.obter_os(numero_os, COLUNAS_ZIEHM)
+        
+        if not os_data:
+            raise ValueError(f"Não foi possível encontrar os dados da OS {numero_os}")
+        
+        dados_cliente = dados_cliente_ziehm(os_data)
+        cliente = os_data.cliente
+        
+        # Verificar primeiro na nova estrutura de pastas
+        pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
+        arquivo_ziehm = os.path.join(pasta_os, f"{numero_os}_ziehm.xlsx")
+        
+        # Verificar se o arquivo existe na nova estrutura
+        if os.path.exists(arquivo_ziehm):
+            # Se o arquivo já existe, apenas abre sem recriar
+            return arquivo_ziehm, f"Documento Ziehm existente aberto em:\n{arquivo_ziehm}"
             
-            # Copiar para a nova estrutura
+        # Verificar se o arquivo já existe no caminho antigo
+        caminho_arquivo = self.get_caminho_arquivo('ziehm', numero_os)
+        if caminho_arquivo and os.path.exists(caminho_arquivo):
+            # Se o arquivo já existe no local antigo, copiar para a nova estrutura
             os.makedirs(os.path.dirname(arquivo_ziehm), exist_ok=True)
             shutil.copy2(caminho_arquivo, arquivo_ziehm)
             
-            # Abrir o documento com o aplicativo padrão (já da nova localização)
-            self.abrir_arquivo(arquivo_ziehm)
+            # Devolver o arquivo da nova localização para ser aberto
+            return arquivo_ziehm, f"Documento Ziehm existente copiado e aberto em:\n{arquivo_ziehm}"
             
-            mostrar_mensagem(self.root, "Sucesso", f"OS Ziehm gerada com sucesso em:\n{arquivo_ziehm}", "sucesso")
-        except Exception as e:
-            mostrar_mensagem(self.root, "Erro", f"Erro ao gerar OS Ziehm: {str(e)}", "erro")
+        # Se não existe, continua com a criação do documento
+        # Gerar o documento usando a função existente
+        caminho_arquivo = criar_os_ziehm(numero_os, dados_cliente)
+        
+        # Copiar para a nova estrutura
+        os.makedirs(os.path.dirname(arquivo_ziehm), exist_ok=True)
+        shutil.copy2(caminho_arquivo, arquivo_ziehm)
+        
+        return arquivo_ziehm, f"OS Ziehm gerada com sucesso em:\n{arquivo_ziehm}"
+    
+    def _imprimir_em_segundo_plano(self, gerar, numero_os, descricao, mensagem_erro):
+        """
+        Gera um documento de OS no executor e abre o arquivo ao terminar.
+        
+        Args:
+            gerar: Função (tarefa, numero_os) -> (caminho, mensagem de sucesso),
+                executada fora da thread da interface
+            numero_os (str): Número da OS
+            descricao (str): Texto exibido na barra de status
+            mensagem_erro (str): Prefixo da mensagem exibida em caso de erro
+        """
+        def concluido(resultado):
+            caminho_arquivo, mensagem = resultado
+            self.abrir_arquivo(caminho_arquivo)
+            mostrar_mensagem(self.root, "Sucesso", mensagem, "sucesso")
+        
+        def falhou(erro):
+            mostrar_mensagem(self.root, "Erro", f"{mensagem_erro}: {str(erro)}", "erro")
+        
+        self.executor.submeter(
+            gerar,
+            numero_os,
+            descricao=f"{descricao} {numero_os}...",
+            ao_concluir=concluido,
+            ao_falhar=falhou
+        )
     
     def abrir_arquivo(self, caminho):
         """Abre um arquivo com o aplicativo padrão do sistema"""
@@ -2186,106 +2568,71 @@ class MoracaOS:
     
     def imprimir_os_visita_tecnica(self, numero_os):
         """Gera e abre documento de OS de visita técnica"""
-        try:
-            # Diagnóstico inicial
-            print(f"Iniciando impressão da OS de Visita Técnica para número: {numero_os}")
-            
-            # Formatação padrão do número de OS (do formato "OS xx yyy" para "OSxxxxx")
-            numero_formatado_db = None
+        self._imprimir_em_segundo_plano(
+            self._gerar_os_visita_tecnica,
+            numero_os,
+            "Gerando OS de Visita Técnica",
+            "Erro ao gerar OS de Visita Técnica"
+        )
+    
+    def _gerar_os_visita_tecnica(self, tarefa, numero_os):
+        """
+        Parte de imprimir_os_visita_tecnica executada em segundo plano (não acessa widgets).
+
+        Returns:
+            tuple: (caminho do arquivo, mensagem de sucesso)
+        """
+        # Diagnóstico inicial
+        print(f"Iniciando impressão da OS de Visita Técnica para número: {numero_os}")
+        
+        # Uma única consulta pela chave canônica, em qualquer grafia do número
+        resultado = self.repo.obter_os_por_chave(numero_os, ("numero", "cliente"))
+        
+        if not resultado:
+            print(f"OS não encontrada no banco. Verificando números disponíveis...")
+            numeros_disponiveis = self.repo.listar_numeros(10)
+            print(f"Números de OS disponíveis: {numeros_disponiveis}")
+            raise ValueError(f"Não foi possível encontrar os dados da OS {numero_os}")
+            
+        print(f"OS encontrada no banco de dados: {resultado.numero}")
+        cliente = resultado.cliente
+        
+        # Verificar primeiro na nova estrutura de pastas
+        pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
+        arquivo_excel = os.path.join(pasta_os, f"{numero_os}_visita_tecnica.xlsx")
+        
+        # Verificar se o arquivo existe na nova estrutura
+        if os.path.exists(arquivo_excel):
+            # Se o arquivo já existe, apenas abre sem recriar
+            return arquivo_excel, f"Documento existente aberto em:\n{arquivo_excel}"
+            
+        # Verificar se o arquivo já existe no caminho antigo
+        caminho_arquivo = self.get_caminho_arquivo('visita_tecnica', numero_os)
+        if caminho_arquivo and os.path.exists(caminho_arquivo):
+            # Se o arquivo já existe no local antigo, copiar para a nova estrutura
+            os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
+            shutil.copy2(caminho_arquivo, arquivo_excel)
             
-            # Se o número já está no formato "OSxxxxx" sem espaços
-            if numero_os.startswith("OS") and " " not in numero_os:
-                numero_formatado_db = numero_os
-            else:
-                # Extrair números
-                numeros = re.findall(r'\d+', numero_os)
-                if numeros:
-                    numeros_juntos = ''.join(numeros)
-                    if len(numeros_juntos) >= 5:
-                        numero_formatado_db = f"OS{numeros_juntos}"
-            
-            print(f"Número formatado para consulta no banco: {numero_formatado_db}")
-            
-            # Buscar os dados da OS primeiro para ter informações do cliente
-            conn = sqlite3.connect('moraca.db')
-            c = conn.cursor()
-            
-            # Tentar diferentes formatos de número de OS
-            formatos_para_testar = [
-                numero_os,  # formato original
-                numero_formatado_db  # formato para o banco
-            ]
-            
-            resultado = None
-            for formato in formatos_para_testar:
-                if formato:
-                    print(f"Tentando consulta com: {formato}")
-                    c.execute("SELECT * FROM os WHERE numero = ?", (formato,))
-                    resultado = c.fetchone()
-                    if resultado:
-                        print(f"OS encontrada com formato: {formato}")
-                        break
-            
-            if not resultado:
-                print(f"OS não encontrada no banco. Verificando números disponíveis...")
-                c.execute("SELECT numero FROM os LIMIT 10")
-                numeros_disponiveis = [row[0] for row in c.fetchall()]
-                print(f"Números de OS disponíveis: {numeros_disponiveis}")
-                mostrar_mensagem(self.root, "Erro", f"Não foi possível encontrar os dados da OS {numero_os}", "erro")
-                conn.close()
-                return
-                
-            print(f"OS encontrada no banco de dados: {resultado[0]}")
-            cliente = resultado[1]  # índice 1 é o cliente
+            # Devolver o arquivo da nova localização para ser aberto
+            return arquivo_excel, f"Documento existente copiado e aberto em:\n{arquivo_excel}"
             
-            # Verificar primeiro na nova estrutura de pastas
-            pasta_os = self.get_pasta_os_cliente(numero_os, cliente)
-            arquivo_excel = os.path.join(pasta_os, f"{numero_os}_visita_tecnica.xlsx")
+        # Se não existe, continua com a criação do documento
+        # Gerar o documento usando a função existente - passar o número exato encontrado no banco de dados
+        print(f"Gerando novo documento de OS Visita Técnica...")
+        numero_os_para_criar = resultado.numero  # Usar o número exato como está no banco
+        caminho_arquivo = criar_os_visita_tecnica(numero_os_para_criar)
+        
+        if caminho_arquivo:
+            print(f"Documento gerado com sucesso em: {caminho_arquivo}")
+            # Copiar para a nova estrutura
+            os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
+            shutil.copy2(caminho_arquivo, arquivo_excel)
             
-            # Verificar se o arquivo existe na nova estrutura
-            if os.path.exists(arquivo_excel):
-                # Se o arquivo já existe, apenas abre sem recriar
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Verificar se o arquivo já existe no caminho antigo
-            caminho_arquivo = self.get_caminho_arquivo('visita_tecnica', numero_os)
-            if caminho_arquivo and os.path.exists(caminho_arquivo):
-                # Se o arquivo já existe no local antigo, copiar para a nova estrutura
-                os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
-                shutil.copy2(caminho_arquivo, arquivo_excel)
-                
-                # Abrir o arquivo da nova localização
-                self.abrir_arquivo(arquivo_excel)
-                mostrar_mensagem(self.root, "Sucesso", f"Documento existente copiado e aberto em:\n{arquivo_excel}", "sucesso")
-                return
-                
-            # Se não existe, continua com a criação do documento
-            # Gerar o documento usando a função existente - passar o número exato encontrado no banco de dados
-            print(f"Gerando novo documento de OS Visita Técnica...")
-            numero_os_para_criar = resultado[0]  # Usar o número exato como está no banco
-            caminho_arquivo = criar_os_visita_tecnica(numero_os_para_criar)
-            
-            if caminho_arquivo:
-                print(f"Documento gerado com sucesso em: {caminho_arquivo}")
-                # Copiar para a nova estrutura
-                os.makedirs(os.path.dirname(arquivo_excel), exist_ok=True)
-                shutil.copy2(caminho_arquivo, arquivo_excel)
-                
-                # Abrir o documento com o aplicativo padrão (já da nova localização)
-                self.abrir_arquivo(arquivo_excel)
-                
-                mostrar_mensagem(self.root, "Sucesso", f"OS de Visita Técnica gerada com sucesso em:\n{arquivo_excel}", "sucesso")
-            else:
-                print("Falha ao gerar o documento de OS Visita Técnica.")
-                mostrar_mensagem(self.root, "Erro", "Não foi possível gerar a OS de Visita Técnica.", "erro")
-        except Exception as e:
-            print(f"Erro detalhado ao gerar OS de Visita Técnica: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            mostrar_mensagem(self.root, "Erro", f"Erro ao gerar OS de Visita Técnica: {str(e)}", "erro")
-
+            return arquivo_excel, f"OS de Visita Técnica gerada com sucesso em:\n{arquivo_excel}"
+        else:
+            print("Falha ao gerar o documento de OS Visita Técnica.")
+            raise ValueError("Não foi possível gerar a OS de Visita Técnica.")
+    
     def _configure_main_frame(self, event):
         """Atualiza a área de rolagem quando o frame muda de tamanho"""
         self.main_canvas.configure(scrollregion=self.main_canvas.bbox("all"))
@@ -2387,6 +2734,9 @@ class MoracaOS:
         Obtém o caminho onde um arquivo de OS deve estar armazenado, 
         baseado no tipo de OS e número da OS.
         
+        Consulta o registro de documentos (os_documentos); se o documento não
+        estiver registrado, devolve o caminho com o nome padrão do tipo.
+        
         Args:
             tipo_os (str): Tipo de OS (ziehm, andamento, interna, etc)
             numero_os (str): Número da OS
@@ -2394,27 +2744,8 @@ class MoracaOS:
         Returns:
             str: Caminho completo do arquivo ou None se não puder determinar
         """
-        # Formatação padronizada do número da OS
-        if not numero_os.startswith("OS "):
-            numeros = re.findall(r'\d+', numero_os)
-            if numeros:
-                numero_completo = ''.join(numeros)
-                if len(numero_completo) >= 5:
-                    ano = numero_completo[:2]
-                    sequencia = numero_completo[2:].zfill(3)  # Garantir 3 dígitos
-                    numero_os_formatado = f"OS {ano} {sequencia}"
-                else:
-                    ano = datetime.now().strftime("%y")
-                    sequencia = numero_completo.zfill(3)  # Garantir 3 dígitos
-                    numero_os_formatado = f"OS {ano} {sequencia}"
-            else:
-                ano = datetime.now().strftime("%y")
-                numero_os_formatado = f"OS {ano} 001"
-        else:
-            numero_os_formatado = numero_os
-        
-        # Criar string limpa para uso em nome de arquivo
-        numero_os_limpo = numero_os_formatado.replace(" ", "_").replace("/", "-").replace("-", "_")
+        numero = normalizar_numero_os(numero_os)
+        numero_os_limpo = numero.nome_arquivo
         
         # Definir pasta principal para documentos técnicos
         pasta_base = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
@@ -2423,10 +2754,13 @@ class MoracaOS:
         # Definir pasta de destino e padrão de nome do arquivo baseado no tipo de OS
         if tipo_os.lower() == 'ziehm':
             pasta_especifica = os.path.join(pasta_base, "andamento")
-            padrao_arquivo = f"Ziehm_OS_{numero_os_limpo}"
-        elif tipo_os.lower() in ['andamento', 'interna']:
+            padrao_arquivo = f"Ziehm_OS_{numero.ziehm.replace('-', '_')}"
+        elif tipo_os.lower() == 'andamento':
             pasta_especifica = os.path.join(pasta_base, "andamento")
             padrao_arquivo = f"OS_{numero_os_limpo}"
+        elif tipo_os.lower() == 'interna':
+            pasta_especifica = os.path.join(pasta_base, "interna")
+            padrao_arquivo = f"OS_Interna_{numero_os_limpo}"
         elif tipo_os.lower() == 'preventiva':
             pasta_especifica = os.path.join(pasta_base, "preventivas")
             padrao_arquivo = f"OS_Preventiva_{numero_os_limpo}"
@@ -2443,46 +2777,13 @@ class MoracaOS:
             # Para outros tipos de OS que ainda não têm um padrão definido
             return None
             
-        # Verificar se a pasta existe, se não, criar
-        if not os.path.exists(pasta_especifica):
-            try:
-                os.makedirs(pasta_especifica)
-            except:
-                pass
-            
-        # Tentar encontrar arquivo existente com o padrão
-        arquivo_encontrado = self.encontrar_arquivo_por_padrao(pasta_especifica, padrao_arquivo)
-        if arquivo_encontrado:
-            return arquivo_encontrado
+        # Documento registrado (consulta exata por número e tipo, sem listar a pasta)
+        arquivo_registrado = caminho_documento(numero.chave, tipo_os.lower(), self.repo)
+        if arquivo_registrado and os.path.exists(arquivo_registrado):
+            return arquivo_registrado
                 
-        # Se não encontrou, sugerir o nome padrão para criação
+        # Se não está registrado, sugerir o nome padrão para criação
         return os.path.join(pasta_especifica, f"{padrao_arquivo}.xlsx")
-    
-    def encontrar_arquivo_por_padrao(self, pasta, padrao_arquivo):
-        """
-        Busca por arquivos que correspondam a um padrão em uma pasta.
-        
-        Args:
-            pasta (str): Pasta onde buscar
-            padrao_arquivo (str): Padrão de nome de arquivo a buscar
-            
-        Returns:
-            str: Caminho completo do arquivo encontrado ou None
-        """
-        if not os.path.exists(pasta):
-            return None
-            
-        # Listar todos os arquivos na pasta
-        try:
-            arquivos = os.listdir(pasta)
-            for arquivo in arquivos:
-                # Verificar se o arquivo corresponde ao padrão (ignorando extensão)
-                if arquivo.startswith(padrao_arquivo):
-                    return os.path.join(pasta, arquivo)
-        except Exception as e:
-            print(f"Erro ao listar arquivos: {str(e)}")
-            
-        return None
 
 if __name__ == "__main__":
     # Iniciar a aplicação com verificação de licença
@@ -2492,5 +2793,6 @@ if __name__ == "__main__":
     # (o que significa que a licença é válida)
     if hasattr(app, 'root') and app.root:
         app.root.mainloop()
+        app.executor.encerrar()
     else:
         sys.exit(0) 
\ No newline at end of file
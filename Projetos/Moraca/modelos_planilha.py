@@ -0,0 +1,123 @@
+"""
+Modelos de planilha pré-compilados.
+
+Montar uma planilha de OS célula por célula (fontes, bordas, mesclagens,
+configuração de impressão) custa muito mais do que preencher os dados. Aqui
+cada layout é montado uma única vez por processo, com marcadores no lugar dos
+dados ("Cliente: {{cliente}}"), e guardado como xlsx em memória junto com a
+lista das células, títulos de aba e cabeçalhos/rodapés que têm marcadores.
+Para cada OS o modelo é carregado desses bytes e só essas posições são
+preenchidas.
+
+A função que monta o layout recebe um dicionário de valores e não pode tomar
+decisões com base neles (if, len, upper...): qualquer cálculo sobre os dados
+deve ser feito antes, ao montar o dicionário.
+"""
+
+import io
+import re
+import threading
+
+import openpyxl
+
+from pacote_documentos import renderizar_xlsx
+
+_MARCADOR = re.compile(r"\{\{(\w+)\}\}")
+
+# Partes de cabeçalho/rodapé que podem conter marcadores
+_CABECALHOS = ("oddHeader", "oddFooter", "evenHeader", "evenFooter", "firstHeader", "firstFooter")
+_POSICOES = ("left", "center", "right")
+
+
+def _substituir(texto, valores):
+    """Troca cada {{campo}} pelo valor correspondente (None vira vazio)"""
+    def valor(match):
+        conteudo = valores.get(match.group(1))
+        return "" if conteudo is None else str(conteudo)
+    return _MARCADOR.sub(valor, texto)
+
+
+class ModeloPlanilha:
+    """Layout compilado de um tipo de planilha"""
+
+    def __init__(self, nome, construir, campos):
+        """
+        Args:
+            nome (str): Identificação do modelo (ex: "ziehm")
+            construir: Função (valores) -> openpyxl.Workbook que monta o layout
+            campos (iterable): Nomes dos campos preenchidos por OS
+        """
+        self.nome = nome
+        marcadores = {campo: f"{{{{{campo}}}}}" for campo in campos}
+        wb = construir(marcadores)
+
+        # Guardar onde estão os marcadores, para não varrer a planilha a cada OS
+        self._celulas = []
+        self._titulos = []
+        self._cabecalhos = []
+        for indice, ws in enumerate(wb.worksheets):
+            if _MARCADOR.search(ws.title):
+                self._titulos.append(indice)
+            for linha in ws.iter_rows():
+                for celula in linha:
+                    if isinstance(celula.value, str) and _MARCADOR.search(celula.value):
+                        self._celulas.append((indice, celula.coordinate))
+            for parte in _CABECALHOS:
+                cabecalho = getattr(ws, parte)
+                for posicao in _POSICOES:
+                    texto = getattr(cabecalho, posicao).text
+                    if texto and _MARCADOR.search(texto):
+                        self._cabecalhos.append((indice, parte, posicao))
+
+        self._dados = renderizar_xlsx(wb)
+
+    def instanciar(self, valores):
+        """
+        Cria uma planilha a partir do modelo com os dados de uma OS.
+
+        Args:
+            valores (dict): Valor de cada campo
+
+        Returns:
+            openpyxl.Workbook: Planilha pronta para salvar
+        """
+        wb = openpyxl.load_workbook(io.BytesIO(self._dados))
+        abas = wb.worksheets
+        for indice in self._titulos:
+            abas[indice].title = _substituir(abas[indice].title, valores)
+        for indice, coordenada in self._celulas:
+            celula = abas[indice][coordenada]
+            celula.value = _substituir(celula.value, valores)
+        for indice, parte, posicao in self._cabecalhos:
+            item = getattr(getattr(abas[indice], parte), posicao)
+            item.text = _substituir(item.text, valores)
+        return wb
+
+
+_modelos = {}
+_trava_modelos = threading.Lock()
+
+
+def preencher_modelo(nome, construir, valores):
+    """
+    Retorna uma planilha do modelo `nome` preenchida com os valores.
+
+    O modelo é compilado na primeira chamada do processo (chamando
+    construir com marcadores no lugar dos valores) e reaproveitado depois.
+
+    Args:
+        nome (str): Identificação do modelo
+        construir: Função (valores) -> openpyxl.Workbook que monta o layout
+        valores (dict): Valor de cada campo
+
+    Returns:
+        openpyxl.Workbook: Planilha preenchida
+    """
+    modelo = _modelos.get(nome)
+    if modelo is None:
+        with _trava_modelos:
+            modelo = _modelos.get(nome)
+            if modelo is None:
+                modelo = ModeloPlanilha(nome, construir, valores.keys())
+                _modelos[nome] = modelo
+    return modelo.instanciar(valores)
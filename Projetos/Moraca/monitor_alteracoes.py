@@ -0,0 +1,83 @@
+"""
+Atualização da lista de OS com as alterações gravadas por qualquer estação.
+
+Gatilhos da tabela os registram em os_alteracoes cada OS incluída, alterada
+(número, cliente, data ou status) ou excluída (ver os_migracoes.py). O
+MonitorAlteracoes lê, a cada meio segundo, o PRAGMA data_version, que só muda
+quando alguma conexão grava no banco e não consulta nenhuma tabela. Só quando
+ele muda o monitor busca as linhas de os_alteracoes posteriores à última
+vista e entrega à tela as OS afetadas, que corrige os itens da tabela no lugar
+em vez de recarregar a lista inteira.
+"""
+
+import sqlite3
+
+
+class MonitorAlteracoes:
+    """Acompanha os_alteracoes e avisa a tela das OS alteradas"""
+
+    def __init__(self, root, repo, ao_alterar, ao_recarregar, intervalo_ms=500, limite=500):
+        """
+        Args:
+            root: Janela principal (usada para agendar as verificações)
+            repo (RepositorioOS): Repositório do banco
+            ao_alterar: Função chamada com a lista de OS alteradas (uma linha
+                de RepositorioOS.listar_alteracoes por número, a mais recente)
+            ao_recarregar: Função chamada quando há alterações demais para
+                aplicar uma a uma (ex: importação em lote em outra estação)
+            intervalo_ms (int): Intervalo entre as verificações
+            limite (int): Alterações acima das quais a lista é recarregada
+        """
+        self.root = root
+        self.repo = repo
+        self.ao_alterar = ao_alterar
+        self.ao_recarregar = ao_recarregar
+        self.intervalo_ms = intervalo_ms
+        self.limite = limite
+
+        self.ativo = False
+        self._versao = None
+        self._ultima = 0
+
+    def iniciar(self):
+        """Começa a acompanhar as alterações gravadas a partir de agora"""
+        self._versao = self.repo.versao_dados()
+        self._ultima = self.repo.ultima_alteracao()
+        self.ativo = True
+        self.root.after(self.intervalo_ms, self._verificar)
+
+    def parar(self):
+        """Para de acompanhar (a verificação já agendada não faz nada)"""
+        self.ativo = False
+
+    def _verificar(self):
+        """Confere o data_version e, se mudou, busca as alterações novas"""
+        if not self.ativo:
+            return
+        try:
+            versao = self.repo.versao_dados()
+            if versao != self._versao:
+                self._versao = versao
+                self._buscar_alteracoes()
+        except sqlite3.Error as e:
+            # Banco ocupado ou compartilhamento fora do ar: tenta de novo na próxima verificação
+            print(f"Erro ao verificar alterações no banco: {e}")
+        self.root.after(self.intervalo_ms, self._verificar)
+
+    def _buscar_alteracoes(self):
+        alteracoes = self.repo.listar_alteracoes(self._ultima, self.limite)
+        if not alteracoes:
+            return
+
+        if len(alteracoes) >= self.limite:
+            # Mais barato recarregar a lista do que aplicar cada alteração
+            self._ultima = self.repo.ultima_alteracao()
+            self.ao_recarregar()
+            return
+
+        self._ultima = alteracoes[-1]["id"]
+        # Uma entrada por OS, com os dados atuais (a mais recente prevalece)
+        por_numero = {}
+        for alteracao in alteracoes:
+            por_numero[alteracao["numero"]] = alteracao
+        self.ao_alterar(list(por_numero.values()))
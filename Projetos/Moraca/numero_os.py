@@ -0,0 +1,107 @@
+"""
+Leitura única do número da OS, nas várias grafias usadas pelo sistema.
+
+O mesmo número aparece como "OS25007" (banco), "OS 25 007" (documentos),
+"25007" (digitado) e "25-007-1" (Ziehm). Cada gerador tinha a sua cópia da
+conversão e elas não concordavam: umas liam a sequência como os 3 últimos
+dígitos ([-3:]) e outras como tudo depois do ano ([2:]), o que só faz
+diferença a partir da OS 1000 de um ano. A leitura canônica é [2:], a mesma do
+formatar_numero_os, que não trunca a sequência. Quando a leitura antiga daria
+outro número, um aviso é mostrado (uma vez por número) e fica em DIVERGENCIAS.
+
+A chave canônica (NumeroOS.chave, ex: "OS25007") é a mesma da coluna indexada
+os.numero_key, então buscar uma OS por qualquer grafia é uma única consulta
+pelo índice (RepositorioOS.obter_os_por_chave).
+
+Uso:
+    python numero_os.py    # Lista as OS do banco com leituras divergentes
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+# Números cuja leitura antiga ([-3:]) diferia da canônica: {numero: (canônico, antigo)}
+DIVERGENCIAS = {}
+
+
+class NumeroOS(namedtuple("NumeroOS", ("ano", "sequencia"))):
+    """Ano (2 dígitos) e sequência (3 dígitos ou mais) de uma OS"""
+
+    __slots__ = ()
+
+    @property
+    def chave(self):
+        """Chave de busca e do registro de documentos (ex: "OS25007")"""
+        return f"OS{self.ano}{self.sequencia}"
+
+    @property
+    def formatado(self):
+        """Número como aparece nos documentos (ex: "OS 25 007")"""
+        return f"OS {self.ano} {self.sequencia}"
+
+    @property
+    def nome_arquivo(self):
+        """Número usado nos nomes de arquivo (ex: "OS_25_007")"""
+        return f"OS_{self.ano}_{self.sequencia}"
+
+    @property
+    def ziehm(self):
+        """Número no formato da Ziehm (ex: "25-007-1")"""
+        return f"{self.ano}-{self.sequencia}-1"
+
+
+@lru_cache(maxsize=4096)
+def normalizar_numero_os(numero):
+    """
+    Lê o número da OS em qualquer das grafias usadas no sistema.
+
+    "OS 25 007" e "25-007-1" têm ano e sequência separados; em "OS25007" ou
+    "25007" os 2 primeiros dígitos são o ano e o restante a sequência. Com
+    menos de 5 dígitos, o número é uma sequência do ano atual; sem nenhum
+    dígito, vira a OS 001 do ano atual (como os geradores sempre fizeram).
+
+    Args:
+        numero (str): Número da OS
+
+    Returns:
+        NumeroOS: Ano e sequência (com pelo menos 3 dígitos)
+    """
+    texto = (numero or "").strip()
+    grupos = re.findall(r'\d+', texto)
+    digitos = ''.join(grupos)
+
+    if len(grupos) >= 2 and len(grupos[0]) == 2:
+        # Ano e sequência separados; o "-1" do formato Ziehm é ignorado
+        ano, sequencia = grupos[0], grupos[1]
+    elif len(digitos) >= 5:
+        ano, sequencia = digitos[:2], digitos[2:]
+        # Parte dos geradores antigos lia a sequência como os 3 últimos dígitos
+        if digitos[-3:] != sequencia:
+            antigo = f"OS{ano}{digitos[-3:]}"
+            DIVERGENCIAS[texto] = (f"OS{ano}{sequencia}", antigo)
+            print(f"Aviso: o número de OS '{texto}' era lido como {antigo} por parte do sistema; "
+                  f"usando OS{ano}{sequencia}")
+    elif digitos:
+        ano, sequencia = datetime.now().strftime("%y"), digitos
+    else:
+        ano, sequencia = datetime.now().strftime("%y"), "001"
+    return NumeroOS(ano, sequencia.zfill(3))
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    # Conferência das grafias conhecidas
+    for grafia in ("OS25007", "OS 25 007", "25007", "25-007-1", "OS_25_007"):
+        assert normalizar_numero_os(grafia).chave == "OS25007", grafia
+    assert normalizar_numero_os("OS251234").chave == "OS251234"
+
+    DIVERGENCIAS.clear()
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    numeros = repo.listar_numeros(-1)
+    for numero in numeros:
+        normalizar_numero_os(numero)
+    print(f"{len(numeros)} números de OS conferidos; {len(DIVERGENCIAS)} com leitura divergente")
@@ -0,0 +1,259 @@
+"""
+Índice de texto completo (SQLite FTS5) das OS.
+
+O índice os_fts cobre os campos que os técnicos costumam lembrar (número,
+cliente, máquina, descrições, número de série, patrimônio e local) e é mantido
+sincronizado com a tabela os por triggers. A tokenização ignora acentos
+("São Lucas" encontra "sao lucas") e cada palavra digitada é tratada como
+prefixo ("mand" encontra "Mandaqui").
+
+Um texto que é só um número de OS ("25007", "OS 25 007", "5001") também é
+procurado pela chave canônica (os.numero_key, ver numero_os.py): a OS com o
+mesmo número em qualquer grafia e as OS cujo número contém os dígitos, como
+a pesquisa por LIKE das versões anteriores.
+
+Uso:
+    python os_busca.py --reconstruir    # Recria o índice a partir da tabela os
+"""
+
+import re
+import sys
+import sqlite3
+import unicodedata
+
+from numero_os import normalizar_numero_os
+
+# Colunas indexadas, na ordem da tabela virtual
+COLUNAS_FTS = (
+    "numero", "cliente", "maquina", "descricao", "descricao_servico",
+    "numero_serie", "patrimonio", "local"
+)
+
+# Peso de cada coluna no ranking bm25 (número e cliente pesam mais)
+PESOS_FTS = (10.0, 5.0, 2.0, 1.0, 1.0, 3.0, 3.0, 1.0)
+
+
+def _valores_indexados(tabela):
+    """
+    Expressões SQL com os valores gravados no índice para uma linha.
+
+    O número é indexado também sem o prefixo "OS" (OS25007 -> "OS25007 25007"),
+    para que a busca por "25007" funcione.
+    """
+    valores = []
+    for coluna in COLUNAS_FTS:
+        if coluna == "numero":
+            valores.append(f"{tabela}.numero || ' ' || substr({tabela}.numero, 3)")
+        else:
+            valores.append(f"{tabela}.{coluna}")
+    return ", ".join(valores)
+
+
+def criar_indice_busca(conn):
+    """
+    Cria a tabela virtual os_fts e as triggers de sincronização.
+
+    Se o índice ainda não existia, ele é preenchido com as OS já cadastradas.
+    Deve ser chamado dentro de uma transação de escrita.
+
+    Args:
+        conn: Conexão com o banco
+
+    Returns:
+        bool: True se o FTS5 está disponível nesta versão do SQLite
+    """
+    ja_existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'os_fts'"
+    ).fetchone() is not None
+
+    try:
+        conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS os_fts USING fts5(
+                    {", ".join(COLUNAS_FTS)},
+                    content='os',
+                    content_rowid='rowid',
+                    tokenize="unicode61 remove_diacritics 2",
+                    prefix='2 3')''')
+    except sqlite3.OperationalError as e:
+        print(f"Busca por texto completo indisponível (FTS5): {e}")
+        return False
+
+    colunas = ", ".join(COLUNAS_FTS)
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS os_fts_insert AFTER INSERT ON os BEGIN
+                    INSERT INTO os_fts (rowid, {colunas})
+                    VALUES (new.rowid, {_valores_indexados("new")});
+                END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS os_fts_delete AFTER DELETE ON os BEGIN
+                    INSERT INTO os_fts (os_fts, rowid, {colunas})
+                    VALUES ('delete', old.rowid, {_valores_indexados("old")});
+                END''')
+    # Só reindexa quando muda um campo indexado (alterar o status não mexe no índice)
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS os_fts_update AFTER UPDATE OF {colunas} ON os BEGIN
+                    INSERT INTO os_fts (os_fts, rowid, {colunas})
+                    VALUES ('delete', old.rowid, {_valores_indexados("old")});
+                    INSERT INTO os_fts (rowid, {colunas})
+                    VALUES (new.rowid, {_valores_indexados("new")});
+                END''')
+
+    if not ja_existia:
+        reconstruir_indice_busca(conn)
+    return True
+
+
+def reconstruir_indice_busca(conn):
+    """
+    Apaga e recria todo o conteúdo do índice a partir da tabela os.
+
+    Args:
+        conn: Conexão com o banco (dentro de uma transação de escrita)
+
+    Returns:
+        int: Quantidade de OS indexadas
+    """
+    conn.execute("INSERT INTO os_fts (os_fts) VALUES ('delete-all')")
+    conn.execute(f'''INSERT INTO os_fts (rowid, {", ".join(COLUNAS_FTS)})
+                SELECT os.rowid, {_valores_indexados("os")} FROM os''')
+    conn.execute("INSERT INTO os_fts (os_fts) VALUES ('optimize')")
+    return conn.execute("SELECT COUNT(*) FROM os").fetchone()[0]
+
+
+def montar_consulta_fts(termo):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5.
+
+    Cada palavra vira uma busca por prefixo e todas precisam aparecer
+    (ex: "hosp mand" -> '"hosp"* "mand"*').
+
+    Args:
+        termo (str): Texto digitado na pesquisa
+
+    Returns:
+        str: Expressão MATCH, ou None se o termo não tiver palavras
+    """
+    palavras = re.findall(r"\w+", termo)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def digitos_numero_os(termo):
+    """
+    Dígitos do texto, se ele for só um número de OS.
+
+    Args:
+        termo (str): Texto digitado (ex: "OS 25 007", "25-007-1", "5001")
+
+    Returns:
+        str: Dígitos (ex: "25007"), ou None se o texto tiver outras palavras
+    """
+    if re.fullmatch(r"\s*(?:os)?[\s_-]*\d+(?:[\s_-]+\d+)*\s*", termo or "", re.IGNORECASE):
+        return re.sub(r"\D", "", termo)
+    return None
+
+
+def sql_busca_numero(colunas):
+    """
+    Monta os SELECTs das OS encontradas pelo número.
+
+    Args:
+        colunas (tuple): Colunas da tabela os a retornar
+
+    Returns:
+        tuple: (sql da chave exata, com um parâmetro: a chave canônica;
+            sql das OS cujo número contém os dígitos, com o padrão LIKE e o
+            limite). O LIKE percorre só o índice da coluna numero.
+    """
+    selecao = ", ".join(colunas)
+    exata = f"SELECT {selecao} FROM os WHERE numero_key = ?"
+    contem = f'''SELECT {selecao} FROM os
+                WHERE rowid IN (SELECT rowid FROM os WHERE numero LIKE ?)
+                ORDER BY data_iso DESC, numero DESC LIMIT ?'''
+    return exata, contem
+
+
+def normalizar_texto(texto):
+    """Texto em minúsculas e sem acentos, como o tokenizador do índice o compara"""
+    texto = texto or ""
+    if texto.isascii():
+        return texto.lower()
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def palavras_busca(termo):
+    """Palavras do texto digitado, normalizadas (as mesmas da expressão MATCH)"""
+    return re.findall(r"\w+", normalizar_texto(termo))
+
+
+def refina_termo(anterior, termo):
+    """
+    Indica se os resultados de 'termo' estão contidos nos de 'anterior'.
+
+    Como cada palavra é um prefixo e todas precisam aparecer, acrescentar
+    letras ao fim do texto só restringe a busca ("hos" -> "hosp" -> "hosp m").
+
+    Args:
+        anterior (str): Termo da busca anterior
+        termo (str): Termo novo
+
+    Returns:
+        bool: True se o termo novo só estende o anterior
+    """
+    anterior = normalizar_texto(anterior)
+    return bool(palavras_busca(anterior)) and normalizar_texto(termo).startswith(anterior)
+
+
+def registro_corresponde(registro, palavras):
+    """
+    Aplica em memória a mesma regra da busca pelo índice.
+
+    Args:
+        registro: Linha com as colunas de COLUNAS_FTS
+        palavras (list): Palavras normalizadas (ver palavras_busca)
+
+    Returns:
+        bool: True se cada palavra é prefixo de alguma palavra dos campos indexados
+    """
+    numero = registro["numero"] or ""
+    # Texto que é só um número de OS: mesma regra de sql_busca_numero
+    digitos = digitos_numero_os(" ".join(palavras))
+    if digitos:
+        # numero_key como a coluna gerada do banco (os_migracoes._expressao_numero_key)
+        chave = "OS" + numero.strip().upper().replace("OS", "").replace(" ", "").replace("-", "")
+        if digitos in numero or chave == normalizar_numero_os(" ".join(palavras)).chave:
+            return True
+    textos = [numero, numero[2:]] + [registro[coluna] or "" for coluna in COLUNAS_FTS[1:]]
+    tokens = re.findall(r"\w+", normalizar_texto(" ".join(str(texto) for texto in textos)))
+    return all(any(token.startswith(palavra) for token in tokens) for palavra in palavras)
+
+
+def sql_busca_fts(colunas, limite=True):
+    """
+    Monta o SELECT que busca OS pelo índice, ordenado por relevância (bm25).
+
+    Args:
+        colunas (tuple): Colunas da tabela os a retornar
+        limite (bool): Se True, inclui "LIMIT ?" no final
+
+    Returns:
+        str: SQL com um parâmetro para a expressão MATCH (e outro para o limite)
+    """
+    pesos = ", ".join(str(peso) for peso in PESOS_FTS)
+    sql = f'''SELECT {", ".join("os." + coluna for coluna in colunas)}
+                FROM os_fts JOIN os ON os.rowid = os_fts.rowid
+                WHERE os_fts MATCH ?
+                ORDER BY bm25(os_fts, {pesos})'''
+    if limite:
+        sql += " LIMIT ?"
+    return sql
+
+
+if __name__ == "__main__":
+    if "--reconstruir" in sys.argv:
+        from os_repositorio import obter_repositorio
+
+        repo = obter_repositorio()
+        repo.criar_esquema()
+        total = repo.reconstruir_indice_busca()
+        print(f"Índice de busca reconstruído: {total} OS indexadas.")
+    else:
+        print(__doc__)
@@ -0,0 +1,232 @@
+"""
+Cadastro de clientes e equipamentos (tabelas clientes e equipamentos).
+
+Cada OS repetia o endereço e os contatos do cliente e a identificação do
+equipamento, e "todas as OS deste cliente" era uma comparação de texto em toda
+a tabela. Agora cada cliente e cada equipamento tem um registro, com chave
+substituta (id), e a OS aponta para eles (os.cliente_id e os.equipamento_id,
+com índices terminados na ordem da lista).
+
+Os registros são identificados por chaves normalizadas:
+- cliente: o nome em minúsculas, sem acentos e sem pontuação ("Hospital São
+  Lucas" e "HOSPITAL SAO LUCAS." são o mesmo cliente);
+- equipamento: o número de série só com letras e dígitos; sem número de
+  série, o patrimônio dentro do cliente. Sem nenhum dos dois a OS fica sem
+  equipamento.
+
+Endereço e contatos do cadastro são os da OS mais recente que os informou.
+As colunas antigas da tabela os continuam gravadas: os documentos, o índice
+de pesquisa e estações com versões anteriores ainda as leem.
+
+Uso:
+    python os_cadastros.py    # Mostra quantos clientes e equipamentos há e quantas OS ficaram sem cadastro
+"""
+
+import re
+
+from os_busca import normalizar_texto
+from os_trigramas import normalizar_termo
+
+# Colunas do cadastro de clientes -> coluna correspondente da tabela os
+COLUNAS_CLIENTE = {
+    "nome": "cliente",
+    "endereco": "endereco",
+    "cidade": "cidade",
+    "telefone": "telefone",
+    "cep": "cep",
+    "contato_nome": "contato_nome",
+    "contato_telefone1": "contato_telefone1",
+    "contato_telefone2": "contato_telefone2",
+}
+
+# Colunas do cadastro de equipamentos -> coluna correspondente da tabela os
+COLUNAS_EQUIPAMENTO = {
+    "maquina": "maquina",
+    "numero_serie": "numero_serie",
+    "patrimonio": "patrimonio",
+}
+
+# Identificações que significam "não informado" ("S/N", "N/A", "-"...)
+SEM_IDENTIFICACAO = {"", "0", "sn", "na", "nd", "nao", "naoinformado", "semnumero", "semserie", "sempatrimonio"}
+
+
+def chave_cliente(nome):
+    """Chave normalizada do cliente, ou None se o nome estiver vazio"""
+    return normalizar_termo(nome or "") or None
+
+
+def _identificacao(texto):
+    """Número de série ou patrimônio só com letras e dígitos (None se não informado)"""
+    identificacao = re.sub(r"[^0-9a-z]", "", normalizar_texto(texto or ""))
+    return None if identificacao in SEM_IDENTIFICACAO else identificacao
+
+
+def chave_equipamento(numero_serie, patrimonio, cliente_id):
+    """
+    Chave normalizada do equipamento.
+
+    Args:
+        numero_serie (str): Número de série como digitado
+        patrimonio (str): Patrimônio como digitado
+        cliente_id (int): Cliente da OS (o patrimônio só é único dentro do cliente)
+
+    Returns:
+        str: "serie:<número>" ou "patrimonio:<cliente>:<patrimônio>", ou None
+    """
+    serie = _identificacao(numero_serie)
+    if serie:
+        return f"serie:{serie}"
+    patrimonio = _identificacao(patrimonio)
+    if patrimonio and cliente_id is not None:
+        return f"patrimonio:{cliente_id}:{patrimonio}"
+    return None
+
+
+def _texto(valor):
+    return (valor or "").strip()
+
+
+def _mesclar(atual, dados, colunas):
+    """Valores preenchidos da OS substituem os do cadastro (a OS é a mais recente)"""
+    for coluna_cadastro, coluna_os in colunas.items():
+        valor = _texto(dados.get(coluna_os))
+        if coluna_os in ("numero_serie", "patrimonio") and not _identificacao(valor):
+            continue
+        if valor:
+            atual[coluna_cadastro] = valor
+
+
+def criar_cadastros(conn):
+    """
+    Cria as tabelas clientes e equipamentos e liga as OS cadastradas a elas.
+
+    Percorre as OS da mais antiga para a mais recente, agrupando pelas chaves
+    normalizadas, e grava tudo de uma vez. Deve ser chamado dentro de uma
+    transação de escrita.
+
+    Args:
+        conn: Conexão com o banco
+
+    Returns:
+        tuple: (clientes, equipamentos) cadastrados
+    """
+    conn.execute(f'''CREATE TABLE IF NOT EXISTS clientes
+                (id INTEGER PRIMARY KEY,
+                 chave TEXT NOT NULL UNIQUE,
+                 {", ".join(f"{coluna} TEXT" for coluna in COLUNAS_CLIENTE)},
+                 atualizado_em TEXT)''')
+    conn.execute(f'''CREATE TABLE IF NOT EXISTS equipamentos
+                (id INTEGER PRIMARY KEY,
+                 chave TEXT NOT NULL UNIQUE,
+                 cliente_id INTEGER REFERENCES clientes (id),
+                 {", ".join(f"{coluna} TEXT" for coluna in COLUNAS_EQUIPAMENTO)},
+                 atualizado_em TEXT)''')
+    colunas_os = [info[1] for info in conn.execute("PRAGMA table_info(os)")]
+    for coluna, tabela in (("cliente_id", "clientes"), ("equipamento_id", "equipamentos")):
+        if coluna not in colunas_os:
+            conn.execute(f"ALTER TABLE os ADD COLUMN {coluna} INTEGER REFERENCES {tabela} (id)")
+
+    clientes = {}      # chave -> colunas do cadastro
+    equipamentos = {}  # chave -> colunas do cadastro
+    vinculos = []      # (cliente_id, equipamento_id, rowid da OS)
+    selecao = ", ".join(sorted(set(COLUNAS_CLIENTE.values()) | set(COLUNAS_EQUIPAMENTO.values())))
+    cursor = conn.execute(f'''SELECT rowid, data_iso, {selecao} FROM os
+                WHERE cliente_id IS NULL ORDER BY data_iso IS NOT NULL, data_iso, numero''')
+    nomes = [descricao[0] for descricao in cursor.description]
+    for linha in cursor:
+        dados = dict(zip(nomes, linha))
+        chave = chave_cliente(dados["cliente"])
+        if chave is None:
+            continue
+        cliente = clientes.setdefault(chave, {"id": len(clientes) + 1})
+        _mesclar(cliente, dados, COLUNAS_CLIENTE)
+        cliente["atualizado_em"] = dados["data_iso"] or cliente.get("atualizado_em")
+
+        chave_eq = chave_equipamento(dados["numero_serie"], dados["patrimonio"], cliente["id"])
+        if chave_eq is not None:
+            equipamento = equipamentos.setdefault(chave_eq, {"id": len(equipamentos) + 1})
+            _mesclar(equipamento, dados, COLUNAS_EQUIPAMENTO)
+            equipamento["cliente_id"] = cliente["id"]
+            equipamento["atualizado_em"] = dados["data_iso"] or equipamento.get("atualizado_em")
+        vinculos.append((cliente["id"], equipamentos[chave_eq]["id"] if chave_eq else None, dados["rowid"]))
+
+    colunas = ["id", "chave", *COLUNAS_CLIENTE, "atualizado_em"]
+    conn.executemany(
+        f"INSERT INTO clientes ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+        [[cliente.get(coluna, chave if coluna == "chave" else None) for coluna in colunas]
+         for chave, cliente in clientes.items()]
+    )
+    colunas = ["id", "chave", "cliente_id", *COLUNAS_EQUIPAMENTO, "atualizado_em"]
+    conn.executemany(
+        f"INSERT INTO equipamentos ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+        [[equipamento.get(coluna, chave if coluna == "chave" else None) for coluna in colunas]
+         for chave, equipamento in equipamentos.items()]
+    )
+    conn.executemany("UPDATE os SET cliente_id = ?, equipamento_id = ? WHERE rowid = ?", vinculos)
+
+    # OS de um cliente ou equipamento, na ordem da lista
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_cliente_id ON os (cliente_id, data_iso, numero)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_equipamento_id ON os (equipamento_id, data_iso, numero)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_equipamentos_cliente ON equipamentos (cliente_id)")
+    return len(clientes), len(equipamentos)
+
+
+def _registrar(conn, tabela, chave, valores, data_iso):
+    """Cria o cadastro ou atualiza os campos preenchidos, se a OS não for mais antiga que ele"""
+    linha = conn.execute(f"SELECT id, atualizado_em FROM {tabela} WHERE chave = ?", (chave,)).fetchone()
+    if linha is None:
+        colunas = ["chave", *valores, "atualizado_em"]
+        return conn.execute(
+            f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+            [chave, *valores.values(), data_iso]
+        ).lastrowid
+    id_cadastro, atualizado_em = linha[0], linha[1]
+    if valores and (data_iso or "") >= (atualizado_em or ""):
+        conn.execute(
+            f"UPDATE {tabela} SET {', '.join(f'{coluna} = ?' for coluna in valores)}, atualizado_em = ? WHERE id = ?",
+            [*valores.values(), data_iso or atualizado_em, id_cadastro]
+        )
+    return id_cadastro
+
+
+def registrar_cadastros(conn, dados, data_iso):
+    """
+    Cadastra (ou atualiza) o cliente e o equipamento de uma OS nova.
+
+    Args:
+        conn: Conexão com o banco (dentro de uma transação de escrita)
+        dados (dict): Colunas da OS (ou RegistroOS)
+        data_iso (str): Data da OS (aaaa-mm-dd), para não deixar uma OS
+            antiga digitada depois sobrescrever contatos mais novos
+
+    Returns:
+        tuple: (cliente_id, equipamento_id); None onde não há cadastro
+    """
+    chave = chave_cliente(dados.get("cliente"))
+    if chave is None:
+        return None, None
+    valores = {}
+    _mesclar(valores, dados, COLUNAS_CLIENTE)
+    cliente_id = _registrar(conn, "clientes", chave, valores, data_iso)
+
+    chave = chave_equipamento(dados.get("numero_serie"), dados.get("patrimonio"), cliente_id)
+    if chave is None:
+        return cliente_id, None
+    valores = {"cliente_id": cliente_id}
+    _mesclar(valores, dados, COLUNAS_EQUIPAMENTO)
+    return cliente_id, _registrar(conn, "equipamentos", chave, valores, data_iso)
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    with repo.leitura() as conn:
+        total_os, sem_cliente, sem_equipamento = conn.execute(
+            "SELECT COUNT(*), COUNT(*) - COUNT(cliente_id), COUNT(*) - COUNT(equipamento_id) FROM os"
+        ).fetchone()
+        clientes = conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+        equipamentos = conn.execute("SELECT COUNT(*) FROM equipamentos").fetchone()[0]
+    print(f"{total_os} OS, {clientes} clientes e {equipamentos} equipamentos cadastrados.")
+    print(f"OS sem cliente: {sem_cliente}; sem equipamento identificado (série ou patrimônio): {sem_equipamento}")
@@ -0,0 +1,191 @@
+"""
+Registro dos documentos gerados para cada OS (tabela os_documentos).
+
+Cada gerador (planilhas, Word, Ziehm, interna, visita técnica, andamento)
+registra o arquivo que gravou, com tamanho, data de modificação e hash do
+conteúdo, pela chave (número da OS, tipo). Assim, encontrar o documento de uma
+OS é uma consulta pela chave primária em vez de listar uma pasta inteira do
+compartilhamento e comparar o início de cada nome (o que também confundia
+OS_25_01 com OS_25_010).
+
+Os caminhos dentro da pasta do sistema são gravados relativos à pasta do
+moraca.db, para continuarem válidos se o compartilhamento for montado em outra
+letra/pasta em outra estação.
+
+Documentos gerados antes do registro existir (ou copiados à mão para as
+pastas) entram no registro pela reconciliação, que varre as pastas técnicas:
+
+Uso:
+    python os_documentos.py --reconciliar
+"""
+
+import hashlib
+import os
+import re
+import sys
+
+from os_repositorio import obter_repositorio
+
+# Pasta dos documentos técnicos, relativa à pasta do sistema
+PASTA_TECNICO = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico")
+
+# Nome dos arquivos de cada tipo (ano e sequência do número da OS), por subpasta
+PADROES_DOCUMENTOS = {
+    "ziehm": ("andamento", re.compile(r"Ziehm_OS_(\d{2})_(\d+)_1\.xlsx")),
+    "andamento": ("andamento", re.compile(r"OS_OS_(\d{2})_(\d+)\.xlsx")),
+    "interna": ("interna", re.compile(r"OS_Interna_OS_(\d{2})_(\d+)\.xlsx")),
+    "visita": ("visitas", re.compile(r"OS_Visita_OS_(\d{2})_(\d+)\.xlsx")),
+    "visita_corretiva": ("visitas", re.compile(r"OS_Visita_Corretiva_OS_(\d{2})_(\d+)\.xlsx")),
+    "visita_tecnica": ("visitas", re.compile(r"OS_Visita_Tecnica_OS_(\d{2})_(\d+)\.xlsx")),
+    "preventiva": ("preventivas", re.compile(r"OS_Preventiva_OS_(\d{2})_(\d+)\.xlsx")),
+}
+
+
+def _pasta_sistema(repo):
+    """Pasta do moraca.db, base dos caminhos relativos do registro"""
+    return os.path.dirname(os.path.abspath(repo.caminho_banco))
+
+
+def _caminho_registro(caminho, repo):
+    """Caminho como gravado no registro (relativo à pasta do sistema, com '/')"""
+    caminho = os.path.abspath(caminho)
+    base = _pasta_sistema(repo)
+    try:
+        if os.path.commonpath([caminho, base]) == base:
+            return os.path.relpath(caminho, base).replace(os.sep, "/")
+    except ValueError:
+        pass  # Windows: unidades diferentes
+    return caminho
+
+
+def _caminho_real(caminho, repo):
+    """Converte o caminho gravado no registro para um caminho local"""
+    if os.path.isabs(caminho):
+        return caminho
+    return os.path.join(_pasta_sistema(repo), *caminho.split("/"))
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo"""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def registrar_arquivo(numero, tipo, caminho, dados=None, repo=None):
+    """
+    Registra o documento gravado para a OS.
+
+    Uma falha ao registrar não desfaz a geração do documento: o arquivo já
+    está gravado e a reconciliação o encontra depois.
+
+    Args:
+        numero (str): Número da OS (ex: "OS25018")
+        tipo (str): Tipo do documento (ex: "ziehm", "interna", "planilha")
+        caminho (str): Arquivo gravado
+        dados (bytes, optional): Conteúdo gravado, para não reler o arquivo
+        repo (RepositorioOS, optional): Repositório; se None, usa o padrão
+    """
+    try:
+        repo = repo or obter_repositorio()
+        info = os.stat(caminho)
+        sha256 = hashlib.sha256(dados).hexdigest() if dados is not None else hash_arquivo(caminho)
+        repo.registrar_documentos([
+            (numero, tipo, _caminho_registro(caminho, repo), info.st_size, info.st_mtime, sha256)
+        ])
+    except Exception as e:
+        print(f"Não foi possível registrar o documento {tipo} da OS {numero}: {e}")
+
+
+def caminho_documento(numero, tipo, repo=None):
+    """
+    Caminho registrado do documento de um tipo para a OS.
+
+    Args:
+        numero (str): Número da OS (ex: "OS25018")
+        tipo (str): Tipo do documento
+        repo (RepositorioOS, optional): Repositório; se None, usa o padrão
+
+    Returns:
+        str: Caminho do arquivo, ou None se não houver registro
+    """
+    repo = repo or obter_repositorio()
+    registro = repo.obter_documento(numero, tipo)
+    if registro is None:
+        return None
+    return _caminho_real(registro["caminho"], repo)
+
+
+def reconciliar_documentos(repo=None):
+    """
+    Atualiza o registro a partir dos arquivos das pastas técnicas.
+
+    Arquivos novos ou alterados (tamanho/data diferentes do registro) são
+    registrados, e o hash só é recalculado para eles. Registros de arquivos
+    que não existem mais são removidos.
+
+    Args:
+        repo (RepositorioOS, optional): Repositório; se None, usa o padrão
+
+    Returns:
+        tuple: (arquivos registrados ou atualizados, registros removidos)
+    """
+    repo = repo or obter_repositorio()
+    base = _pasta_sistema(repo)
+    existentes = {(row["numero"], row["tipo"]): row for row in repo.listar_documentos()}
+
+    # Agrupar os padrões por pasta, para listar cada pasta uma única vez
+    padroes_por_pasta = {}
+    for tipo, (subpasta, padrao) in PADROES_DOCUMENTOS.items():
+        padroes_por_pasta.setdefault(subpasta, []).append((tipo, padrao))
+
+    novos = []
+    encontrados = set()
+    for subpasta, padroes in padroes_por_pasta.items():
+        pasta = os.path.join(base, PASTA_TECNICO, subpasta)
+        if not os.path.isdir(pasta):
+            continue
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                for tipo, padrao in padroes:
+                    match = padrao.fullmatch(entrada.name)
+                    if not match:
+                        continue
+                    chave = (f"OS{match.group(1)}{match.group(2)}", tipo)
+                    encontrados.add(chave)
+                    info = entrada.stat()
+                    caminho = _caminho_registro(entrada.path, repo)
+                    atual = existentes.get(chave)
+                    if (atual is not None and atual["caminho"] == caminho
+                            and atual["tamanho"] == info.st_size and atual["mtime"] == info.st_mtime):
+                        break
+                    novos.append((chave[0], tipo, caminho, info.st_size, info.st_mtime, hash_arquivo(entrada.path)))
+                    break
+
+    # Registros fora das pastas técnicas (ex: gerados com outra pasta de destino)
+    # continuam válidos enquanto o arquivo existir
+    removidos = [
+        chave for chave, row in existentes.items()
+        if chave not in encontrados and not os.path.exists(_caminho_real(row["caminho"], repo))
+    ]
+
+    if novos:
+        repo.registrar_documentos(novos)
+    if removidos:
+        repo.remover_documentos(removidos)
+    return len(novos), len(removidos)
+
+
+if __name__ == "__main__":
+    if "--reconciliar" in sys.argv:
+        repo = obter_repositorio()
+        repo.criar_esquema()
+        atualizados, removidos = reconciliar_documentos(repo)
+        print(f"Registro de documentos atualizado: {atualizados} arquivo(s) registrado(s), "
+              f"{removidos} registro(s) removido(s)")
+    else:
+        print(__doc__)
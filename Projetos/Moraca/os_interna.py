@@ -1,107 +1,28 @@
 import os
-import re
-import sqlite3
 import openpyxl
 from datetime import datetime
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image
+from numero_os import normalizar_numero_os
+from os_repositorio import obter_repositorio
+from modelos_planilha import preencher_modelo
+from pacote_documentos import gravar_documento, renderizar_xlsx
 
-def criar_os_interna(numero_os, pasta_destino=None):
+def _construir_os_interna(valores):
     """
-    Cria um arquivo Excel formatado para a OS Interna.
-    
+    Monta o layout da OS Interna (compilado uma vez por modelos_planilha).
+
     Args:
-        numero_os (str): Número da Ordem de Serviço
-        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
-    
+        valores (dict): Campos da OS (ou os marcadores, ao compilar o modelo)
+
     Returns:
-        str: Caminho completo do arquivo salvo
+        openpyxl.Workbook: Planilha com o layout e os valores
     """
-    print(f"Iniciando criação de OS Interna para número: '{numero_os}'")
-    
-    # Formatação do número da OS (se ainda não estiver no formato padrão)
-    if not numero_os.startswith("OS "):
-        numeros = re.findall(r'\d+', numero_os)
-        
-        if numeros:
-            numero_completo = ''.join(numeros)
-            if len(numero_completo) >= 5:
-                ano = numero_completo[:2]
-                sequencia = numero_completo[-3:].zfill(3)  # Garantir 3 dígitos
-            else:
-                ano = datetime.now().strftime("%y")
-                sequencia = numero_completo.zfill(3)  # Garantir 3 dígitos
-                
-            numero_os_formatado = f"OS {ano} {sequencia}"
-        else:
-            ano = datetime.now().strftime("%y")
-            numero_os_formatado = f"OS {ano} 001"
-    else:
-        numero_os_formatado = numero_os
-    
-    # Formatos alternativos para consulta no banco
-    numero_os_sem_espacos = numero_os_formatado.replace(" ", "")  # OSxxyyy
-    numero_os_original = numero_os
-            
-    print(f"Número formatado: '{numero_os_formatado}'")
-    print(f"Número sem espaços: '{numero_os_sem_espacos}'")
-            
-    # Definir pasta de destino padrão se não for fornecida
-    if pasta_destino is None:
-        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "interna")
-    
-    # Criar diretórios se não existirem
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
-        
-    # Criar nome de arquivo baseado no número da OS formatado
-    numero_os_limpo = numero_os_formatado.replace(" ", "_").replace("/", "-").replace("-", "_")
-    nome_arquivo = f"OS_Interna_{numero_os_limpo}.xlsx"
-    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-    
-    # Verificar se o arquivo já existe
-    if os.path.exists(caminho_arquivo):
-        print(f"Arquivo já existe em: {caminho_arquivo}")
-        return caminho_arquivo
-        
-    # Buscar informações da OS do banco de dados
-    conn = sqlite3.connect('moraca.db')
-    conn.row_factory = sqlite3.Row  # Para acessar as colunas pelo nome
-    c = conn.cursor()
-    
-    # Tentar diferentes formatos para encontrar a OS no banco
-    print(f"Buscando OS no banco de dados...")
-    formatos_para_testar = [
-        numero_os_formatado,  # "OS xx yyy"
-        numero_os_sem_espacos,  # "OSxxttt"
-        numero_os_original,  # formato original passado para a função
-    ]
-    
-    os_data = None
-    
-    for formato in formatos_para_testar:
-        print(f"Tentando consulta com formato: '{formato}'")
-        c.execute("SELECT * FROM os WHERE numero = ?", (formato,))
-        os_data = c.fetchone()
-        if os_data:
-            print(f"OS encontrada com formato: '{formato}'")
-            break
-    
-    if not os_data:
-        print(f"OS não encontrada. Listando algumas OS disponíveis:")
-        c.execute("SELECT numero FROM os LIMIT 5")
-        os_disponiveis = c.fetchall()
-        for os_disp in os_disponiveis:
-            print(f"  - {os_disp[0]}")
-        
-        conn.close()
-        return None
-    
     # Criar uma nova planilha
     wb = openpyxl.Workbook()
     ws = wb.active
-    ws.title = f"OS {numero_os_formatado}"
+    ws.title = f"OS {valores['numero_os_formatado']}"
     
     # Definir estilos
     titulo_font = Font(name='Arial', size=16, bold=True)
@@ -147,12 +68,7 @@ def criar_os_interna(numero_os, pasta_destino=None):
     ws['A1'].alignment = left_align
     
     # Número da OS formatado com o padrão correto (ex: OS25102)
-    # Extrair o número formatado da OS
-    if numero_os_sem_espacos.startswith("OS"):
-        ws['A2'] = numero_os_sem_espacos  # Usar o formato OSxxxxx
-    else:
-        # Se não tiver o formato esperado, usar o número original
-        ws['A2'] = numero_os
+    ws['A2'] = valores['numero_os']
     ws['A2'].font = titulo_font
     ws['A2'].alignment = left_align
     
@@ -175,9 +91,8 @@ def criar_os_interna(numero_os, pasta_destino=None):
     ws['A4'].alignment = right_align
     
     # Valor cliente
-    cliente = os_data['cliente'] if os_data['cliente'] is not None else ''
     ws.merge_cells('B4:E4')
-    ws['B4'] = cliente
+    ws['B4'] = valores['cliente']
     ws['B4'].font = normal_font
     ws['B4'].alignment = left_align
     
@@ -188,9 +103,8 @@ def criar_os_interna(numero_os, pasta_destino=None):
     ws['A5'].alignment = right_align
     
     # Valor equipamento
-    equipamento = os_data['maquina'] if os_data['maquina'] is not None else ''
     ws.merge_cells('B5:E5')
-    ws['B5'] = equipamento
+    ws['B5'] = valores['equipamento']
     ws['B5'].font = normal_font
     ws['B5'].alignment = left_align
     
@@ -201,9 +115,8 @@ def criar_os_interna(numero_os, pasta_destino=None):
     ws['A6'].alignment = right_align
     
     # Valor número de série
-    numero_serie = os_data['numero_serie'] if os_data['numero_serie'] is not None else ''
     ws.merge_cells('B6:E6')
-    ws['B6'] = numero_serie
+    ws['B6'] = valores['numero_serie']
     ws['B6'].font = normal_font
     ws['B6'].alignment = left_align
     
@@ -214,9 +127,8 @@ def criar_os_interna(numero_os, pasta_destino=None):
     ws['A7'].alignment = right_align
     
     # Valor data
-    data = os_data['data'] if os_data['data'] is not None else datetime.now().strftime("%d/%m/%Y")
     ws.merge_cells('B7:E7')
-    ws['B7'] = data
+    ws['B7'] = valores['data']
     ws['B7'].font = normal_font
     ws['B7'].alignment = left_align
     
@@ -228,7 +140,7 @@ def criar_os_interna(numero_os, pasta_destino=None):
     
     # Valor horário
     ws.merge_cells('B8:E8')
-    ws['B8'] = datetime.now().strftime("%H:%M")  # Hora atual
+    ws['B8'] = valores['horario']
     ws['B8'].font = normal_font
     ws['B8'].alignment = left_align
     
@@ -381,15 +293,98 @@ def criar_os_interna(numero_os, pasta_destino=None):
     for row in range(2, 36):
         ws[f'E{row}'].border = Border(right=Side(style='thin'))
     
+    return wb
+
+
+# Colunas da OS usadas na OS Interna
+COLUNAS_INTERNA = ("numero", "cliente", "maquina", "numero_serie", "data")
+
+
+def caminho_os_interna(numero_os, pasta_destino=None):
+    """
+    Caminho do arquivo da OS Interna (cria a pasta se necessário).
+
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Pasta do arquivo. Se None, usa o caminho padrão.
+
+    Returns:
+        str: Caminho completo do arquivo
+    """
+    numero = normalizar_numero_os(numero_os)
+
+    # Definir pasta de destino padrão se não for fornecida
+    if pasta_destino is None:
+        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "interna")
+    
+    # Criar diretórios se não existirem
+    if not os.path.exists(pasta_destino):
+        os.makedirs(pasta_destino)
+        
+    nome_arquivo = f"OS_Interna_{numero.nome_arquivo}.xlsx"
+    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
+    return caminho_arquivo
+
+
+def criar_os_interna(numero_os, pasta_destino=None):
+    """
+    Cria um arquivo Excel formatado para a OS Interna.
+    
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
+    
+    Returns:
+        str: Caminho completo do arquivo salvo
+    """
+    print(f"Iniciando criação de OS Interna para número: '{numero_os}'")
+    
+    numero = normalizar_numero_os(numero_os)
+    numero_os_formatado = numero.formatado
+    print(f"Número formatado: '{numero_os_formatado}'")
+            
+    caminho_arquivo = caminho_os_interna(numero_os, pasta_destino)
+    
+    # Verificar se o arquivo já existe
+    if os.path.exists(caminho_arquivo):
+        print(f"Arquivo já existe em: {caminho_arquivo}")
+        return caminho_arquivo
+        
+    # Buscar informações da OS do banco de dados (acesso pelo nome da coluna)
+    repo = obter_repositorio()
+    
+    # Busca pela chave canônica, em qualquer grafia do número
+    print(f"Buscando OS no banco de dados...")
+    os_data = repo.obter_os_por_chave(numero_os, COLUNAS_INTERNA)
+    
+    if not os_data:
+        print(f"OS não encontrada. Listando algumas OS disponíveis:")
+        for os_disp in repo.listar_numeros(5):
+            print(f"  - {os_disp}")
+        
+        return None
+    
+    print(f"OS encontrada com número: '{os_data['numero']}'")
+    
+    # Valores desta OS; o layout vem do modelo compilado
+    valores = {
+        'numero_os_formatado': numero_os_formatado,
+        'numero_os': numero.chave,
+        'cliente': os_data['cliente'] if os_data['cliente'] is not None else '',
+        'equipamento': os_data['maquina'] if os_data['maquina'] is not None else '',
+        'numero_serie': os_data['numero_serie'] if os_data['numero_serie'] is not None else '',
+        'data': os_data['data'] if os_data['data'] is not None else datetime.now().strftime("%d/%m/%Y"),
+        'horario': datetime.now().strftime("%H:%M"),  # Hora atual
+    }
+    wb = preencher_modelo("os_interna", _construir_os_interna, valores)
+    
     # Salvar o arquivo
     try:
-        wb.save(caminho_arquivo)
+        gravar_documento(renderizar_xlsx(wb), [caminho_arquivo], (numero.chave, "interna"))
         print(f"OS Interna salva com sucesso em: {caminho_arquivo}")
-        conn.close()
         return caminho_arquivo
     except Exception as e:
         print(f"Erro ao salvar arquivo: {e}")
-        conn.close()
         return None
 
 # Para testes
@@ -397,6 +392,8 @@ if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
         numero_os = sys.argv[1]
+        # Banco ainda não migrado (ex: sem a coluna numero_key usada na busca da OS)
+        obter_repositorio().criar_esquema()
         print(f"Criando OS Interna para número: {numero_os}")
         caminho = criar_os_interna(numero_os)
         print(f"Arquivo salvo em: {caminho}")
@@ -3,9 +3,11 @@ from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, Color
 from openpyxl.utils import get_column_letter
 import os
 from datetime import datetime
-import re
 import locale
 from openpyxl.drawing.image import Image as XLImage
+from modelos_planilha import preencher_modelo
+from numero_os import normalizar_numero_os
+from pacote_documentos import gravar_documento, renderizar_xlsx
 
 # Configurar o locale para português do Brasil
 try:
@@ -50,63 +52,16 @@ def formatar_data_pt_br(data):
     
     return f"{dia_semana}, {dia} de {mes} de {ano}"
 
-def criar_os_interna_andamento(numero_os, pasta_destino=None):
+def _construir_os_interna_andamento(valores):
     """
-    Cria um arquivo Excel com duas planilhas para a OS interna de andamento.
-    
+    Monta o layout da OS interna de andamento (compilado uma vez por modelos_planilha).
+
     Args:
-        numero_os (str): Número da Ordem de Serviço
-        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
-    
+        valores (dict): Campos da OS (ou os marcadores, ao compilar o modelo)
+
     Returns:
-        str: Caminho completo do arquivo salvo
+        openpyxl.Workbook: Planilha com o layout e os valores
     """
-    # Formatação do número da OS (se ainda não estiver no formato padrão)
-    if not numero_os.startswith("OS "):
-        # Extrair os números do string, caso seja algo como "OSI252" ou outro formato
-        numeros = re.findall(r'\d+', numero_os)
-        
-        if numeros:
-            numero_completo = ''.join(numeros)
-            # Se tiver 5 dígitos ou mais, assumimos que os 2 primeiros são do ano
-            if len(numero_completo) >= 5:
-                ano = numero_completo[:2]
-                sequencia = numero_completo[-3:].zfill(3)  # Garantir 3 dígitos, preenchendo com zeros
-            else:
-                # Caso não tenha dígitos suficientes, usar o ano atual
-                ano = datetime.now().strftime("%y")
-                sequencia = numero_completo.zfill(3)  # Garantir 3 dígitos
-                
-            # Formatar no padrão correto
-            numero_os_formatado = f"OS {ano} {sequencia}"
-        else:
-            # Se não tiver números, criar um padrão com o ano atual e sequência 001
-            ano = datetime.now().strftime("%y")
-            numero_os_formatado = f"OS {ano} 001"
-    else:
-        numero_os_formatado = numero_os
-            
-    # Definir pasta de destino padrão se não for fornecida
-    if pasta_destino is None:
-        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "andamento")
-    
-    # Criar diretórios se não existirem
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
-        
-    # Criar nome de arquivo baseado no número da OS formatado
-    numero_os_limpo = numero_os_formatado.replace(" ", "_").replace("/", "-").replace("-", "_")
-    nome_arquivo = f"OS_{numero_os_limpo}.xlsx"
-    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-    
-    # Verificar se o arquivo já existe
-    if os.path.exists(caminho_arquivo):
-        print(f"Arquivo já existe em: {caminho_arquivo}")
-        return caminho_arquivo
-        
-    # Se não existe, criar um novo arquivo
-    print(f"Criando novo arquivo em: {caminho_arquivo}")
-    
     # Criar uma nova planilha
     wb = openpyxl.Workbook()
     
@@ -150,7 +105,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Título O.S.I.
     ws1.merge_cells('A1:E1')
-    ws1['A1'] = f"O.S.I. {numero_os_formatado}"
+    ws1['A1'] = f"O.S.I. {valores['numero_os_formatado']}"
     ws1['A1'].font = titulo_font
     ws1['A1'].alignment = left_align
     
@@ -202,7 +157,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     ws1['D51'].alignment = center_align
     
     # Data no rodapé
-    data_atual = datetime.now().strftime("%d/%m")
+    data_atual = valores['dia_mes']
     ws1['F51'] = data_atual
     ws1['F51'].font = normal_font
     ws1['F51'].alignment = right_align = Alignment(horizontal='right')
@@ -226,9 +181,9 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Configurar cabeçalho e rodapé
     ws1.oddHeader.left.text = "OS Interna - Andamento"
-    ws1.oddHeader.right.text = f"OS: {numero_os_formatado}"
+    ws1.oddHeader.right.text = f"OS: {valores['numero_os_formatado']}"
     ws1.oddFooter.right.text = "Página &P de &N"
-    ws1.oddFooter.left.text = datetime.now().strftime("%d/%m/%Y")
+    ws1.oddFooter.left.text = valores['data_atual']
     
     # ============== PÁGINA 2: DETALHES ==============
     ws2 = wb.create_sheet("Detalhes")
@@ -242,7 +197,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Título O.S.I.
     ws2.merge_cells('A1:E1')
-    ws2['A1'] = f"O.S.I. {numero_os_formatado}"
+    ws2['A1'] = f"O.S.I. {valores['numero_os_formatado']}"
     ws2['A1'].font = titulo_font
     ws2['A1'].alignment = left_align
     
@@ -337,7 +292,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
         ws2[f'A{row}'].border = thin_border
     
     # Data no rodapé
-    data_atual = datetime.now().strftime("%d/%m")
+    data_atual = valores['dia_mes']
     ws2['E37'] = data_atual
     ws2['E37'].font = normal_font
     ws2['E37'].alignment = right_align
@@ -361,9 +316,9 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Configurar cabeçalho e rodapé
     ws2.oddHeader.left.text = "OS Interna - Detalhes"
-    ws2.oddHeader.right.text = f"OS: {numero_os_formatado}"
+    ws2.oddHeader.right.text = f"OS: {valores['numero_os_formatado']}"
     ws2.oddFooter.right.text = "Página &P de &N"
-    ws2.oddFooter.left.text = datetime.now().strftime("%d/%m/%Y")
+    ws2.oddFooter.left.text = valores['data_atual']
     
     # ============== PÁGINA 3: MATERIAIS E PEÇAS ==============
     ws3 = wb.create_sheet("Materiais")
@@ -377,7 +332,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Título O.S.I.
     ws3.merge_cells('A1:E1')
-    ws3['A1'] = f"O.S.I. {numero_os_formatado} - MATERIAIS E PEÇAS"
+    ws3['A1'] = f"O.S.I. {valores['numero_os_formatado']} - MATERIAIS E PEÇAS"
     ws3['A1'].font = titulo_font
     ws3['A1'].alignment = left_align
     
@@ -447,7 +402,7 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
         ws3[f'A{idx}'].border = thin_border
     
     # Data no rodapé
-    data_atual = datetime.now().strftime("%d/%m")
+    data_atual = valores['dia_mes']
     ws3['E37'] = data_atual
     ws3['E37'].font = normal_font
     ws3['E37'].alignment = right_align
@@ -471,64 +426,26 @@ def criar_os_interna_andamento(numero_os, pasta_destino=None):
     
     # Configurar cabeçalho e rodapé
     ws3.oddHeader.left.text = "OS Interna - Materiais e Peças"
-    ws3.oddHeader.right.text = f"OS: {numero_os_formatado}"
+    ws3.oddHeader.right.text = f"OS: {valores['numero_os_formatado']}"
     ws3.oddFooter.right.text = "Página &P de &N"
-    ws3.oddFooter.left.text = datetime.now().strftime("%d/%m/%Y")
+    ws3.oddFooter.left.text = valores['data_atual']
     
-    # Salvar arquivo
-    wb.save(caminho_arquivo)
-    
-    print(f"Arquivo salvo com sucesso em: {caminho_arquivo}")
-    return caminho_arquivo
+    return wb
 
-def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
+
+def caminho_os_interna_andamento(numero_os, pasta_destino=None):
     """
-    Cria um arquivo Excel no formato da ZIEHM.
-    
+    Caminho do arquivo da OS interna de andamento (cria a pasta se necessário).
+
     Args:
         numero_os (str): Número da Ordem de Serviço
-        dados_cliente (dict, optional): Dicionário com dados do cliente
-        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
-    
+        pasta_destino (str, optional): Pasta do arquivo. Se None, usa o caminho padrão.
+
     Returns:
-        str: Caminho completo do arquivo salvo
+        str: Caminho completo do arquivo
     """
-    # Formatação do número da OS (se ainda não estiver no formato padrão)
-    if not numero_os.startswith("OS "):
-        # Extrair os números do string, caso seja algo como "OSI252" ou outro formato
-        numeros = re.findall(r'\d+', numero_os)
-        
-        if numeros:
-            numero_completo = ''.join(numeros)
-            # Se tiver 5 dígitos ou mais, assumimos que os 2 primeiros são do ano
-            if len(numero_completo) >= 5:
-                ano = numero_completo[:2]
-                sequencia = numero_completo[-3:].zfill(3)  # Garantir 3 dígitos, preenchendo com zeros
-            else:
-                # Caso não tenha dígitos suficientes, usar o ano atual
-                ano = datetime.now().strftime("%y")
-                sequencia = numero_completo.zfill(3)  # Garantir 3 dígitos
-                
-            # Formatar no padrão correto
-            numero_os_formatado = f"{ano}-{sequencia}-1"  # Formato Ziehm: 25-082-1
-        else:
-            # Se não tiver números, criar um padrão com o ano atual e sequência 001
-            ano = datetime.now().strftime("%y")
-            sequencia = "001"
-            numero_os_formatado = f"{ano}-{sequencia}-1"
-    else:
-        # Extrair os números e reformatar para padrão Ziehm
-        numeros = re.findall(r'\d+', numero_os)
-        if len(numeros) >= 2:
-            ano = numeros[0]
-            sequencia = numeros[1].zfill(3)
-            numero_os_formatado = f"{ano}-{sequencia}-1"
-        else:
-            # Caso não consiga extrair corretamente, usar o formato padrão
-            ano = datetime.now().strftime("%y")
-            sequencia = "001"
-            numero_os_formatado = f"{ano}-{sequencia}-1"
-            
+    numero = normalizar_numero_os(numero_os)
+
     # Definir pasta de destino padrão se não for fornecida
     if pasta_destino is None:
         pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "andamento")
@@ -537,20 +454,85 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     if not os.path.exists(pasta_destino):
         os.makedirs(pasta_destino)
         
-    # Converter o número da OS para formato usado no arquivo
-    # Usar formato sem hífens para nome de arquivo
-    numero_os_limpo = numero_os_formatado.replace(" ", "_").replace("/", "-").replace("-", "_")
-    nome_arquivo = f"Ziehm_OS_{numero_os_limpo}.xlsx"
+    nome_arquivo = f"OS_{numero.nome_arquivo}.xlsx"
     caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
+    return caminho_arquivo
+
+
+def criar_os_interna_andamento(numero_os, pasta_destino=None):
+    """
+    Cria um arquivo Excel com duas planilhas para a OS interna de andamento.
+    
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
+    
+    Returns:
+        str: Caminho completo do arquivo salvo
+    """
+    numero = normalizar_numero_os(numero_os)
+    
+    caminho_arquivo = caminho_os_interna_andamento(numero_os, pasta_destino)
     
     # Verificar se o arquivo já existe
     if os.path.exists(caminho_arquivo):
-        print(f"Arquivo Ziehm já existe em: {caminho_arquivo}")
+        print(f"Arquivo já existe em: {caminho_arquivo}")
         return caminho_arquivo
         
     # Se não existe, criar um novo arquivo
-    print(f"Criando novo arquivo Ziehm em: {caminho_arquivo}")
+    print(f"Criando novo arquivo em: {caminho_arquivo}")
+    
+    # Valores desta OS; o layout vem do modelo compilado
+    valores = {
+        'numero_os_formatado': numero.formatado,
+        'dia_mes': datetime.now().strftime("%d/%m"),
+        'data_atual': datetime.now().strftime("%d/%m/%Y"),
+    }
+    wb = preencher_modelo("os_interna_andamento", _construir_os_interna_andamento, valores)
+    
+    # Salvar arquivo
+    gravar_documento(renderizar_xlsx(wb), [caminho_arquivo], (numero.chave, "andamento"))
     
+    print(f"Arquivo salvo com sucesso em: {caminho_arquivo}")
+    return caminho_arquivo
+
+def caminho_os_ziehm(numero_os, pasta_destino=None):
+    """
+    Caminho do arquivo Ziehm de uma OS (cria a pasta se necessário).
+
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Pasta do arquivo. Se None, usa o caminho padrão.
+
+    Returns:
+        str: Caminho completo do arquivo
+    """
+    numero = normalizar_numero_os(numero_os)
+
+    # Definir pasta de destino padrão se não for fornecida
+    if pasta_destino is None:
+        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "andamento")
+    
+    # Criar diretórios se não existirem
+    if not os.path.exists(pasta_destino):
+        os.makedirs(pasta_destino)
+        
+    # Formato Ziehm sem hífens no nome do arquivo (ex: Ziehm_OS_25_082_1.xlsx)
+    nome_arquivo = f"Ziehm_OS_{numero.ziehm.replace('-', '_')}.xlsx"
+    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
+    return caminho_arquivo
+
+
+def _construir_os_ziehm(valores):
+    """
+    Monta o layout da OS Ziehm (compilado uma vez por modelos_planilha).
+
+    Args:
+        valores (dict): Campos da OS (ou os marcadores, ao compilar o modelo)
+
+    Returns:
+        openpyxl.Workbook: Planilha com o layout e os valores
+    """
     # Criar uma nova planilha
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -664,7 +646,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     )
     
     # Referência no canto direito (célula I1)
-    ws['I1'] = f"Ref: ZM{ano}{sequencia}"
+    ws['I1'] = valores['referencia']
     ws['I1'].font = cabecalho_font
     ws['I1'].alignment = center_align
     
@@ -719,7 +701,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A7'].border = thin_border
     ws.merge_cells('A7:C7')
     
-    ws['D7'] = numero_os_formatado
+    ws['D7'] = valores['numero_os_formatado']
     ws['D7'].font = cabecalho_font
     ws['D7'].alignment = center_align
     ws['D7'].border = thin_border
@@ -737,15 +719,13 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
         ws.unmerge_cells(str(r))
     
     # Agora podemos atribuir o valor e depois mesclar
-    ws['G7'] = formatar_data_pt_br(datetime.now())
+    ws['G7'] = valores['data_extenso']
     ws['G7'].font = normal_font
     ws['G7'].alignment = center_align
     ws['G7'].border = thin_border
     ws.merge_cells('G7:I7')
     
     # Dados do cliente
-    dados_cliente = dados_cliente or {}
-    
     # Nome do Cliente
     ws['A9'] = "Nome do Cliente:"
     ws['A9'].font = cabecalho_font
@@ -754,7 +734,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws.merge_cells('A9:B9')
     
     # Primeiro atribuir o valor à célula C9, depois mesclar
-    ws['C9'] = dados_cliente.get('cliente', '')
+    ws['C9'] = valores['cliente']
     ws['C9'].font = normal_font
     ws['C9'].alignment = left_align
     ws['C9'].border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -767,7 +747,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A10'].border = Border(left=Side(style='thin'), right=Side(style='none'), top=Side(style='thin'), bottom=Side(style='thin'))
     ws.merge_cells('A10:B10')
     
-    ws['C10'] = dados_cliente.get('endereco', '')
+    ws['C10'] = valores['endereco']
     ws['C10'].font = normal_font
     ws['C10'].alignment = left_align
     ws['C10'].border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -780,7 +760,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A12'].border = Border(left=Side(style='thin'), right=Side(style='none'), top=Side(style='thin'), bottom=Side(style='thin'))
     ws.merge_cells('A12:B12')
     
-    ws['C12'] = dados_cliente.get('contato', '')
+    ws['C12'] = valores['contato']
     ws['C12'].font = normal_font
     ws['C12'].alignment = left_align
     ws['C12'].border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -793,17 +773,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A13'].border = Border(left=Side(style='thin'), right=Side(style='none'), top=Side(style='thin'), bottom=Side(style='thin'))
     ws.merge_cells('A13:B13')
     
-    telefone_completo = dados_cliente.get('telefone', '')
-    if dados_cliente.get('telefone1'):
-        if telefone_completo:
-            telefone_completo += " / "
-        telefone_completo += dados_cliente.get('telefone1')
-    if dados_cliente.get('telefone2'):
-        if telefone_completo:
-            telefone_completo += " / "
-        telefone_completo += dados_cliente.get('telefone2')
-    
-    ws['C13'] = telefone_completo
+    ws['C13'] = valores['telefone']
     ws['C13'].font = normal_font
     ws['C13'].alignment = left_align
     ws['C13'].border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -816,7 +786,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A14'].border = Border(left=Side(style='thin'), right=Side(style='none'), top=Side(style='thin'), bottom=Side(style='thin'))
     ws.merge_cells('A14:B14')
     
-    ws['C14'] = dados_cliente.get('equipamento', '')
+    ws['C14'] = valores['equipamento']
     ws['C14'].font = normal_font
     ws['C14'].alignment = left_align
     ws['C14'].border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
@@ -829,7 +799,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['A16'].border = thin_border
     ws.merge_cells('A16:C16')
     
-    ws['D16'] = dados_cliente.get('modelo', '')
+    ws['D16'] = valores['modelo']
     ws['D16'].font = normal_font
     ws['D16'].alignment = left_align
     ws['D16'].border = thin_border
@@ -842,7 +812,7 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws['F16'].border = thin_border
     ws.merge_cells('F16:G16')
     
-    ws['H16'] = dados_cliente.get('numero_serie', '')
+    ws['H16'] = valores['numero_serie']
     ws['H16'].font = normal_font
     ws['H16'].alignment = left_align
     ws['H16'].border = thin_border
@@ -934,14 +904,8 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
     ws.merge_cells('A32:B32')
     
     # Área para descrição dos serviços
-    # Adicionar a descrição do problema e serviço do formulário
-    descricao_completa = ""
-    if dados_cliente.get('descricao'):
-        descricao_completa += "Descrição do problema: " + dados_cliente.get('descricao') + "\n\n"
-    if dados_cliente.get('descricao_servico'):
-        descricao_completa += "Serviço a realizar: " + dados_cliente.get('descricao_servico')
-    
-    ws['A33'] = descricao_completa
+    # Descrição do problema e serviço do formulário
+    ws['A33'] = valores['descricao']
     ws['A33'].font = normal_font
     ws['A33'].alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
     ws['A33'].border = thin_border
@@ -1143,8 +1107,119 @@ def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
                 bottom=Side(style='thin')
             )
     
+    return wb
+
+
+# Colunas da OS usadas na planilha Ziehm (ver dados_cliente_ziehm)
+COLUNAS_ZIEHM = (
+    "numero", "cliente", "maquina", "numero_serie", "endereco", "contato_nome", "telefone",
+    "contato_telefone1", "contato_telefone2", "descricao", "descricao_servico"
+)
+
+
+def dados_cliente_ziehm(registro):
+    """
+    Converte uma OS do banco para os dados do cliente usados na planilha Ziehm.
+
+    Args:
+        registro: RegistroOS (ou dict) com as colunas de COLUNAS_ZIEHM
+
+    Returns:
+        dict: Dados no formato de montar_os_ziehm
+    """
+    def valor(coluna):
+        return registro.get(coluna) or ''
+
+    return {
+        'cliente': valor('cliente'),
+        'equipamento': valor('maquina'),
+        'modelo': valor('maquina'),
+        'numero_serie': valor('numero_serie'),
+        'endereco': valor('endereco'),
+        'contato': valor('contato_nome'),
+        'telefone': valor('telefone'),
+        'telefone1': valor('contato_telefone1'),
+        'telefone2': valor('contato_telefone2'),
+        'descricao': valor('descricao'),
+        'descricao_servico': valor('descricao_servico'),
+    }
+
+
+def montar_os_ziehm(numero_os, dados_cliente=None):
+    """
+    Monta a planilha no formato da ZIEHM (sem gravar em disco).
+
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        dados_cliente (dict, optional): Dicionário com dados do cliente
+
+    Returns:
+        openpyxl.Workbook: Planilha preenchida
+    """
+    numero = normalizar_numero_os(numero_os)
+
+    dados_cliente = dados_cliente or {}
+    
+    telefone_completo = dados_cliente.get('telefone', '')
+    if dados_cliente.get('telefone1'):
+        if telefone_completo:
+            telefone_completo += " / "
+        telefone_completo += dados_cliente.get('telefone1')
+    if dados_cliente.get('telefone2'):
+        if telefone_completo:
+            telefone_completo += " / "
+        telefone_completo += dados_cliente.get('telefone2')
+    
+    # Descrição do problema e serviço do formulário
+    descricao_completa = ""
+    if dados_cliente.get('descricao'):
+        descricao_completa += "Descrição do problema: " + dados_cliente.get('descricao') + "\n\n"
+    if dados_cliente.get('descricao_servico'):
+        descricao_completa += "Serviço a realizar: " + dados_cliente.get('descricao_servico')
+    
+    # Valores desta OS; o layout vem do modelo compilado
+    valores = {
+        'referencia': f"Ref: ZM{numero.ano}{numero.sequencia}",
+        'numero_os_formatado': numero.ziehm,
+        'data_extenso': formatar_data_pt_br(datetime.now()),
+        'cliente': dados_cliente.get('cliente', ''),
+        'endereco': dados_cliente.get('endereco', ''),
+        'contato': dados_cliente.get('contato', ''),
+        'telefone': telefone_completo,
+        'equipamento': dados_cliente.get('equipamento', ''),
+        'modelo': dados_cliente.get('modelo', ''),
+        'numero_serie': dados_cliente.get('numero_serie', ''),
+        'descricao': descricao_completa,
+    }
+    return preencher_modelo("ziehm", _construir_os_ziehm, valores)
+
+
+def criar_os_ziehm(numero_os, dados_cliente=None, pasta_destino=None):
+    """
+    Cria um arquivo Excel no formato da ZIEHM.
+    
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        dados_cliente (dict, optional): Dicionário com dados do cliente
+        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
+    
+    Returns:
+        str: Caminho completo do arquivo salvo
+    """
+    caminho_arquivo = caminho_os_ziehm(numero_os, pasta_destino)
+    
+    # Verificar se o arquivo já existe
+    if os.path.exists(caminho_arquivo):
+        print(f"Arquivo Ziehm já existe em: {caminho_arquivo}")
+        return caminho_arquivo
+        
+    # Se não existe, criar um novo arquivo
+    print(f"Criando novo arquivo Ziehm em: {caminho_arquivo}")
+    wb = montar_os_ziehm(numero_os, dados_cliente)
+    
     # Salvar arquivo
-    wb.save(caminho_arquivo)
+    numero = normalizar_numero_os(numero_os)
+    gravar_documento(renderizar_xlsx(wb), [caminho_arquivo], (numero.chave, "ziehm"))
     
     print(f"Arquivo OS Ziehm salvo com sucesso em: {caminho_arquivo}")
     return caminho_arquivo
@@ -0,0 +1,263 @@
+"""
+Migrações versionadas do banco de OS.
+
+A versão do esquema fica gravada no próprio arquivo (PRAGMA user_version).
+Cada migração roda uma única vez, dentro da sua própria transação, e depois
+disso a inicialização do sistema só precisa ler a versão para saber que o
+banco está atualizado.
+
+Para alterar o esquema, acrescente uma nova função ao final de MIGRACOES;
+nunca altere uma migração que já foi distribuída.
+"""
+
+import sqlite3
+
+from os_busca import criar_indice_busca
+from os_cadastros import criar_cadastros
+from os_trigramas import criar_indice_trigramas
+
+
+def _migracao_tabela_os(conn):
+    """Tabela os original, incluindo as colunas que bancos antigos não têm"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS os
+                (numero TEXT PRIMARY KEY,
+                 cliente TEXT,
+                 maquina TEXT,
+                 descricao TEXT,
+                 urgencia TEXT,
+                 data TEXT,
+                 status TEXT,
+                 tipo TEXT,
+                 patrimonio TEXT,
+                 numero_serie TEXT,
+                 local TEXT,
+                 endereco TEXT,
+                 cidade TEXT,
+                 telefone TEXT,
+                 cep TEXT,
+                 contato_nome TEXT,
+                 contato_telefone1 TEXT,
+                 contato_telefone2 TEXT,
+                 descricao_servico TEXT,
+                 necessita_viagem TEXT,
+                 tipo_hospedagem TEXT,
+                 prazo_entrega TEXT,
+                 empresa TEXT)''')
+
+    # Bancos criados por versões antigas não têm 'cidade' nem 'empresa'
+    colunas = _colunas(conn, "os")
+    for coluna in ("cidade", "empresa"):
+        if coluna not in colunas:
+            conn.execute(f"ALTER TABLE os ADD COLUMN {coluna} TEXT")
+
+
+def _migracao_sequencia(conn):
+    """Último número de OS usado em cada ano"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_sequencia
+                (ano TEXT PRIMARY KEY,
+                 ultimo INTEGER NOT NULL)''')
+
+
+def _migracao_busca(conn):
+    """Índice de texto completo usado pela pesquisa"""
+    criar_indice_busca(conn)
+
+
+def _migracao_data_iso(conn):
+    """Data normalizada (aaaa-mm-dd) e índices das listagens"""
+    from os_repositorio import normalizar_data
+
+    if "data_iso" not in _colunas(conn, "os"):
+        conn.execute("ALTER TABLE os ADD COLUMN data_iso TEXT")
+
+    linhas = conn.execute("SELECT rowid, data FROM os WHERE data_iso IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE os SET data_iso = ? WHERE rowid = ?",
+        [(normalizar_data(linha[1]), linha[0]) for linha in linhas]
+    )
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_data_iso ON os (data_iso, numero)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_status_data_iso ON os (status, data_iso)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_cliente ON os (cliente)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_empresa ON os (empresa)")
+
+
+def _migracao_documentos(conn):
+    """Registro dos documentos gerados para cada OS (ver os_documentos.py)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_documentos
+                (numero TEXT NOT NULL,
+                 tipo TEXT NOT NULL,
+                 caminho TEXT NOT NULL,
+                 tamanho INTEGER,
+                 mtime REAL,
+                 sha256 TEXT,
+                 PRIMARY KEY (numero, tipo))''')
+
+
+def _migracao_pasta(conn):
+    """Pasta de documentos de cada OS (preenchida na primeira consulta, ver pastas_os.py)"""
+    if "pasta" not in _colunas(conn, "os"):
+        conn.execute("ALTER TABLE os ADD COLUMN pasta TEXT")
+
+
+def _migracao_movimentacoes(conn):
+    """Diário das movimentações de pasta (ver pastas_os.executar_movimentacao)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_movimentacoes
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 numero TEXT NOT NULL,
+                 origem TEXT NOT NULL,
+                 destino TEXT NOT NULL,
+                 estado TEXT NOT NULL DEFAULT 'pendente',
+                 criada_em TEXT,
+                 erro TEXT)''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_movimentacoes_estado ON os_movimentacoes (estado)")
+
+
+def _expressao_numero_key(coluna):
+    """Chave canônica do número em SQL (ex: "OS 25 007" -> "OS25007"), igual a NumeroOS.chave"""
+    return f"'OS' || replace(replace(replace(upper(trim({coluna})), 'OS', ''), ' ', ''), '-', '')"
+
+
+def _migracao_numero_key(conn):
+    """Chave canônica do número (ver numero_os.py), indexada para a busca por qualquer grafia"""
+    if "numero_key" not in [info[1] for info in conn.execute("PRAGMA table_xinfo(os)")]:
+        if sqlite3.sqlite_version_info >= (3, 31, 0):
+            conn.execute(f"ALTER TABLE os ADD COLUMN numero_key TEXT "
+                         f"GENERATED ALWAYS AS ({_expressao_numero_key('numero')}) VIRTUAL")
+        else:
+            # SQLite sem colunas geradas: coluna comum mantida por gatilhos
+            conn.execute("ALTER TABLE os ADD COLUMN numero_key TEXT")
+            conn.execute(f"UPDATE os SET numero_key = {_expressao_numero_key('numero')}")
+            for evento in ("INSERT", "UPDATE OF numero"):
+                nome = "os_numero_key_" + evento.split()[0].lower()
+                conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {nome} AFTER {evento} ON os BEGIN
+                                 UPDATE os SET numero_key = {_expressao_numero_key('new.numero')}
+                                 WHERE rowid = new.rowid;
+                             END""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_numero_key ON os (numero_key)")
+
+
+def _migracao_alteracoes(conn):
+    """Registro das alterações na tabela os, lido pelas estações (ver monitor_alteracoes.py)"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_alteracoes
+                (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                 numero TEXT NOT NULL,
+                 em TEXT NOT NULL DEFAULT (datetime('now')))''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS os_alteracoes_insert AFTER INSERT ON os BEGIN
+                    INSERT INTO os_alteracoes (numero) VALUES (new.numero);
+                END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS os_alteracoes_delete AFTER DELETE ON os BEGIN
+                    INSERT INTO os_alteracoes (numero) VALUES (old.numero);
+                END''')
+    # Só as colunas exibidas na lista (gravar a pasta da OS não gera alteração)
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS os_alteracoes_update
+                AFTER UPDATE OF numero, cliente, data, status ON os BEGIN
+                    INSERT INTO os_alteracoes (numero) SELECT old.numero WHERE old.numero <> new.numero;
+                    INSERT INTO os_alteracoes (numero) VALUES (new.numero);
+                END''')
+
+
+def _migracao_filtros(conn):
+    """Prazo de entrega normalizado e índices compostos do painel de filtros (ver filtros_os.py)"""
+    from os_repositorio import normalizar_data
+
+    if "prazo_iso" not in _colunas(conn, "os"):
+        conn.execute("ALTER TABLE os ADD COLUMN prazo_iso TEXT")
+
+    linhas = conn.execute("SELECT rowid, prazo_entrega FROM os WHERE prazo_iso IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE os SET prazo_iso = ? WHERE rowid = ?",
+        [(normalizar_data(linha[1]), linha[0]) for linha in linhas]
+    )
+
+    # Cada filtro seguido da ordem da lista, para a paginação por chave
+    for coluna in ("empresa", "urgencia", "tipo"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_os_{coluna}_data_iso ON os ({coluna}, data_iso, numero)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_os_prazo_iso ON os (prazo_iso)")
+    # Coberto pelo idx_os_empresa_data_iso
+    conn.execute("DROP INDEX IF EXISTS idx_os_empresa")
+
+
+def _migracao_trigramas(conn):
+    """Índice de trigramas de cliente, máquina e local (sugestões da pesquisa)"""
+    criar_indice_trigramas(conn)
+
+
+def _migracao_cadastros(conn):
+    """Clientes e equipamentos com chave própria, sem duplicatas, ligados às OS (ver os_cadastros.py)"""
+    criar_cadastros(conn)
+    # Substituído pelo idx_os_cliente_id (as OS do cliente agora são buscadas pelo id)
+    conn.execute("DROP INDEX IF EXISTS idx_os_cliente")
+
+
+def _migracao_historico_equipamento(conn):
+    """Índice de cobertura do histórico do equipamento (ver historico_equipamento.py)"""
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_os_equipamento_historico
+                ON os (equipamento_id, data_iso, numero, tipo, status)''')
+    # Substituído pelo índice acima, que começa pelas mesmas colunas
+    conn.execute("DROP INDEX IF EXISTS idx_os_equipamento_id")
+
+
+# (versão, descrição, função) em ordem crescente de versão
+MIGRACOES = [
+    (1, "Tabela os", _migracao_tabela_os),
+    (2, "Sequência de números de OS", _migracao_sequencia),
+    (3, "Índice de busca (FTS5)", _migracao_busca),
+    (4, "Coluna data_iso e índices das listagens", _migracao_data_iso),
+    (5, "Registro de documentos gerados", _migracao_documentos),
+    (6, "Coluna pasta", _migracao_pasta),
+    (7, "Diário de movimentação de pastas", _migracao_movimentacoes),
+    (8, "Chave canônica do número da OS", _migracao_numero_key),
+    (9, "Registro de alterações (atualização da lista entre estações)", _migracao_alteracoes),
+    (10, "Prazo de entrega normalizado e índices dos filtros", _migracao_filtros),
+    (11, "Índice de sugestões por semelhança (trigramas)", _migracao_trigramas),
+    (12, "Cadastro de clientes e equipamentos", _migracao_cadastros),
+    (13, "Índice do histórico de equipamentos", _migracao_historico_equipamento),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def _colunas(conn, tabela):
+    """Nomes das colunas de uma tabela (usado apenas dentro das migrações)"""
+    return [info[1] for info in conn.execute(f"PRAGMA table_info({tabela})")]
+
+
+def versao_banco(conn):
+    """Versão do esquema gravada no banco (0 para bancos nunca migrados)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica, em ordem, as migrações que ainda não rodaram neste banco.
+
+    Cada migração roda em uma transação BEGIN IMMEDIATE junto com a
+    atualização do user_version: se falhar, o banco fica na versão anterior.
+    A versão é relida dentro da transação, então duas estações abrindo o
+    sistema ao mesmo tempo não aplicam a mesma migração duas vezes.
+
+    Args:
+        conn: Conexão em modo autocommit (isolation_level=None)
+
+    Returns:
+        int: Versão do banco após as migrações
+    """
+    if versao_banco(conn) >= VERSAO_ATUAL:
+        return VERSAO_ATUAL
+
+    for versao, descricao, migracao in MIGRACOES:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao_banco(conn) >= versao:
+                conn.execute("ROLLBACK")
+                continue
+            migracao(conn)
+            conn.execute(f"PRAGMA user_version = {versao}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        print(f"Migração {versao} aplicada ao banco de dados: {descricao}")
+
+    return versao_banco(conn)
@@ -0,0 +1,985 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+
+from numero_os import normalizar_numero_os
+from filtros_os import montar_condicoes
+from fila_escrita import FilaEscrita
+from os_busca import (reconstruir_indice_busca, montar_consulta_fts, sql_busca_fts, digitos_numero_os,
+                      sql_busca_numero)
+from historico_equipamento import SQL_LINHA_TEMPO, sql_resumo
+from os_cadastros import COLUNAS_CLIENTE, COLUNAS_EQUIPAMENTO, chave_cliente, registrar_cadastros
+from os_migracoes import aplicar_migracoes
+from os_trigramas import CAMPOS_TRIGRAMAS, registrar_termos, reconstruir_indice_trigramas, sugerir_termos
+
+# Caminho padrão do banco de dados (relativo à pasta de execução do sistema)
+CAMINHO_BANCO = 'moraca.db'
+
+# Colunas da tabela os, na ordem do CREATE TABLE
+COLUNAS_OS = (
+    "numero", "cliente", "maquina", "descricao", "urgencia", "data", "status",
+    "tipo", "patrimonio", "numero_serie", "local", "endereco", "cidade",
+    "telefone", "cep", "contato_nome", "contato_telefone1", "contato_telefone2",
+    "descricao_servico", "necessita_viagem", "tipo_hospedagem", "prazo_entrega",
+    "empresa", "data_iso", "pasta", "prazo_iso", "cliente_id", "equipamento_id"
+)
+
+# Colunas exibidas na tabela principal da tela
+COLUNAS_LISTA = ("numero", "cliente", "data", "status")
+
+# Colunas preenchidas no formulário ao escolher um cliente já atendido
+COLUNAS_CONTATO = (
+    "local", "endereco", "cidade", "telefone", "cep",
+    "contato_nome", "contato_telefone1", "contato_telefone2"
+)
+
+
+class RegistroOS:
+    """
+    Uma OS, com um atributo por coluna da tabela os (registro.cliente, registro.data...).
+
+    Usa __slots__ (sem dicionário por instância) e, nas consultas, é montado
+    direto do cursor por _registro_os. Uma consulta com projeção preenche só as
+    colunas pedidas: ler uma coluna que não foi buscada gera AttributeError
+    (KeyError em registro["coluna"]) em vez de devolver o valor de outra coluna.
+    Também funciona como mapeamento (registro["cliente"], registro.get(),
+    dict(registro)), então pode ser passado para criar_os() e inserir_os().
+    """
+
+    __slots__ = COLUNAS_OS
+
+    def __init__(self, **colunas):
+        for coluna, valor in colunas.items():
+            setattr(self, coluna, valor)
+
+    def __getitem__(self, coluna):
+        try:
+            return getattr(self, coluna)
+        except AttributeError:
+            raise KeyError(coluna) from None
+
+    def __contains__(self, coluna):
+        return hasattr(self, coluna)
+
+    def get(self, coluna, padrao=None):
+        return getattr(self, coluna, padrao)
+
+    def keys(self):
+        """Colunas preenchidas, na ordem de COLUNAS_OS"""
+        return [coluna for coluna in COLUNAS_OS if hasattr(self, coluna)]
+
+    def __repr__(self):
+        return f"RegistroOS({', '.join(f'{coluna}={self[coluna]!r}' for coluna in self.keys())})"
+
+
+def _registro_os(cursor, linha):
+    """Fábrica de linhas das consultas da tabela os (monta um RegistroOS)"""
+    registro = RegistroOS.__new__(RegistroOS)
+    for descricao, valor in zip(cursor.description, linha):
+        setattr(registro, descricao[0], valor)
+    return registro
+
+
+# Formatos aceitos no campo de data da OS (o formulário usa dd/mm/aaaa)
+FORMATOS_DATA = ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y")
+
+
+def formatar_numero_os(ano, sequencia):
+    """Monta o número da OS no formato OSYYXXX (ex: OS25007)"""
+    return f"OS{ano}{str(sequencia).zfill(3)}"
+
+
+def normalizar_data(texto):
+    """
+    Converte a data digitada no formulário para o formato ISO (aaaa-mm-dd).
+
+    Args:
+        texto (str): Data como foi gravada (ex: "17/03/2025")
+
+    Returns:
+        str: Data no formato aaaa-mm-dd, ou None se não for uma data válida
+    """
+    if not texto:
+        return None
+    texto = texto.strip()
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+class RepositorioOS:
+    """
+    Camada de acesso ao banco de OS, sem nenhuma dependência da interface.
+
+    Mantém uma única conexão de escrita de longa duração e um pequeno pool de
+    conexões de leitura, evitando abrir o arquivo do banco a cada clique (o que
+    é lento quando o moraca.db fica em uma pasta compartilhada da rede). As
+    gravações passam pela fila de escrita (fila_escrita.py), que junta as
+    gravações simultâneas de várias threads em uma só transação.
+    Pode ser usado tanto pela tela (MoracaOS) quanto pelos geradores de
+    documentos e por scripts sem display.
+    """
+
+    def __init__(self, caminho_banco=CAMINHO_BANCO, tamanho_pool=3, modo_journal="WAL", agrupar_escritas=True):
+        """
+        Args:
+            caminho_banco (str): Caminho do arquivo SQLite
+            tamanho_pool (int): Quantidade de conexões de leitura mantidas abertas
+            modo_journal (str): Modo de journal do SQLite. WAL permite leituras
+                simultâneas a uma escrita; use "DELETE" se o banco estiver em um
+                compartilhamento que não suporte memória compartilhada.
+            agrupar_escritas (bool): Gravar pela fila de escrita (commit em
+                grupo). Se False, cada gravação abre a própria transação na
+                thread que a pediu (usado na comparação do benchmark_escrita.py).
+        """
+        self.caminho_banco = caminho_banco
+        self.modo_journal = modo_journal
+        self.busca_fts = True  # Desligado na primeira busca se o FTS5 não existir
+        self._trava_escrita = threading.RLock()
+        self._transacoes = 0  # Transações confirmadas fora da fila de escrita
+        self._conexao_monitor = None  # Aberta na primeira chamada de versao_dados()
+        self._conexao_escrita = self._abrir_conexao()
+        self._conexao_escrita.execute(f"PRAGMA journal_mode={modo_journal}")
+        self._fila_escrita = FilaEscrita(self._conexao_escrita, self._trava_escrita) if agrupar_escritas else None
+
+        # Pool de leitura: cada conexão é emprestada para uma única thread por vez
+        self._pool_leitura = queue.Queue()
+        for _ in range(tamanho_pool):
+            self._pool_leitura.put(self._abrir_conexao())
+
+    def _abrir_conexao(self):
+        """Abre uma conexão configurada (autocommit, acesso por nome de coluna)"""
+        conn = sqlite3.connect(
+            self.caminho_banco,
+            timeout=10,
+            isolation_level=None,  # Transações controladas explicitamente
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 10000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # os.cliente_id e os.equipamento_id sempre apontam para um cadastro existente
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @contextmanager
+    def leitura(self):
+        """Empresta uma conexão do pool de leitura"""
+        conn = self._pool_leitura.get()
+        try:
+            yield conn
+        finally:
+            self._pool_leitura.put(conn)
+
+    @contextmanager
+    def escrita(self):
+        """
+        Abre uma transação de escrita (BEGIN IMMEDIATE) na conexão de escrita.
+
+        Faz commit ao sair do bloco, ou rollback se ocorrer uma exceção.
+        """
+        with self._trava_escrita:
+            conn = self._conexao_escrita
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._transacoes += 1
+
+    def escrever(self, funcao, *args):
+        """
+        Enfileira uma gravação: funcao(conn, *args) roda na thread de escrita,
+        na mesma transação das outras gravações pendentes.
+
+        Se a função levantar uma exceção, só as alterações dela são desfeitas.
+
+        Returns:
+            Future: Resultado da função, disponível depois do COMMIT
+        """
+        if self._fila_escrita is None:
+            futuro = Future()
+            try:
+                with self.escrita() as conn:
+                    futuro.set_result(funcao(conn, *args))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        return self._fila_escrita.submeter(funcao, *args)
+
+    @property
+    def transacoes_escrita(self):
+        """Transações de escrita confirmadas por este repositório (uma por lote da fila)"""
+        if self._fila_escrita is None:
+            return self._transacoes
+        return self._fila_escrita.lotes + self._transacoes
+
+    def _gravar(self, funcao, *args):
+        """Grava pela fila de escrita e espera o COMMIT"""
+        return self.escrever(funcao, *args).result()
+
+    def fechar(self):
+        """Fecha todas as conexões abertas pelo repositório"""
+        if self._fila_escrita is not None:
+            self._fila_escrita.encerrar()
+        with self._trava_escrita:
+            self._conexao_escrita.close()
+        if self._conexao_monitor is not None:
+            self._conexao_monitor.close()
+        while not self._pool_leitura.empty():
+            self._pool_leitura.get_nowait().close()
+
+    # ============== ESQUEMA ==============
+
+    def criar_esquema(self):
+        """
+        Aplica as migrações pendentes do banco (ver os_migracoes.py).
+
+        Em um banco já atualizado isto custa apenas a leitura do user_version.
+        """
+        with self._trava_escrita:
+            aplicar_migracoes(self._conexao_escrita)
+
+    def reconstruir_indice_busca(self):
+        """
+        Recria o índice de texto completo a partir da tabela os.
+
+        Returns:
+            int: Quantidade de OS indexadas
+        """
+        return self._gravar(reconstruir_indice_busca)
+
+    def reconstruir_indice_trigramas(self):
+        """
+        Recria o índice de sugestões (os_trigramas.py) a partir da tabela os.
+
+        Returns:
+            int: Quantidade de termos indexados
+        """
+        return self._gravar(reconstruir_indice_trigramas)
+
+    # ============== NUMERAÇÃO ==============
+
+    def _alocar_sequencia(self, conn, ano, quantidade=1):
+        """
+        Avança a sequência do ano e retorna o primeiro número alocado.
+
+        Deve ser chamado dentro de uma transação de escrita (BEGIN IMMEDIATE),
+        o que garante que duas estações nunca recebam o mesmo número.
+
+        Args:
+            conn: Conexão com a transação de escrita aberta
+            ano (str): Ano com dois dígitos (ex: "25")
+            quantidade (int): Quantos números consecutivos reservar
+
+        Returns:
+            int: Primeira sequência do intervalo reservado
+        """
+        linha = conn.execute("SELECT ultimo FROM os_sequencia WHERE ano = ?", (ano,)).fetchone()
+        if linha is None:
+            # Primeira OS do ano neste banco: continuar a partir do maior número já
+            # gravado (só acontece uma vez por ano)
+            ultimo = conn.execute(
+                "SELECT MAX(CAST(substr(numero, 5) AS INTEGER)) FROM os WHERE numero GLOB ?",
+                (f"OS{ano}[0-9]*",)
+            ).fetchone()[0] or 0
+            conn.execute("INSERT INTO os_sequencia (ano, ultimo) VALUES (?, ?)", (ano, ultimo))
+        else:
+            ultimo = linha["ultimo"]
+
+        conn.execute("UPDATE os_sequencia SET ultimo = ? WHERE ano = ?", (ultimo + quantidade, ano))
+        return ultimo + 1
+
+    def criar_os(self, dados, ano=None):
+        """
+        Gera o número da OS e insere o registro na mesma transação.
+
+        Args:
+            dados (dict): Valores das colunas da OS, sem o número (ou RegistroOS)
+            ano (str, optional): Ano com dois dígitos. Se None, usa o ano atual.
+
+        Returns:
+            str: Número gerado no formato OSYYXXX
+        """
+        if ano is None:
+            ano = datetime.now().strftime("%y")
+
+        def gravar(conn):
+            sequencia = self._alocar_sequencia(conn, ano)
+            numero = formatar_numero_os(ano, sequencia)
+            # Números digitados manualmente ou reservados podem já existir
+            while conn.execute("SELECT 1 FROM os WHERE numero = ?", (numero,)).fetchone():
+                sequencia = self._alocar_sequencia(conn, ano)
+                numero = formatar_numero_os(ano, sequencia)
+            self._inserir(conn, dict(dados, numero=numero))
+            return numero
+
+        return self._gravar(gravar)
+
+    def reservar_numeros(self, quantidade, ano=None):
+        """
+        Reserva um intervalo de números de OS para digitação offline ou em lote.
+
+        Os números reservados não serão entregues a nenhuma outra estação; depois
+        é só gravar cada OS com inserir_os() usando o número reservado.
+
+        Args:
+            quantidade (int): Quantidade de números a reservar
+            ano (str, optional): Ano com dois dígitos. Se None, usa o ano atual.
+
+        Returns:
+            list: Números reservados, em ordem
+        """
+        if quantidade < 1:
+            return []
+        if ano is None:
+            ano = datetime.now().strftime("%y")
+        primeira = self._gravar(self._alocar_sequencia, ano, quantidade)
+        return [formatar_numero_os(ano, sequencia) for sequencia in range(primeira, primeira + quantidade)]
+
+    # ============== ESCRITA ==============
+
+    def _inserir(self, conn, dados):
+        """Executa o INSERT de uma OS em uma transação já aberta"""
+        if "data" in dados:
+            dados = dict(dados, data_iso=normalizar_data(dados["data"]))
+        if "prazo_entrega" in dados:
+            dados = dict(dados, prazo_iso=normalizar_data(dados["prazo_entrega"]))
+        # Cliente e equipamento são cadastrados (ou atualizados) junto com a OS
+        cliente_id, equipamento_id = registrar_cadastros(conn, dados, dados.get("data_iso"))
+        dados = dict(dados, cliente_id=cliente_id, equipamento_id=equipamento_id)
+        colunas = [coluna for coluna in COLUNAS_OS if coluna in dados]
+        marcadores = ", ".join("?" for _ in colunas)
+        conn.execute(
+            f"INSERT INTO os ({', '.join(colunas)}) VALUES ({marcadores})",
+            [dados[coluna] for coluna in colunas]
+        )
+        registrar_termos(conn, dados)
+
+    def inserir_os(self, dados):
+        """
+        Insere uma nova OS.
+
+        Para OS novas use criar_os(), que também gera o número. Este método é
+        para OS cujo número já foi reservado com reservar_numeros().
+
+        Args:
+            dados (dict): Valores das colunas da OS (chaves de COLUNAS_OS) ou RegistroOS
+        """
+        self._gravar(self._inserir, dados)
+
+    def atualizar_status(self, numero, status, mover_pasta=None):
+        """
+        Altera o status de uma OS.
+
+        Args:
+            numero (str): Número da OS
+            status (str): Novo status
+            mover_pasta (tuple, optional): (origem, destino) da pasta da OS. A
+                movimentação é registrada em os_movimentacoes na mesma
+                transação do status, para ser executada (ou retomada) depois.
+
+        Returns:
+            int: Id da movimentação registrada, ou None
+        """
+
+        def gravar(conn):
+            conn.execute("UPDATE os SET status = ? WHERE numero = ?", (status, numero))
+            if mover_pasta is None:
+                return None
+            origem, destino = mover_pasta
+            cursor = conn.execute('''INSERT INTO os_movimentacoes (numero, origem, destino, estado, criada_em)
+                        VALUES (?, ?, ?, 'pendente', ?)''',
+                        (numero, origem, destino, datetime.now().isoformat(timespec="seconds")))
+            return cursor.lastrowid
+
+        return self._gravar(gravar)
+
+    def atualizar_movimentacao(self, id_movimentacao, estado, erro=None):
+        """Registra a etapa atual de uma movimentação de pasta (e o último erro)"""
+        self._gravar(lambda conn: conn.execute("UPDATE os_movimentacoes SET estado = ?, erro = ? WHERE id = ?",
+                                               (estado, erro, id_movimentacao)))
+
+    def concluir_movimentacao(self, id_movimentacao, numero, destino):
+        """Marca a movimentação como concluída e grava a nova pasta da OS"""
+
+        def gravar(conn):
+            conn.execute("UPDATE os_movimentacoes SET estado = 'concluida', erro = NULL WHERE id = ?",
+                         (id_movimentacao,))
+            conn.execute("UPDATE os SET pasta = ? WHERE numero = ?", (destino, numero))
+
+        self._gravar(gravar)
+
+    def definir_pasta_os(self, numero, pasta):
+        """Grava a pasta de documentos da OS (ver pastas_os.py)"""
+        self._gravar(lambda conn: conn.execute("UPDATE os SET pasta = ? WHERE numero = ?", (pasta, numero)))
+
+    # ============== LEITURA ==============
+
+    def _consultar_os(self, conn, condicao, parametros, colunas):
+        """SELECT das colunas pedidas da tabela os, devolvendo RegistroOS"""
+        cursor = conn.cursor()
+        cursor.row_factory = _registro_os
+        return cursor.execute(f"SELECT {', '.join(colunas)} FROM os WHERE {condicao}", parametros)
+
+    def obter_os(self, numero, colunas=COLUNAS_OS):
+        """
+        Busca uma OS pelo número exato, como gravado no banco.
+
+        Args:
+            numero (str): Número da OS (ex: "OS25007")
+            colunas (tuple, optional): Colunas a buscar; cada tela pede só as
+                que usa (padrão: todas)
+
+        Returns:
+            RegistroOS: Registro da OS ou None
+        """
+        with self.leitura() as conn:
+            return self._consultar_os(conn, "numero = ?", (numero,), colunas).fetchone()
+
+    def obter_os_por_chave(self, numero, colunas=COLUNAS_OS):
+        """
+        Busca uma OS pelo número em qualquer grafia ("OS 25 007", "OS25007", "25007").
+
+        Uma única consulta pelo índice da coluna numero_key (ver numero_os.py).
+
+        Args:
+            numero (str): Número da OS
+            colunas (tuple, optional): Colunas a buscar (padrão: todas)
+
+        Returns:
+            RegistroOS: Registro da OS ou None
+        """
+        chave = normalizar_numero_os(numero).chave
+        with self.leitura() as conn:
+            return self._consultar_os(conn, "numero_key = ?", (chave,), colunas).fetchone()
+
+    def obter_pasta_os(self, numero):
+        """
+        Dados usados para resolver a pasta da OS.
+
+        Returns:
+            sqlite3.Row: (cliente, data_iso, pasta) ou None se a OS não existir
+        """
+        with self.leitura() as conn:
+            return conn.execute("SELECT cliente, data_iso, pasta FROM os WHERE numero = ?", (numero,)).fetchone()
+
+    def obter_movimentacao(self, id_movimentacao):
+        """Busca uma movimentação de pasta (os_movimentacoes) pelo id"""
+        with self.leitura() as conn:
+            return conn.execute("SELECT * FROM os_movimentacoes WHERE id = ?", (id_movimentacao,)).fetchone()
+
+    def listar_movimentacoes_pendentes(self):
+        """Movimentações de pasta ainda não concluídas, da mais antiga para a mais nova"""
+        with self.leitura() as conn:
+            return conn.execute('''SELECT * FROM os_movimentacoes
+                        WHERE estado != 'concluida' ORDER BY id''').fetchall()
+
+    def obter_cliente(self, numero):
+        """Retorna o nome do cliente de uma OS, ou None se a OS não existir"""
+        with self.leitura() as conn:
+            resultado = conn.execute("SELECT cliente FROM os WHERE numero = ?", (numero,)).fetchone()
+        return resultado["cliente"] if resultado else None
+
+    def obter_cadastro_cliente(self, cliente_id):
+        """
+        Cadastro de um cliente (endereço e contatos da OS mais recente).
+
+        Returns:
+            sqlite3.Row: (id, chave, nome, endereco, cidade, telefone, cep,
+                contato_nome, contato_telefone1, contato_telefone2,
+                atualizado_em) ou None
+        """
+        with self.leitura() as conn:
+            return conn.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+
+    def obter_cadastros_os(self, numero):
+        """
+        Cliente e equipamento de uma OS, pelas chaves da OS.
+
+        Args:
+            numero (str): Número da OS
+
+        Returns:
+            sqlite3.Row: cliente_id, equipamento_id, as colunas do cliente e
+                as do equipamento (None onde a OS não tem cadastro), ou None
+                se a OS não existir
+        """
+        colunas = [f"c.{coluna}" for coluna in COLUNAS_CLIENTE] + [f"e.{coluna}" for coluna in COLUNAS_EQUIPAMENTO]
+        with self.leitura() as conn:
+            return conn.execute(f'''SELECT o.cliente_id, o.equipamento_id, {", ".join(colunas)}
+                        FROM os o
+                        LEFT JOIN clientes c ON c.id = o.cliente_id
+                        LEFT JOIN equipamentos e ON e.id = o.equipamento_id
+                        WHERE o.numero = ?''', (numero,)).fetchone()
+
+    def obter_contato_cliente(self, cliente):
+        """
+        Local, endereço e contatos da OS mais recente do cliente (preenchimento do formulário).
+
+        Uma única consulta: o cadastro pela chave normalizada e a OS mais
+        recente pelo índice idx_os_cliente_id.
+
+        Args:
+            cliente (str): Nome do cliente, em qualquer grafia
+
+        Returns:
+            sqlite3.Row: (local, endereco, cidade, telefone, cep,
+                contato_nome, contato_telefone1, contato_telefone2) ou None
+        """
+        chave = chave_cliente(cliente)
+        if chave is None:
+            return None
+        with self.leitura() as conn:
+            return conn.execute(f'''SELECT {", ".join(f"o.{coluna}" for coluna in COLUNAS_CONTATO)}
+                        FROM clientes c JOIN os o ON o.cliente_id = c.id
+                        WHERE c.chave = ?
+                        ORDER BY o.data_iso DESC, o.numero DESC LIMIT 1''', (chave,)).fetchone()
+
+    def listar_valores_distintos(self, campos):
+        """
+        Valores já usados em cada campo, com a quantidade de OS (índice do autocompletar).
+
+        Args:
+            campos (tuple): Colunas da tabela os (ex: ("cliente", "cidade"))
+
+        Returns:
+            dict: campo -> lista de (valor, ocorrências)
+        """
+        valores = {}
+        with self.leitura() as conn:
+            for campo in campos:
+                cursor = conn.execute(f"SELECT {campo}, COUNT(*) FROM os WHERE {campo} <> '' GROUP BY {campo}")
+                cursor.row_factory = None
+                valores[campo] = cursor.fetchall()
+        return valores
+
+    def listar_os_cliente(self, cliente_id, limite=-1):
+        """
+        OS de um cliente, da mais recente para a mais antiga (índice idx_os_cliente_id).
+
+        Args:
+            cliente_id (int): Id do cadastro do cliente
+            limite (int): Quantidade máxima de OS (-1 para todas)
+
+        Returns:
+            list: Registros (numero, cliente, data, status)
+        """
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, cliente, data, status FROM os WHERE cliente_id = ?
+                        ORDER BY data_iso DESC, numero DESC LIMIT ?''', (cliente_id, limite)).fetchall()
+
+    def listar_os_equipamento(self, equipamento_id, limite=-1):
+        """
+        OS de um equipamento, da mais recente para a mais antiga (índice idx_os_equipamento_historico).
+
+        Args:
+            equipamento_id (int): Id do cadastro do equipamento
+            limite (int): Quantidade máxima de OS (-1 para todas)
+
+        Returns:
+            list: Registros (numero, cliente, data, status)
+        """
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, cliente, data, status FROM os WHERE equipamento_id = ?
+                        ORDER BY data_iso DESC, numero DESC LIMIT ?''', (equipamento_id, limite)).fetchall()
+
+    def obter_equipamento(self, equipamento_id):
+        """
+        Cadastro de um equipamento, com o nome do cliente.
+
+        Returns:
+            sqlite3.Row: (id, maquina, numero_serie, patrimonio, cliente) ou None
+        """
+        with self.leitura() as conn:
+            return conn.execute('''SELECT e.id, e.maquina, e.numero_serie, e.patrimonio, c.nome AS cliente
+                        FROM equipamentos e LEFT JOIN clientes c ON c.id = e.cliente_id
+                        WHERE e.id = ?''', (equipamento_id,)).fetchone()
+
+    def historico_equipamento(self, equipamento_id):
+        """
+        Resumo e linha do tempo dos atendimentos de um equipamento (ver historico_equipamento.py).
+
+        Args:
+            equipamento_id (int): Id do cadastro do equipamento
+
+        Returns:
+            tuple: (resumo, linhas). resumo tem total, corretivas,
+                preventivas, abertas, primeira, ultima e mtbf_dias (None com
+                menos de duas corretivas); linhas são (data_iso, numero,
+                tipo, status), da mais recente para a mais antiga
+        """
+        sql, parametros = sql_resumo()
+        with self.leitura() as conn:
+            resumo = conn.execute(sql, parametros + [equipamento_id]).fetchone()
+            linhas = conn.execute(SQL_LINHA_TEMPO, (equipamento_id,)).fetchall()
+        return resumo, linhas
+
+    def listar_ultimas(self, limite=20):
+        """Lista (numero, cliente, data, status) das OS mais recentes"""
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, cliente, data, status FROM os
+                        ORDER BY data_iso DESC, numero DESC LIMIT ?''', (limite,)).fetchall()
+
+    def listar_todas(self):
+        """Lista (numero, cliente, data, status) de todas as OS"""
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, cliente, data, status FROM os
+                        ORDER BY data_iso DESC, numero DESC''').fetchall()
+
+    def listar_pagina(self, apos=None, limite=100, filtros=None):
+        """
+        Lista uma página das OS, da mais recente para a mais antiga.
+
+        Usa paginação por chave (data_iso, numero): cada página continua a
+        partir da última linha da anterior pelo índice idx_os_data_iso (ou pelo
+        índice composto do filtro), então o custo não depende de quantas
+        páginas já foram lidas. OS sem data reconhecível (data_iso nulo) vêm no
+        final, ordenadas pelo número.
+
+        Args:
+            apos (tuple): (data_iso, numero) da última OS da página anterior,
+                ou None para a primeira página
+            limite (int): Quantidade de OS na página
+            filtros (dict, optional): Filtros do painel (argumentos de
+                filtros_os.montar_condicoes)
+
+        Returns:
+            list: Registros (numero, cliente, data, status, data_iso); a página
+                seguinte começa após (registro["data_iso"], registro["numero"])
+                do último registro
+        """
+        registros = []
+        with self.leitura() as conn:
+            for sql, parametros in self.consultas_pagina(filtros, apos):
+                registros += conn.execute(sql, parametros + [limite - len(registros)]).fetchall()
+                if len(registros) >= limite:
+                    break
+        return registros
+
+    def consultas_pagina(self, filtros=None, apos=None):
+        """
+        Consultas executadas por listar_pagina, na ordem, até completar a página.
+
+        Args:
+            filtros (dict, optional): Filtros do painel
+            apos (tuple): Cursor da página anterior (ver listar_pagina)
+
+        Returns:
+            list: Pares (sql, parametros); falta acrescentar o limite aos parâmetros
+        """
+        condicoes, parametros = montar_condicoes(**(filtros or {}))
+
+        def consulta(extras, parametros_extras, ordem):
+            where = " AND ".join(condicoes + extras)
+            return (f'''SELECT numero, cliente, data, status, data_iso FROM os
+                        WHERE {where} ORDER BY {ordem} LIMIT ?''', parametros + parametros_extras)
+
+        consultas = []
+        if apos is None:
+            consultas.append(consulta(["data_iso IS NOT NULL"], [], "data_iso DESC, numero DESC"))
+        elif apos[0] is not None:
+            consultas.append(consulta(["(data_iso, numero) < (?, ?)"], [apos[0], apos[1]], "data_iso DESC, numero DESC"))
+
+        # Terminadas as OS com data, seguem as que não têm data_iso
+        if apos is not None and apos[0] is None:
+            consultas.append(consulta(["data_iso IS NULL", "numero < ?"], [apos[1]], "numero DESC"))
+        else:
+            consultas.append(consulta(["data_iso IS NULL"], [], "numero DESC"))
+        return consultas
+
+    def consulta_contagem(self, filtros=None):
+        """
+        Consulta usada por contar_os (também conferida por filtros_os.py).
+
+        Returns:
+            tuple: (sql, parâmetros)
+        """
+        condicoes, parametros = montar_condicoes(**(filtros or {}))
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return f"SELECT COUNT(*) FROM os {where}", parametros
+
+    def numeros_no_filtro(self, numeros, filtros):
+        """
+        Quais das OS informadas atendem aos filtros do painel.
+
+        Args:
+            numeros (list): Números das OS
+            filtros (dict): Filtros (ver filtros_os.montar_condicoes)
+
+        Returns:
+            set: Números que atendem aos filtros
+        """
+        condicoes, parametros = montar_condicoes(**(filtros or {}))
+        atendem = set()
+        with self.leitura() as conn:
+            # Em blocos, abaixo do limite de parâmetros do SQLite
+            for inicio in range(0, len(numeros), 500):
+                bloco = list(numeros[inicio:inicio + 500])
+                sql = f"SELECT numero FROM os WHERE numero IN ({', '.join('?' for _ in bloco)})"
+                if condicoes:
+                    sql += f" AND {' AND '.join(condicoes)}"
+                atendem.update(linha[0] for linha in conn.execute(sql, bloco + parametros))
+        return atendem
+
+    def contar_os(self, filtros=None):
+        """Quantidade de OS cadastradas (ou das que atendem aos filtros do painel)"""
+        sql, parametros = self.consulta_contagem(filtros)
+        with self.leitura() as conn:
+            return conn.execute(sql, parametros).fetchone()[0]
+
+    def buscar(self, termo, limite=30, colunas=COLUNAS_LISTA):
+        """
+        Pesquisa OS pelo texto digitado, ordenando pela relevância.
+
+        Procura no número, cliente, máquina, descrições, número de série,
+        patrimônio e local, ignorando acentos e tratando cada palavra como
+        prefixo. Sem FTS5 disponível, procura apenas no número e no cliente.
+        Um texto que é só um número de OS também encontra o número em
+        qualquer grafia e os números que contêm os dígitos (ver os_busca.py).
+
+        Args:
+            termo (str): Texto digitado na pesquisa
+            limite (int): Quantidade máxima de resultados
+            colunas (tuple): Colunas retornadas (ex: COLUNAS_FTS, para
+                refinar o resultado em memória)
+
+        Returns:
+            list: Registros com as colunas pedidas
+        """
+        if self.busca_fts:
+            consulta = montar_consulta_fts(termo)
+            if consulta is None:
+                return []
+            try:
+                with self.leitura() as conn:
+                    registros = conn.execute(sql_busca_fts(colunas), (consulta, limite)).fetchall()
+                    return self._incluir_numeros(conn, termo, registros, colunas, limite)
+            except sqlite3.OperationalError as e:
+                # SQLite sem FTS5: a migração não conseguiu criar o os_fts
+                print(f"Busca por texto completo indisponível, usando LIKE: {e}")
+                self.busca_fts = False
+
+        with self.leitura() as conn:
+            registros = conn.execute(f'''SELECT {", ".join(colunas)} FROM os
+                        WHERE numero LIKE ? OR cliente LIKE ?
+                        ORDER BY data_iso DESC, numero DESC LIMIT ?''', (f"%{termo}%", f"%{termo}%", limite)).fetchall()
+            return self._incluir_numeros(conn, termo, registros, colunas, limite)
+
+    def _incluir_numeros(self, conn, termo, registros, colunas, limite):
+        """
+        Acrescenta ao resultado as OS encontradas pelo número, se o termo for
+        só um número de OS: a de mesma chave primeiro, as outras no fim.
+        """
+        digitos = digitos_numero_os(termo)
+        if not digitos:
+            return registros
+        sql_exata, sql_contem = sql_busca_numero(colunas)
+        exatos = conn.execute(sql_exata, (normalizar_numero_os(termo).chave,)).fetchall()
+        contem = conn.execute(sql_contem, (f"%{digitos}%", limite)).fetchall()
+        vistos = set()
+        resultado = []
+        for registro in list(exatos) + list(registros) + list(contem):
+            if registro["numero"] not in vistos:
+                vistos.add(registro["numero"])
+                resultado.append(registro)
+        return resultado[:limite]
+
+    def sugerir_termos(self, texto, campos=CAMPOS_TRIGRAMAS, limite=5, semelhanca_minima=0.45):
+        """
+        Sugestões de cliente, máquina ou local parecidos com o texto ("você quis dizer").
+
+        Args:
+            texto (str): Texto digitado (ex: "hosp sao lukas")
+            campos (tuple): Campos onde procurar
+            limite (int): Quantidade máxima de sugestões
+            semelhanca_minima (float): Coeficiente de Dice mínimo (0 a 1)
+
+        Returns:
+            list: Dicionários (valor, campo, ocorrencias, semelhanca), da mais
+                parecida para a menos (ver os_trigramas.sugerir_termos)
+        """
+        with self.leitura() as conn:
+            return sugerir_termos(conn, texto, campos, limite, semelhanca_minima)
+
+    def filtrar_os(self, ano=None, empresa=None, status=None, cliente=None):
+        """
+        Lista as OS que atendem aos filtros (usado na geração em lote).
+
+        Args:
+            ano (int): Ano da OS, pela data de abertura (ou pelo número, se a
+                data não for reconhecível)
+            empresa (str): Empresa exatamente como gravada (ex: "ZIEHM")
+            status (str): Status exatamente como gravado (ex: "FECHADA")
+            cliente (str): Parte do nome do cliente
+
+        Returns:
+            list: Registros (numero, cliente, data, status), em ordem de número
+        """
+        condicoes = []
+        parametros = []
+        if ano is not None:
+            condicoes.append("((data_iso >= ? AND data_iso < ?) OR (data_iso IS NULL AND numero LIKE ?))")
+            parametros += [f"{ano:04d}-01-01", f"{ano + 1:04d}-01-01", f"OS{ano % 100:02d}%"]
+        if empresa:
+            condicoes.append("empresa = ?")
+            parametros.append(empresa)
+        if status:
+            condicoes.append("status = ?")
+            parametros.append(status)
+        if cliente:
+            condicoes.append("cliente LIKE ?")
+            parametros.append(f"%{cliente}%")
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self.leitura() as conn:
+            return conn.execute(f'''SELECT numero, cliente, data, status FROM os
+                        {where} ORDER BY numero''', parametros).fetchall()
+
+    def listar_indice(self):
+        """
+        Lê as colunas da lista de todas as OS, para o índice em memória (indice_lista.py).
+
+        Returns:
+            list: Tuplas (numero, cliente, data, status, data_iso), na ordem da
+                lista (data_iso e número, decrescentes)
+        """
+        with self.leitura() as conn:
+            cursor = conn.execute('''SELECT numero, cliente, data, status, data_iso FROM os
+                        ORDER BY data_iso DESC, numero DESC''')
+            # Tuplas simples: com milhares de linhas, o custo de montar cada Row pesa
+            cursor.row_factory = None
+            return cursor.fetchall()
+
+    def listar_numeros(self, limite=10):
+        """Lista alguns números de OS cadastrados (usado em mensagens de diagnóstico; -1 lista todos)"""
+        with self.leitura() as conn:
+            return [row["numero"] for row in conn.execute("SELECT numero FROM os LIMIT ?", (limite,))]
+
+    # ============== ALTERAÇÕES ==============
+
+    def versao_dados(self):
+        """
+        PRAGMA data_version de uma conexão reservada para o monitor de alterações.
+
+        O valor muda sempre que outra conexão (desta ou de outra estação) grava
+        no banco, e lê-lo não executa nenhuma consulta nas tabelas.
+
+        Returns:
+            int: Versão atual
+        """
+        if self._conexao_monitor is None:
+            self._conexao_monitor = self._abrir_conexao()
+        return self._conexao_monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def ultima_alteracao(self):
+        """Id da alteração mais recente em os_alteracoes (0 se não houver)"""
+        with self.leitura() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM os_alteracoes").fetchone()[0]
+
+    def alterada_em(self, numero):
+        """
+        Data e hora da última alteração registrada da OS.
+
+        Só cobre o período mantido em os_alteracoes (ver limpar_alteracoes).
+
+        Returns:
+            str: UTC, "aaaa-mm-dd hh:mm:ss", ou None se não houver alteração registrada
+        """
+        with self.leitura() as conn:
+            return conn.execute("SELECT MAX(em) FROM os_alteracoes WHERE numero = ?", (numero,)).fetchone()[0]
+
+    def listar_alteracoes(self, apos, limite=500):
+        """
+        Alterações posteriores a um id, com os dados atuais da OS para a lista.
+
+        Args:
+            apos (int): Último id já processado
+            limite (int): Quantidade máxima de alterações
+
+        Returns:
+            list: Linhas (id, numero, cliente, data, status, data_iso, removida),
+                em ordem de id; removida é 1 quando a OS não existe mais
+        """
+        with self.leitura() as conn:
+            return conn.execute('''SELECT a.id, a.numero, o.cliente, o.data, o.status, o.data_iso,
+                               o.numero IS NULL AS removida
+                        FROM os_alteracoes a LEFT JOIN os o ON o.numero = a.numero
+                        WHERE a.id > ? ORDER BY a.id LIMIT ?''', (apos, limite)).fetchall()
+
+    def limpar_alteracoes(self, dias=1):
+        """Apaga do registro as alterações com mais de alguns dias"""
+        self._gravar(lambda conn: conn.execute("DELETE FROM os_alteracoes WHERE em < datetime('now', ?)",
+                                               (f"-{dias} days",)))
+
+    # ============== DOCUMENTOS ==============
+
+    def registrar_documentos(self, registros):
+        """
+        Grava (ou substitui) registros de documentos, em uma única transação.
+
+        Args:
+            registros (list): Tuplas (numero, tipo, caminho, tamanho, mtime,
+                sha256); ver os_documentos.registrar_arquivo
+        """
+        self._gravar(lambda conn: conn.executemany('''INSERT OR REPLACE INTO os_documentos
+                        (numero, tipo, caminho, tamanho, mtime, sha256)
+                        VALUES (?, ?, ?, ?, ?, ?)''', registros))
+
+    def obter_documento(self, numero, tipo):
+        """
+        Busca o registro do documento de um tipo para a OS.
+
+        Returns:
+            sqlite3.Row: (numero, tipo, caminho, tamanho, mtime, sha256) ou None
+        """
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, tipo, caminho, tamanho, mtime, sha256
+                        FROM os_documentos WHERE numero = ? AND tipo = ?''', (numero, tipo)).fetchone()
+
+    def listar_documentos(self):
+        """Lista todos os registros de documentos (usado na reconciliação)"""
+        with self.leitura() as conn:
+            return conn.execute('''SELECT numero, tipo, caminho, tamanho, mtime, sha256
+                        FROM os_documentos''').fetchall()
+
+    def remover_documentos(self, chaves):
+        """
+        Apaga registros de documentos.
+
+        Args:
+            chaves (list): Pares (numero, tipo)
+        """
+        self._gravar(lambda conn: conn.executemany("DELETE FROM os_documentos WHERE numero = ? AND tipo = ?", chaves))
+
+
+# Um repositório por arquivo de banco, compartilhado por todo o processo
+_repositorios = {}
+_trava_repositorios = threading.Lock()
+
+
+def obter_repositorio(caminho_banco=CAMINHO_BANCO):
+    """
+    Retorna o repositório compartilhado para o banco informado, criando-o na
+    primeira chamada.
+
+    Args:
+        caminho_banco (str): Caminho do arquivo SQLite
+
+    Returns:
+        RepositorioOS: Repositório com as conexões já abertas
+    """
+    chave = os.path.abspath(caminho_banco)
+    with _trava_repositorios:
+        if chave not in _repositorios:
+            _repositorios[chave] = RepositorioOS(caminho_banco)
+        return _repositorios[chave]
@@ -0,0 +1,260 @@
+"""
+Sugestões por semelhança ("você quis dizer") para cliente, máquina e local.
+
+Esses campos são digitados livremente, então a mesma clínica aparece como
+"Hosp. São Lucas" e "Hospital Sao Lucas", e um erro de digitação na pesquisa
+não encontra nada. O índice guarda cada valor distinto (os_termos), já em
+minúsculas e sem acentos, e os trigramas de cada um (os_trigramas): pedaços de
+3 letras de cada palavra, com espaços nas pontas ("  h", " ho", "hos"...).
+
+A semelhança é o coeficiente de Dice: 2 x trigramas em comum / (trigramas do
+texto + trigramas do termo). Trigramas comuns ("hos", "osp"... de
+"hospital") aparecem em quase todos os termos, então contar as coincidências
+de todos eles leria o índice inteiro. Para chegar à semelhança mínima, um
+termo precisa ter pelo menos um dos trigramas mais raros do texto (quantos,
+depende do tamanho do texto e do mínimo), e só os termos que têm algum deles
+são candidatos. A raridade de cada trigrama fica em os_trigramas_freq; a
+contagem exata dos candidatos é feita pela chave primária de os_trigramas.
+Nada disso lê a tabela os.
+
+Os termos de OS novas entram no índice junto com a OS (registrar_termos,
+chamado por RepositorioOS._inserir). Termos de OS excluídas continuam no
+índice até a próxima reconstrução:
+
+Uso:
+    python os_trigramas.py --reconstruir      # Recria o índice a partir da tabela os
+    python os_trigramas.py "hosp sao lukas"   # Mostra as sugestões para um texto
+"""
+
+import math
+import re
+import sys
+
+from os_busca import normalizar_texto
+
+# Campos indexados
+CAMPOS_TRIGRAMAS = ("cliente", "maquina", "local")
+
+# Trigramas presentes em mais termos que isso (ou que 2% dos termos) não geram candidatos
+FREQUENCIA_MAXIMA = 200
+
+# Candidatos comparados por consulta
+MAXIMO_CANDIDATOS = 300
+
+
+def normalizar_termo(texto):
+    """Palavras do texto em minúsculas e sem acentos, separadas por um espaço"""
+    return " ".join(re.findall(r"\w+", normalizar_texto(texto)))
+
+
+def trigramas(termo):
+    """
+    Trigramas das palavras de um termo normalizado.
+
+    Args:
+        termo (str): Termo já normalizado (ver normalizar_termo)
+
+    Returns:
+        set: Trigramas (ex: "sao" -> {"  s", " sa", "sao", "ao "})
+    """
+    resultado = set()
+    for palavra in termo.split():
+        palavra = f"  {palavra} "
+        for inicio in range(len(palavra) - 2):
+            resultado.add(palavra[inicio:inicio + 3])
+    return resultado
+
+
+def criar_indice_trigramas(conn):
+    """
+    Cria as tabelas os_termos e os_trigramas e as preenche com as OS cadastradas.
+
+    Deve ser chamado dentro de uma transação de escrita.
+
+    Args:
+        conn: Conexão com o banco
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_termos
+                (id INTEGER PRIMARY KEY,
+                 campo TEXT NOT NULL,
+                 valor TEXT NOT NULL,
+                 normalizado TEXT NOT NULL,
+                 trigramas INTEGER NOT NULL,
+                 ocorrencias INTEGER NOT NULL DEFAULT 0,
+                 UNIQUE (campo, normalizado))''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_trigramas
+                (trigrama TEXT NOT NULL,
+                 termo_id INTEGER NOT NULL,
+                 PRIMARY KEY (trigrama, termo_id)) WITHOUT ROWID''')
+    # Em quantos termos cada trigrama aparece
+    conn.execute('''CREATE TABLE IF NOT EXISTS os_trigramas_freq
+                (trigrama TEXT PRIMARY KEY,
+                 termos INTEGER NOT NULL) WITHOUT ROWID''')
+    reconstruir_indice_trigramas(conn)
+
+
+def registrar_termos(conn, dados):
+    """
+    Acrescenta ao índice os valores de cliente, máquina e local de uma OS.
+
+    Args:
+        conn: Conexão com o banco (dentro de uma transação de escrita)
+        dados (dict): Colunas da OS (ou RegistroOS)
+    """
+    for campo in CAMPOS_TRIGRAMAS:
+        valor = (dados.get(campo) or "").strip()
+        normalizado = normalizar_termo(valor)
+        if not normalizado:
+            continue
+        atualizado = conn.execute(
+            "UPDATE os_termos SET ocorrencias = ocorrencias + 1 WHERE campo = ? AND normalizado = ?",
+            (campo, normalizado)
+        ).rowcount
+        if atualizado:
+            continue
+        grams = trigramas(normalizado)
+        termo_id = conn.execute(
+            "INSERT INTO os_termos (campo, valor, normalizado, trigramas, ocorrencias) VALUES (?, ?, ?, ?, 1)",
+            (campo, valor, normalizado, len(grams))
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO os_trigramas (trigrama, termo_id) VALUES (?, ?)",
+            [(grama, termo_id) for grama in grams]
+        )
+        conn.executemany("INSERT OR IGNORE INTO os_trigramas_freq (trigrama, termos) VALUES (?, 0)",
+                         [(grama,) for grama in grams])
+        conn.executemany("UPDATE os_trigramas_freq SET termos = termos + 1 WHERE trigrama = ?",
+                         [(grama,) for grama in grams])
+
+
+def total_termos(conn):
+    """Quantidade de termos no índice (o maior id, sem contar a tabela)"""
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM os_termos").fetchone()[0]
+
+
+def reconstruir_indice_trigramas(conn):
+    """
+    Apaga e recria o índice a partir da tabela os.
+
+    Para cada termo fica a grafia mais usada (ex: entre "Hospital São Lucas" e
+    "HOSPITAL SÃO LUCAS", a que aparece em mais OS).
+
+    Args:
+        conn: Conexão com o banco (dentro de uma transação de escrita)
+
+    Returns:
+        int: Quantidade de termos indexados
+    """
+    conn.execute("DELETE FROM os_trigramas_freq")
+    conn.execute("DELETE FROM os_trigramas")
+    conn.execute("DELETE FROM os_termos")
+
+    termos = {}  # (campo, normalizado) -> {grafia: ocorrências}
+    for campo in CAMPOS_TRIGRAMAS:
+        for valor, quantidade in conn.execute(
+                f"SELECT {campo}, COUNT(*) FROM os WHERE {campo} IS NOT NULL GROUP BY {campo}"):
+            valor = valor.strip()
+            normalizado = normalizar_termo(valor)
+            if normalizado:
+                grafias = termos.setdefault((campo, normalizado), {})
+                grafias[valor] = grafias.get(valor, 0) + quantidade
+
+    for (campo, normalizado), grafias in termos.items():
+        grams = trigramas(normalizado)
+        termo_id = conn.execute(
+            "INSERT INTO os_termos (campo, valor, normalizado, trigramas, ocorrencias) VALUES (?, ?, ?, ?, ?)",
+            (campo, max(grafias, key=grafias.get), normalizado, len(grams), sum(grafias.values()))
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO os_trigramas (trigrama, termo_id) VALUES (?, ?)",
+            [(grama, termo_id) for grama in grams]
+        )
+    conn.execute('''INSERT INTO os_trigramas_freq (trigrama, termos)
+                SELECT trigrama, COUNT(*) FROM os_trigramas GROUP BY trigrama''')
+    return len(termos)
+
+
+def sugerir_termos(conn, texto, campos=CAMPOS_TRIGRAMAS, limite=5, semelhanca_minima=0.45):
+    """
+    Termos parecidos com o texto, do mais para o menos parecido.
+
+    Args:
+        conn: Conexão com o banco
+        texto (str): Texto digitado
+        campos (tuple): Campos onde procurar
+        limite (int): Quantidade máxima de sugestões
+        semelhanca_minima (float): Coeficiente de Dice mínimo (0 a 1)
+
+    Returns:
+        list: Dicionários (valor, campo, ocorrencias, semelhanca); um termo
+            presente em mais de um campo aparece uma vez, e o próprio texto
+            não é sugerido
+    """
+    normalizado = normalizar_termo(texto)
+    grams = trigramas(normalizado)
+    if not grams:
+        return []
+    marcadores = ", ".join("?" for _ in grams)
+
+    # Um termo com Dice >= s tem pelo menos s/(2-s) dos trigramas do texto em comum
+    minimo_comuns = max(1, math.ceil(len(grams) * semelhanca_minima / (2 - semelhanca_minima) - 1e-9))
+    frequencias = dict(conn.execute(
+        f"SELECT trigrama, termos FROM os_trigramas_freq WHERE trigrama IN ({marcadores})", list(grams)
+    ).fetchall())
+    # Trigramas que não estão em nenhum termo nunca contam como comuns
+    existentes = sorted(frequencias, key=frequencias.get)
+    quantidade_raros = len(existentes) - minimo_comuns + 1
+    if quantidade_raros <= 0:
+        return []
+    raros = existentes[:quantidade_raros]
+    # Trigramas de palavras muito comuns ("hospital") trariam quase todos os
+    # termos como candidatos; ficam de fora enquanto houver outros
+    teto = max(FREQUENCIA_MAXIMA, total_termos(conn) // 50)
+    raros = [grama for grama in raros if frequencias[grama] <= teto] or raros[:1]
+
+    # Tamanho (em trigramas) que um termo pode ter e ainda alcançar o mínimo
+    tamanho_minimo = math.floor(len(grams) * semelhanca_minima / (2 - semelhanca_minima))
+    tamanho_maximo = math.ceil(len(grams) * (2 - semelhanca_minima) / semelhanca_minima)
+    # Só os candidatos de tamanho mais próximo do texto (os que podem ter a
+    # maior semelhança) são comparados trigrama a trigrama
+    linhas = conn.execute(f'''SELECT t.valor, t.campo, t.normalizado, t.ocorrencias,
+                    2.0 * (SELECT COUNT(*) FROM os_trigramas g
+                           WHERE g.trigrama IN ({marcadores}) AND g.termo_id = t.id)
+                        / (? + t.trigramas) AS semelhanca
+                FROM (SELECT id, valor, campo, normalizado, ocorrencias, trigramas
+                      FROM os_termos
+                      WHERE id IN (SELECT termo_id FROM os_trigramas
+                                   WHERE trigrama IN ({", ".join("?" for _ in raros)}))
+                        AND campo IN ({", ".join("?" for _ in campos)})
+                        AND trigramas BETWEEN ? AND ?
+                        AND normalizado <> ?
+                      ORDER BY ABS(trigramas - ?)
+                      LIMIT ?) t''',
+        [*grams, len(grams), *raros, *campos, tamanho_minimo, tamanho_maximo, normalizado,
+         len(grams), MAXIMO_CANDIDATOS]
+    ).fetchall()
+
+    # Mesma grafia em mais de um campo: fica a ocorrência mais usada
+    sugestoes = {}
+    for valor, campo, termo, ocorrencias, semelhanca in linhas:
+        if semelhanca < semelhanca_minima:
+            continue
+        atual = sugestoes.get(termo)
+        if atual is None or ocorrencias > atual["ocorrencias"]:
+            sugestoes[termo] = {"valor": valor, "campo": campo, "ocorrencias": ocorrencias, "semelhanca": semelhanca}
+    return sorted(sugestoes.values(), key=lambda s: (-s["semelhanca"], -s["ocorrencias"]))[:limite]
+
+
+if __name__ == "__main__":
+    from os_repositorio import obter_repositorio
+
+    repo = obter_repositorio()
+    repo.criar_esquema()
+    if "--reconstruir" in sys.argv:
+        total = repo.reconstruir_indice_trigramas()
+        print(f"Índice de sugestões reconstruído: {total} termos indexados.")
+    elif len(sys.argv) > 1:
+        for sugestao in repo.sugerir_termos(sys.argv[1]):
+            print(f"{sugestao['semelhanca']:.2f}  {sugestao['campo']:8}  {sugestao['valor']}")
+    else:
+        print(__doc__)
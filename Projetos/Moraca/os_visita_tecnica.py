@@ -1,107 +1,27 @@
 import os
-import re
-import sqlite3
 import openpyxl
 from datetime import datetime
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image
+from numero_os import normalizar_numero_os
+from os_repositorio import obter_repositorio
+from modelos_planilha import preencher_modelo
+from pacote_documentos import gravar_documento, renderizar_xlsx
 
-def criar_os_visita_tecnica(numero_os, pasta_destino=None):
+def _construir_os_visita_tecnica(valores):
     """
-    Cria um arquivo Excel formatado para a OS de visita técnica.
-    
+    Monta o layout da OS de Visita Técnica (compilado uma vez por modelos_planilha).
+
     Args:
-        numero_os (str): Número da Ordem de Serviço
-        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
-    
+        valores (dict): Campos da OS (ou os marcadores, ao compilar o modelo)
+
     Returns:
-        str: Caminho completo do arquivo salvo
+        openpyxl.Workbook: Planilha com o layout e os valores
     """
-    print(f"Iniciando criação de OS Visita Técnica para número: '{numero_os}'")
-    
-    # Formatação do número da OS (se ainda não estiver no formato padrão)
-    if not numero_os.startswith("OS "):
-        numeros = re.findall(r'\d+', numero_os)
-        
-        if numeros:
-            numero_completo = ''.join(numeros)
-            if len(numero_completo) >= 5:
-                ano = numero_completo[:2]
-                sequencia = numero_completo[-3:].zfill(3)  # Garantir 3 dígitos
-            else:
-                ano = datetime.now().strftime("%y")
-                sequencia = numero_completo.zfill(3)  # Garantir 3 dígitos
-                
-            numero_os_formatado = f"OS {ano} {sequencia}"
-        else:
-            ano = datetime.now().strftime("%y")
-            numero_os_formatado = f"OS {ano} 001"
-    else:
-        numero_os_formatado = numero_os
-    
-    # Formatos alternativos para consulta no banco
-    numero_os_sem_espacos = numero_os_formatado.replace(" ", "")  # OSxxyyy
-    numero_os_original = numero_os
-            
-    print(f"Número formatado: '{numero_os_formatado}'")
-    print(f"Número sem espaços: '{numero_os_sem_espacos}'")
-            
-    # Definir pasta de destino padrão se não for fornecida
-    if pasta_destino is None:
-        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "visitas")
-    
-    # Criar diretórios se não existirem
-    if not os.path.exists(pasta_destino):
-        os.makedirs(pasta_destino)
-        
-    # Criar nome de arquivo baseado no número da OS formatado
-    numero_os_limpo = numero_os_formatado.replace(" ", "_").replace("/", "-").replace("-", "_")
-    nome_arquivo = f"OS_Visita_Tecnica_{numero_os_limpo}.xlsx"
-    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-    
-    # Verificar se o arquivo já existe
-    if os.path.exists(caminho_arquivo):
-        print(f"Arquivo já existe em: {caminho_arquivo}")
-        return caminho_arquivo
-        
-    # Buscar informações da OS do banco de dados
-    conn = sqlite3.connect('moraca.db')
-    conn.row_factory = sqlite3.Row  # Para acessar as colunas pelo nome
-    c = conn.cursor()
-    
-    # Tentar diferentes formatos para encontrar a OS no banco
-    print(f"Buscando OS no banco de dados...")
-    formatos_para_testar = [
-        numero_os_formatado,  # "OS xx yyy"
-        numero_os_sem_espacos,  # "OSxxttt"
-        numero_os_original,  # formato original passado para a função
-    ]
-    
-    os_data = None
-    
-    for formato in formatos_para_testar:
-        print(f"Tentando consulta com formato: '{formato}'")
-        c.execute("SELECT * FROM os WHERE numero = ?", (formato,))
-        os_data = c.fetchone()
-        if os_data:
-            print(f"OS encontrada com formato: '{formato}'")
-            break
-    
-    if not os_data:
-        print(f"OS não encontrada. Listando algumas OS disponíveis:")
-        c.execute("SELECT numero FROM os LIMIT 5")
-        os_disponiveis = c.fetchall()
-        for os_disp in os_disponiveis:
-            print(f"  - {os_disp[0]}")
-        
-        conn.close()
-        return None
-    
     # Criar uma nova planilha
     wb = openpyxl.Workbook()
     ws = wb.active
-    ws.title = f"OS {numero_os_formatado}"
+    ws.title = f"OS {valores['numero_os_formatado']}"
     
     # Definir estilos
     titulo_font = Font(name='Arial', size=24, bold=True)
@@ -166,8 +86,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Número da OS (em destaque) - Ajustando espaçamento
     ws.merge_cells('A2:B4')
-    numero_formatado = f"{numero_os_formatado.replace('OS ', '')}-1"  # Formato: XX.XXXX-1
-    ws['A2'] = f"OS\n{numero_formatado}"
+    ws['A2'] = f"OS\n{valores['numero_formatado']}"
     ws['A2'].font = Font(name='Arial', size=36, bold=True)
     ws['A2'].alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
     # Removendo borda do número da OS
@@ -212,7 +131,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B5
     ws.merge_cells(f'B5:E5')
-    ws['B5'] = f"{os_data['maquina']}"
+    ws['B5'] = valores['maquina']
     ws['B5'].font = normal_font
     ws['B5'].alignment = left_align
     # Removendo borda
@@ -230,8 +149,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B6
     ws.merge_cells(f'B6:E6')
-    patrimonio = os_data['patrimonio'] if os_data['patrimonio'] is not None else ''
-    ws['B6'] = f"{patrimonio}"
+    ws['B6'] = valores['patrimonio']
     ws['B6'].font = normal_font
     ws['B6'].alignment = left_align
     # Removendo borda
@@ -249,8 +167,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B7
     ws.merge_cells(f'B7:E7')
-    numero_serie = os_data['numero_serie'] if os_data['numero_serie'] is not None else ''
-    ws['B7'] = f"{numero_serie}"
+    ws['B7'] = valores['numero_serie']
     ws['B7'].font = normal_font
     ws['B7'].alignment = left_align
     # Removendo borda
@@ -269,8 +186,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B8
     ws.merge_cells(f'B8:E8')
-    local = os_data['local'] if os_data['local'] is not None else ''
-    ws['B8'] = f"{local}"
+    ws['B8'] = valores['local']
     ws['B8'].font = normal_font
     ws['B8'].alignment = left_align
     # Removendo borda
@@ -289,8 +205,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B9
     ws.merge_cells(f'B9:E9')
-    endereco = os_data['endereco'] if os_data['endereco'] is not None else ''
-    ws['B9'] = f"{endereco}"
+    ws['B9'] = valores['endereco']
     ws['B9'].font = normal_font
     ws['B9'].alignment = left_align
     # Removendo borda
@@ -308,16 +223,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B10
     ws.merge_cells(f'B10:E10')
-    # Para o campo cidade, usar valor do banco de dados sem valor padrão
-    cidade = ""  # Valor vazio por padrão
-    
-    # Verificar se a coluna existe nos metadados da consulta
-    colunas = [column[0] for column in c.description]
-    if 'cidade' in colunas:
-        cidade = os_data['cidade'] if os_data['cidade'] is not None else ""
-    
-    # Garantir que não há valor padrão
-    ws['B10'] = cidade
+    ws['B10'] = valores['cidade']
     ws['B10'].font = normal_font
     ws['B10'].alignment = left_align
     # Removendo borda
@@ -335,8 +241,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B11
     ws.merge_cells(f'B11:E11')
-    cep = os_data['cep'] if os_data['cep'] is not None else ''
-    ws['B11'] = f"{cep}"
+    ws['B11'] = valores['cep']
     ws['B11'].font = normal_font
     ws['B11'].alignment = left_align
     # Removendo borda
@@ -355,8 +260,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B12
     ws.merge_cells(f'B12:E12')
-    telefone = os_data['telefone'] if os_data['telefone'] is not None else ''
-    ws['B12'] = f"{telefone}"
+    ws['B12'] = valores['telefone']
     ws['B12'].font = normal_font
     ws['B12'].alignment = left_align
     # Removendo borda
@@ -375,9 +279,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B13
     ws.merge_cells(f'B13:E13')
-    contato_nome = os_data['contato_nome'] if os_data['contato_nome'] is not None else ''
-    contato_tel1 = os_data['contato_telefone1'] if os_data['contato_telefone1'] is not None else ''
-    ws['B13'] = f"{contato_nome} {contato_tel1}"
+    ws['B13'] = valores['solicitante']
     ws['B13'].font = normal_font
     ws['B13'].alignment = left_align
     # Removendo borda
@@ -396,7 +298,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B14
     ws.merge_cells(f'B14:E14')
-    ws['B14'] = f"{contato_nome} {contato_tel1}"
+    ws['B14'] = valores['solicitante']
     ws['B14'].font = normal_font
     ws['B14'].alignment = right_align
     # Removendo borda
@@ -415,8 +317,7 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     
     # Valor em B15
     ws.merge_cells(f'B15:E15')
-    data_str = os_data['data'] if os_data['data'] is not None else datetime.now().strftime("%d/%m/%Y")
-    ws['B15'] = f"{data_str}"
+    ws['B15'] = valores['data']
     ws['B15'].font = normal_font
     ws['B15'].alignment = left_align
     # Removendo borda
@@ -599,21 +500,11 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     # Aplicar bordas às células em todo o documento
     def aplicar_bordas(worksheet, ultima_linha):
         """Aplica bordas a todas as células usadas na planilha"""
-        # Primeiro, limpar todas as bordas (exceto a linha 1 que tem o título)
-        for row_idx in range(2, ultima_linha + 1):
-            for col_idx in range(1, 6):  # Colunas A a E
-                col_letter = get_column_letter(col_idx)
-                cell = worksheet[f"{col_letter}{row_idx}"]
-                if hasattr(cell, "border"):
-                    # Remover qualquer borda definida
-                    cell.border = None
-        
-        # Aplicar bordas apenas a partir da linha 16 em diante (depois das informações de cabeçalho)
-        for row_idx in range(16, ultima_linha + 1):
-            for col_idx in range(1, 6):  # Colunas A a E
-                col_letter = get_column_letter(col_idx)
-                cell = worksheet[f"{col_letter}{row_idx}"]
-                cell.border = thin_border
+        # Uma passada só: sem borda nas informações de cabeçalho (linhas 2 a 15)
+        # e borda fina da linha 16 em diante
+        for linha in worksheet.iter_rows(min_row=2, max_row=ultima_linha, min_col=1, max_col=5):
+            for cell in linha:
+                cell.border = thin_border if cell.row >= 16 else None
         
         # Manter a borda do título
         worksheet['A1'].border = thin_border
@@ -625,15 +516,109 @@ def criar_os_visita_tecnica(numero_os, pasta_destino=None):
     # Aplicar bordas até a última linha usada
     aplicar_bordas(ws, row)
     
+    return wb
+
+
+# Colunas da OS usadas na OS de visita técnica
+COLUNAS_VISITA_TECNICA = (
+    "numero", "maquina", "patrimonio", "numero_serie", "local", "endereco", "cidade",
+    "cep", "telefone", "contato_nome", "contato_telefone1", "data"
+)
+
+
+def caminho_os_visita_tecnica(numero_os, pasta_destino=None):
+    """
+    Caminho do arquivo da OS de visita técnica (cria a pasta se necessário).
+
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Pasta do arquivo. Se None, usa o caminho padrão.
+
+    Returns:
+        str: Caminho completo do arquivo
+    """
+    numero = normalizar_numero_os(numero_os)
+
+    # Definir pasta de destino padrão se não for fornecida
+    if pasta_destino is None:
+        pasta_destino = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "visitas")
+    
+    # Criar diretórios se não existirem
+    if not os.path.exists(pasta_destino):
+        os.makedirs(pasta_destino)
+        
+    nome_arquivo = f"OS_Visita_Tecnica_{numero.nome_arquivo}.xlsx"
+    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
+    return caminho_arquivo
+
+
+def criar_os_visita_tecnica(numero_os, pasta_destino=None):
+    """
+    Cria um arquivo Excel formatado para a OS de visita técnica.
+    
+    Args:
+        numero_os (str): Número da Ordem de Serviço
+        pasta_destino (str, optional): Caminho onde o arquivo será salvo. Se None, usa o caminho padrão.
+    
+    Returns:
+        str: Caminho completo do arquivo salvo
+    """
+    print(f"Iniciando criação de OS Visita Técnica para número: '{numero_os}'")
+    
+    numero = normalizar_numero_os(numero_os)
+    numero_os_formatado = numero.formatado
+    print(f"Número formatado: '{numero_os_formatado}'")
+            
+    caminho_arquivo = caminho_os_visita_tecnica(numero_os, pasta_destino)
+    
+    # Verificar se o arquivo já existe
+    if os.path.exists(caminho_arquivo):
+        print(f"Arquivo já existe em: {caminho_arquivo}")
+        return caminho_arquivo
+        
+    # Buscar informações da OS do banco de dados (acesso pelo nome da coluna)
+    repo = obter_repositorio()
+    
+    # Busca pela chave canônica, em qualquer grafia do número
+    print(f"Buscando OS no banco de dados...")
+    os_data = repo.obter_os_por_chave(numero_os, COLUNAS_VISITA_TECNICA)
+    
+    if not os_data:
+        print(f"OS não encontrada. Listando algumas OS disponíveis:")
+        for os_disp in repo.listar_numeros(5):
+            print(f"  - {os_disp}")
+        
+        return None
+    
+    print(f"OS encontrada com número: '{os_data['numero']}'")
+    
+    contato_nome = os_data['contato_nome'] if os_data['contato_nome'] is not None else ''
+    contato_tel1 = os_data['contato_telefone1'] if os_data['contato_telefone1'] is not None else ''
+    
+    # Valores desta OS; o layout vem do modelo compilado
+    valores = {
+        'numero_os_formatado': numero_os_formatado,
+        'numero_formatado': f"{numero_os_formatado.replace('OS ', '')}-1",  # Formato: XX.XXXX-1
+        'maquina': f"{os_data['maquina']}",
+        'patrimonio': os_data['patrimonio'] if os_data['patrimonio'] is not None else '',
+        'numero_serie': os_data['numero_serie'] if os_data['numero_serie'] is not None else '',
+        'local': os_data['local'] if os_data['local'] is not None else '',
+        'endereco': os_data['endereco'] if os_data['endereco'] is not None else '',
+        'cidade': os_data['cidade'] or "",
+        'cep': os_data['cep'] if os_data['cep'] is not None else '',
+        'telefone': os_data['telefone'] if os_data['telefone'] is not None else '',
+        'solicitante': f"{contato_nome} {contato_tel1}",
+        'data': os_data['data'] if os_data['data'] is not None else datetime.now().strftime("%d/%m/%Y"),
+    }
+    wb = preencher_modelo("os_visita_tecnica", _construir_os_visita_tecnica, valores)
+    
     # Salvar o arquivo
     try:
-        wb.save(caminho_arquivo)
+        gravar_documento(renderizar_xlsx(wb), [caminho_arquivo], (numero.chave, "visita_tecnica"))
         print(f"OS de Visita Técnica salva com sucesso em: {caminho_arquivo}")
-        conn.close()
         return caminho_arquivo
     except Exception as e:
         print(f"Erro ao salvar arquivo: {e}")
-        conn.close()
         return None
 
 # Para testes
@@ -641,6 +626,8 @@ if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
         numero_os = sys.argv[1]
+        # Banco ainda não migrado (ex: sem a coluna numero_key usada na busca da OS)
+        obter_repositorio().criar_esquema()
         print(f"Criando OS de Visita Técnica para número: {numero_os}")
         caminho = criar_os_visita_tecnica(numero_os)
         print(f"Arquivo salvo em: {caminho}")
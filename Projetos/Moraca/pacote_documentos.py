@@ -0,0 +1,178 @@
+"""
+Gravação dos documentos de uma OS.
+
+Cada documento (planilha, Word) é serializado uma única vez em memória e os
+mesmos bytes são gravados em todos os destinos (pasta do cliente e a pasta
+de compatibilidade OSs/<status>/). O primeiro destino é gravado de forma
+atômica (arquivo temporário + os.replace) e os demais são replicados a partir
+dele com reflink (cópia sob demanda, em Btrfs/XFS), hardlink ou, se o sistema
+de arquivos não suportar nenhum dos dois, uma cópia comum. Cópias por
+hardlink compartilham o conteúdo; Excel, LibreOffice e Word salvam gravando
+um arquivo novo, o que separa as cópias na primeira edição.
+
+Os documentos de um PacoteDocumentos são gerados um depois do outro: montar
+planilhas (openpyxl) e documentos Word (python-docx) é trabalho de CPU em
+Python puro, que threads não paralelizam, e as funções de montagem usam
+objetos que não podem ser enviados a outro processo.
+"""
+
+import io
+import os
+import shutil
+import uuid
+
+from os_documentos import registrar_arquivo
+
+try:
+    import fcntl
+    # ioctl FICLONE do Linux (_IOW(0x94, 9, int))
+    FICLONE = 0x40049409
+except ImportError:  # Windows
+    fcntl = None
+
+
+def renderizar_xlsx(wb):
+    """Serializa um openpyxl.Workbook em bytes"""
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def renderizar_docx(doc):
+    """Serializa um documento python-docx em bytes"""
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def gravar_atomico(caminho, dados):
+    """
+    Grava os bytes em um temporário na mesma pasta e renomeia por cima do
+    destino, para que ninguém abra um arquivo gravado pela metade.
+    """
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    temporario = os.path.join(pasta, f".tmp_{uuid.uuid4().hex}_{os.path.basename(caminho)}")
+    # os.open com 0o666 respeita a umask, como um open() comum (mkstemp criaria com 0o600)
+    descritor = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _reflink(origem, destino):
+    """Clona o arquivo sem copiar os dados (só em Linux, em Btrfs/XFS)"""
+    if fcntl is None:
+        raise OSError("reflink indisponível neste sistema")
+    with open(origem, "rb") as fonte, open(destino, "wb") as alvo:
+        fcntl.ioctl(alvo.fileno(), FICLONE, fonte.fileno())
+
+
+def replicar(origem, destino):
+    """
+    Coloca em destino o mesmo conteúdo de origem, da forma mais barata que o
+    sistema de arquivos permitir.
+
+    Args:
+        origem (str): Arquivo já gravado
+        destino (str): Novo caminho (substituído se já existir)
+
+    Returns:
+        str: Método usado ("reflink", "hardlink" ou "copia")
+    """
+    pasta = os.path.dirname(destino) or "."
+    os.makedirs(pasta, exist_ok=True)
+    temporario = os.path.join(pasta, f".tmp_{uuid.uuid4().hex}_{os.path.basename(destino)}")
+
+    metodo = None
+    for nome, funcao in (("reflink", _reflink), ("hardlink", os.link)):
+        try:
+            funcao(origem, temporario)
+            metodo = nome
+            break
+        except OSError:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    if metodo is None:
+        shutil.copyfile(origem, temporario)
+        metodo = "copia"
+
+    os.replace(temporario, destino)
+    return metodo
+
+
+def gravar_documento(dados, destinos, registro=None):
+    """
+    Grava os mesmos bytes em todos os destinos.
+
+    Args:
+        dados (bytes): Conteúdo do documento
+        destinos (list): Caminhos de destino; o primeiro é o principal
+        registro (tuple, optional): (numero, tipo) para registrar o destino
+            principal em os_documentos
+
+    Returns:
+        str: Caminho do destino principal
+    """
+    principal = destinos[0]
+    gravar_atomico(principal, dados)
+    for destino in destinos[1:]:
+        if os.path.abspath(destino) != os.path.abspath(principal):
+            replicar(principal, destino)
+    if registro is not None:
+        numero, tipo = registro
+        registrar_arquivo(numero, tipo, principal, dados)
+    return principal
+
+
+class PacoteDocumentos:
+    """Conjunto de documentos gerados juntos (ex: planilha e Word de uma OS)"""
+
+    def __init__(self):
+        self._itens = []
+
+    def adicionar(self, nome, renderizar, destinos, registro=None):
+        """
+        Args:
+            nome (str): Identificação do documento (ex: "planilha")
+            renderizar: Função sem argumentos que monta o documento e devolve os bytes
+            destinos (list): Caminhos onde o documento deve ser gravado
+            registro (tuple, optional): (numero, tipo) para o registro de documentos
+        """
+        self._itens.append((nome, renderizar, list(destinos), registro))
+
+    def _gerar(self, item):
+        nome, renderizar, destinos, registro = item
+        caminho = gravar_documento(renderizar(), destinos, registro)
+        print(f"Documento '{nome}' salvo em: {', '.join(destinos)}")
+        return nome, caminho
+
+    def gravar(self):
+        """
+        Gera e grava todos os documentos, um de cada vez.
+
+        Returns:
+            dict: nome -> caminho principal de cada documento
+
+        Raises:
+            Exception: O primeiro erro ocorrido, depois que todos foram tentados
+        """
+        caminhos = {}
+        primeiro_erro = None
+        for item in self._itens:
+            try:
+                nome, caminho = self._gerar(item)
+                caminhos[nome] = caminho
+            except Exception as e:
+                print(f"Erro ao gerar o documento '{item[0]}': {e}")
+                if primeiro_erro is None:
+                    primeiro_erro = e
+        if primeiro_erro is not None:
+            raise primeiro_erro
+        return caminhos
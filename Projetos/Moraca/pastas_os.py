@@ -0,0 +1,366 @@
+"""
+Pasta de documentos de cada OS.
+
+Formato: MORACA/MORACA1/DOCUMENTOS/tecnico/os/OS-[ANO]/os-[MES]/OS [ANO] [NUMERO] - [CLIENTE]
+
+O mês vem da data da OS (data_iso), não do dia em que a pasta é consultada, e
+a pasta é calculada uma única vez e gravada na coluna os.pasta. Assim, abrir
+em abril uma OS de março continua encontrando os arquivos de março, e mudar o
+nome do cliente não "perde" a pasta. Consultar a pasta nunca cria diretórios:
+quem grava arquivos (pacote_documentos) cria as pastas que faltarem.
+
+OS antigas, gravadas antes da coluna existir, têm a pasta resolvida na
+primeira consulta: se já existir uma pasta com o nome da OS em algum mês do
+ano (ou em "OS-fechada"), ela é adotada; senão, vale a pasta calculada.
+
+Ao fechar uma OS, a pasta vai para "OS-fechada". A mudança de status e a
+movimentação são gravadas juntas (os_movimentacoes) e a pasta é movida com
+os.rename quando origem e destino estão no mesmo volume. Entre volumes
+diferentes, os arquivos são copiados, conferidos pelo hash e só então a
+origem é apagada; cada etapa fica registrada no diário, e uma movimentação
+interrompida (queda de energia, rede) é retomada na próxima abertura do
+sistema por retomar_movimentacoes.
+"""
+
+import os
+import re
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+from os_documentos import hash_arquivo
+
+# Pasta base das OS, relativa à pasta do sistema
+PASTA_BASE_OS = os.path.join("MORACA", "MORACA1", "DOCUMENTOS", "tecnico", "os")
+
+MESES = {
+    "01": "janeiro",
+    "02": "fevereiro",
+    "03": "marco",
+    "04": "abril",
+    "05": "maio",
+    "06": "junho",
+    "07": "julho",
+    "08": "agosto",
+    "09": "setembro",
+    "10": "outubro",
+    "11": "novembro",
+    "12": "dezembro"
+}
+
+
+def _partes_pasta_os(numero, cliente):
+    """Ano com 4 dígitos e nome da pasta da OS"""
+    # Extrair ano e número da OS
+    match = re.search(r'OS(\d{2})(\d+)', numero)
+    if match:
+        ano = match.group(1)
+        sequencia = match.group(2)
+        ano_completo = f"20{ano}"
+    else:
+        # Se não conseguir extrair, usar ano atual
+        ano = datetime.now().strftime("%y")
+        sequencia = re.sub(r'[^\d]', '', numero)
+        ano_completo = datetime.now().strftime("%Y")
+
+    # Limitar tamanho e remover caracteres especiais do nome do cliente
+    nome_cliente_simplificado = re.sub(r'[^\w\s-]', '', cliente or '').strip()[:30]
+    return ano_completo, f"OS {ano} {sequencia} - {nome_cliente_simplificado}"
+
+
+def calcular_pasta_os(numero, cliente, data_iso=None):
+    """
+    Calcula a pasta da OS a partir do número, cliente e data (sem acessar o disco).
+
+    Args:
+        numero (str): Número da OS (ex: OS25018)
+        cliente (str): Nome do cliente
+        data_iso (str, optional): Data da OS (aaaa-mm-dd). Se None, usa o mês atual.
+
+    Returns:
+        str: Caminho da pasta da OS
+    """
+    ano_completo, nome_pasta_os = _partes_pasta_os(numero, cliente)
+    mes = data_iso[5:7] if data_iso else datetime.now().strftime("%m")
+    nome_mes = MESES.get(mes, "outros")
+    return os.path.join(PASTA_BASE_OS, f"OS-{ano_completo}", f"os-{nome_mes}", nome_pasta_os)
+
+
+def _procurar_pasta_existente(numero, cliente):
+    """
+    Procura a pasta de uma OS antiga nos meses do ano e em "OS-fechada".
+
+    Returns:
+        str: Caminho da pasta encontrada, ou None
+    """
+    ano_completo, nome_pasta_os = _partes_pasta_os(numero, cliente)
+    pasta_ano = os.path.join(PASTA_BASE_OS, f"OS-{ano_completo}")
+    candidatas = [os.path.join(pasta_ano, f"os-{nome_mes}", nome_pasta_os)
+                  for nome_mes in list(MESES.values()) + ["outros"]]
+    candidatas.append(os.path.join(PASTA_BASE_OS, "OS-fechada", f"OS-{ano_completo}", nome_pasta_os))
+    for candidata in candidatas:
+        if os.path.isdir(candidata):
+            return candidata
+    return None
+
+
+def _pasta_fechada(numero, pasta_origem):
+    """Destino da pasta de uma OS fechada (OS-fechada/OS-[ANO]/<mesmo nome>)"""
+    match = re.search(r'OS(\d{2})(\d+)', numero)
+    ano_completo = f"20{match.group(1)}" if match else datetime.now().strftime("%Y")
+    pasta_os_fechada = os.path.join(PASTA_BASE_OS, "OS-fechada", f"OS-{ano_completo}")
+    nome_pasta_os = os.path.basename(pasta_origem)
+    pasta_destino = os.path.join(pasta_os_fechada, nome_pasta_os)
+    if os.path.exists(pasta_destino):
+        # Adicionar timestamp para evitar duplicidade
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        pasta_destino = os.path.join(pasta_os_fechada, f"{nome_pasta_os}_{timestamp}")
+    return pasta_destino
+
+
+def _para_banco(pasta):
+    """Caminho gravado em os.pasta (separador '/' em qualquer sistema)"""
+    return pasta.replace(os.sep, "/")
+
+
+def _do_banco(pasta):
+    """Caminho local a partir do valor de os.pasta"""
+    return os.path.join(*pasta.split("/"))
+
+
+def _mesmo_volume(origem, destino):
+    """Se destino (que pode ainda não existir) fica no mesmo volume que origem"""
+    pai = os.path.dirname(os.path.abspath(destino))
+    while not os.path.exists(pai):
+        pai = os.path.dirname(pai)
+    return os.stat(origem).st_dev == os.stat(pai).st_dev
+
+
+def _arquivos(pasta):
+    """Caminhos relativos de todos os arquivos dentro da pasta"""
+    arquivos = []
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            arquivos.append(os.path.relpath(os.path.join(raiz, nome), pasta))
+    return arquivos
+
+
+def _copiar_pasta(origem, destino, informar=None):
+    """
+    Copia a pasta arquivo por arquivo, podendo ser retomada.
+
+    Cada arquivo é copiado para um temporário e renomeado, então um arquivo
+    presente no destino está sempre completo; ao retomar, os que já têm o
+    mesmo tamanho da origem são pulados (a conferência pelo hash vem depois).
+    """
+    # Temporários de uma cópia interrompida
+    for relativo in _arquivos(destino) if os.path.isdir(destino) else []:
+        if os.path.basename(relativo).startswith(".tmp_"):
+            os.remove(os.path.join(destino, relativo))
+
+    for raiz, _, _ in os.walk(origem):
+        os.makedirs(os.path.join(destino, os.path.relpath(raiz, origem)), exist_ok=True)
+
+    arquivos = _arquivos(origem)
+    for indice, relativo in enumerate(arquivos, 1):
+        arquivo_origem = os.path.join(origem, relativo)
+        arquivo_destino = os.path.join(destino, relativo)
+        if (os.path.exists(arquivo_destino)
+                and os.path.getsize(arquivo_destino) == os.path.getsize(arquivo_origem)):
+            continue
+        temporario = os.path.join(os.path.dirname(arquivo_destino),
+                                  f".tmp_{uuid.uuid4().hex}_{os.path.basename(arquivo_destino)}")
+        shutil.copy2(arquivo_origem, temporario)
+        os.replace(temporario, arquivo_destino)
+        if informar:
+            informar(0.3 + 0.5 * indice / len(arquivos), f"Copiando {relativo}...")
+
+
+def _conferir_copia(origem, destino):
+    """
+    Confere, pelo hash, se todos os arquivos da origem estão no destino.
+
+    Raises:
+        OSError: Se algum arquivo faltar ou for diferente (a cópia diferente
+            é apagada, para ser copiada de novo na próxima tentativa)
+    """
+    for relativo in _arquivos(origem):
+        arquivo_destino = os.path.join(destino, relativo)
+        if not os.path.exists(arquivo_destino):
+            raise OSError(f"Arquivo não copiado: {arquivo_destino}")
+        if hash_arquivo(os.path.join(origem, relativo)) != hash_arquivo(arquivo_destino):
+            os.remove(arquivo_destino)
+            raise OSError(f"Cópia diferente da origem: {arquivo_destino}")
+
+
+def executar_movimentacao(repo, movimentacao, informar=None):
+    """
+    Executa (ou retoma) uma movimentação de pasta registrada em os_movimentacoes.
+
+    Etapas: "pendente" -> (rename, ou cópia + conferência) -> "copiada" ->
+    origem apagada -> "concluida" (junto com a nova os.pasta). Pode ser
+    chamada de novo depois de uma falha em qualquer etapa.
+
+    Args:
+        repo (RepositorioOS): Repositório com o diário
+        movimentacao (sqlite3.Row): Registro de os_movimentacoes
+        informar: Função (fracao, mensagem) para o progresso, opcional
+
+    Raises:
+        OSError: Se a movimentação falhar (o erro fica gravado no diário e
+            a movimentação continua pendente)
+    """
+    id_movimentacao = movimentacao["id"]
+    origem = _do_banco(movimentacao["origem"])
+    destino = _do_banco(movimentacao["destino"])
+    estado = movimentacao["estado"]
+
+    try:
+        if estado == "pendente" and os.path.exists(origem):
+            renomeada = False
+            if not os.path.exists(destino) and _mesmo_volume(origem, destino):
+                # Mesmo volume: um único rename, atômico
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                try:
+                    os.rename(origem, destino)
+                    renomeada = True
+                except OSError as e:
+                    # Montagens bind e compartilhamentos de rede (SMB) podem ter o
+                    # mesmo st_dev e ainda assim recusar o rename (ex: EXDEV)
+                    print(f"Não foi possível renomear {origem} para {destino} ({e}), copiando")
+            if not renomeada:
+                _copiar_pasta(origem, destino, informar)
+                if informar:
+                    informar(0.85, "Conferindo a cópia...")
+                _conferir_copia(origem, destino)
+                repo.atualizar_movimentacao(id_movimentacao, "copiada")
+                estado = "copiada"
+
+        # Se a origem não existe mais no estado "pendente", o rename já tinha
+        # sido feito antes de uma interrupção
+        if estado == "copiada" and os.path.exists(origem):
+            if informar:
+                informar(0.9, "Removendo a pasta de origem...")
+            shutil.rmtree(origem)
+    except OSError as e:
+        repo.atualizar_movimentacao(id_movimentacao, estado, str(e))
+        raise
+
+    repo.concluir_movimentacao(id_movimentacao, movimentacao["numero"], movimentacao["destino"])
+
+
+def retomar_movimentacoes(repo, informar=None):
+    """
+    Retoma as movimentações de pasta interrompidas.
+
+    Returns:
+        int: Quantidade de movimentações concluídas
+    """
+    concluidas = 0
+    for movimentacao in repo.listar_movimentacoes_pendentes():
+        try:
+            executar_movimentacao(repo, movimentacao, informar)
+            concluidas += 1
+        except OSError as e:
+            print(f"Não foi possível mover a pasta da OS {movimentacao['numero']}: {e}")
+    return concluidas
+
+
+class ResolvedorPastas:
+    """Pasta de cada OS, gravada no banco e guardada em memória"""
+
+    def __init__(self, repo):
+        """
+        Args:
+            repo (RepositorioOS): Repositório onde a pasta de cada OS é gravada
+        """
+        self.repo = repo
+        self._cache = {}
+        self._trava = threading.Lock()
+
+    def pasta_os(self, numero, cliente=None):
+        """
+        Pasta da OS (não cria diretórios).
+
+        Args:
+            numero (str): Número da OS
+            cliente (str, optional): Nome do cliente; usado apenas se a OS
+                não estiver no banco
+
+        Returns:
+            str: Caminho da pasta da OS
+        """
+        with self._trava:
+            pasta = self._cache.get(numero)
+        # Outra estação pode ter movido a pasta (ex: ao fechar a OS) depois que
+        # a alteração chegou: uma pasta que sumiu é lida de novo do banco
+        if pasta is not None and os.path.isdir(pasta):
+            return pasta
+
+        registro = self.repo.obter_pasta_os(numero)
+        if registro is None:
+            # OS fora do banco: nada para gravar nem guardar
+            return calcular_pasta_os(numero, cliente)
+
+        if registro["pasta"]:
+            pasta = _do_banco(registro["pasta"])
+        else:
+            pasta = (_procurar_pasta_existente(numero, registro["cliente"])
+                     or calcular_pasta_os(numero, registro["cliente"], registro["data_iso"]))
+            self.repo.definir_pasta_os(numero, _para_banco(pasta))
+
+        with self._trava:
+            self._cache[numero] = pasta
+        return pasta
+
+    def alterar_status(self, numero, status, informar=None):
+        """
+        Altera o status da OS; ao fechar, move a pasta para "OS-fechada".
+
+        Args:
+            numero (str): Número da OS
+            status (str): Novo status
+            informar: Função (fracao, mensagem) para o progresso, opcional
+
+        Returns:
+            str: Nova pasta, se a pasta foi movida, ou None
+
+        Raises:
+            OSError: Se o status foi alterado mas a pasta não pôde ser movida
+                (a movimentação fica pendente e é retomada depois)
+        """
+        movimentacao = None
+        if status == "FECHADA":
+            pasta_origem = self.pasta_os(numero)
+            if os.path.isdir(pasta_origem) and not _para_banco(pasta_origem).startswith(
+                    _para_banco(os.path.join(PASTA_BASE_OS, "OS-fechada"))):
+                pasta_destino = _pasta_fechada(numero, pasta_origem)
+                movimentacao = (_para_banco(pasta_origem), _para_banco(pasta_destino))
+
+        # Status e diário da movimentação na mesma transação
+        id_movimentacao = self.repo.atualizar_status(numero, status, movimentacao)
+        self.invalidar(numero)
+        if id_movimentacao is None:
+            return None
+
+        if informar:
+            informar(0.3, f"OS {numero}: movendo pasta para 'OS fechada'...")
+        try:
+            executar_movimentacao(self.repo, self.repo.obter_movimentacao(id_movimentacao), informar)
+        finally:
+            self.invalidar(numero)
+        return _do_banco(movimentacao[1])
+
+    def invalidar(self, numero=None):
+        """
+        Descarta a pasta guardada em memória.
+
+        Args:
+            numero (str, optional): OS a descartar; se None, descarta todas
+        """
+        with self._trava:
+            if numero is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(numero, None)
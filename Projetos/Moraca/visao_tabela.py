@@ -0,0 +1,176 @@
+"""
+Atualização de um Treeview pelas diferenças entre a lista exibida e a nova.
+
+Apagar todos os itens e inserir tudo de novo a cada atualização custa uma
+chamada ao Tk por linha, perde a seleção e volta a rolagem para o topo. A
+VisaoTabela guarda a lista exibida (id do item, valores e tags, na ordem) e,
+ao receber a lista nova, só remove as linhas que saíram, insere as que
+entraram, atualiza as que mudaram e move as que trocaram de lugar. As linhas
+que mantêm a ordem relativa (a maior subsequência crescente da ordem antiga)
+ficam paradas; só as demais são movidas. Tudo é aplicado na mesma chamada, e
+o Tk redesenha a tabela uma única vez.
+
+Todas as alterações da tabela devem passar por aqui, para que a lista
+guardada continue igual à exibida.
+"""
+
+from bisect import bisect_left
+
+
+def _subsequencia_estavel(posicoes):
+    """
+    Índices da maior subsequência crescente de uma lista de posições.
+
+    Args:
+        posicoes (list): Posição antiga de cada linha, na ordem nova
+
+    Returns:
+        set: Índices (na lista recebida) das linhas que não precisam ser movidas
+    """
+    finais = []       # Menor posição final de uma subsequência de cada tamanho
+    indice_final = []  # Índice, em posicoes, desse final
+    anterior = [-1] * len(posicoes)
+    for indice, posicao in enumerate(posicoes):
+        tamanho = bisect_left(finais, posicao)
+        if tamanho == len(finais):
+            finais.append(posicao)
+            indice_final.append(indice)
+        else:
+            finais[tamanho] = posicao
+            indice_final[tamanho] = indice
+        anterior[indice] = indice_final[tamanho - 1] if tamanho else -1
+
+    estaveis = set()
+    indice = indice_final[-1] if indice_final else -1
+    while indice != -1:
+        estaveis.add(indice)
+        indice = anterior[indice]
+    return estaveis
+
+
+class VisaoTabela:
+    """Mantém um Treeview igual a uma lista de linhas (id, valores, tags)"""
+
+    def __init__(self, tabela):
+        """
+        Args:
+            tabela: Treeview controlado (itens de nível superior, sem hierarquia)
+        """
+        self.tabela = tabela
+        self._ordem = []   # Ids dos itens, na ordem exibida
+        self._linhas = {}  # id -> (valores, tags)
+
+    def __contains__(self, iid):
+        return iid in self._linhas
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def tags(self, iid):
+        """Tags atuais de uma linha exibida"""
+        return self._linhas[iid][1]
+
+    def sincronizar(self, linhas):
+        """
+        Faz a tabela exibir exatamente as linhas recebidas, na ordem recebida.
+
+        Args:
+            linhas (list): Tuplas (id, valores, tags); o id identifica a
+                linha entre uma atualização e outra (ex: o número da OS)
+
+        Returns:
+            tuple: Quantidade de linhas (inseridas, atualizadas, movidas, removidas)
+        """
+        novos = {iid for iid, _, _ in linhas}
+        removidos = [iid for iid in self._ordem if iid not in novos]
+        if removidos:
+            self.tabela.delete(*removidos)
+            for iid in removidos:
+                del self._linhas[iid]
+            self._ordem = [iid for iid in self._ordem if iid in novos]
+
+        # Linhas já exibidas que mantêm a ordem relativa não são movidas
+        posicao_antiga = {iid: posicao for posicao, iid in enumerate(self._ordem)}
+        mantidas = [indice for indice, (iid, _, _) in enumerate(linhas) if iid in posicao_antiga]
+        estaveis = {mantidas[i] for i in _subsequencia_estavel([posicao_antiga[linhas[j][0]] for j in mantidas])}
+
+        selecao = self.tabela.selection()
+        desanexou = False
+        inseridas = atualizadas = movidas = 0
+        anterior = None
+        for indice, (iid, valores, tags) in enumerate(linhas):
+            atual = self._linhas.get(iid)
+            if atual is None:
+                posicao = self._ordem.index(anterior) + 1 if anterior is not None else 0
+                self.tabela.insert("", posicao, iid=iid, values=valores, tags=tags)
+                self._linhas[iid] = (valores, tags)
+                self._ordem.insert(posicao, iid)
+                inseridas += 1
+            else:
+                if atual != (valores, tags):
+                    self.tabela.item(iid, values=valores, tags=tags)
+                    self._linhas[iid] = (valores, tags)
+                    atualizadas += 1
+                if indice not in estaveis:
+                    desanexou = self._mover_apos(iid, anterior) or desanexou
+                    movidas += 1
+            anterior = iid
+
+        # Linhas desanexadas podem sair da seleção
+        if desanexou and selecao:
+            self.tabela.selection_set([iid for iid in selecao if iid in self._linhas])
+        return inseridas, atualizadas, movidas, len(removidos)
+
+    def _mover_apos(self, iid, anterior):
+        """
+        Move a linha para logo depois de 'anterior' (None: para o início).
+
+        Returns:
+            bool: True se a linha precisou ser desanexada para mudar de lugar
+        """
+        posicao = self._ordem.index(iid)
+        del self._ordem[posicao]
+        indice = self._ordem.index(anterior) + 1 if anterior is not None else 0
+        self._ordem.insert(indice, iid)
+        if posicao == indice:
+            return False  # Já está no lugar
+
+        desanexou = posicao < indice
+        if desanexou:
+            # Sem a linha na tabela, o índice do move vale para a lista já sem ela
+            self.tabela.detach(iid)
+        self.tabela.move(iid, "", indice)
+        return desanexou
+
+    def definir(self, iid, valores, tags=(), indice=None):
+        """
+        Atualiza uma linha, ou a insere se ainda não estiver na tabela.
+
+        Args:
+            iid (str): Id da linha
+            valores (tuple): Valores das colunas
+            tags (tuple): Tags da linha
+            indice (int, optional): Posição de uma linha nova (padrão: fim)
+        """
+        if iid in self._linhas:
+            if self._linhas[iid] != (valores, tags):
+                self.tabela.item(iid, values=valores, tags=tags)
+                self._linhas[iid] = (valores, tags)
+            return
+        if indice is None:
+            indice = len(self._ordem)
+        self.tabela.insert("", indice, iid=iid, values=valores, tags=tags)
+        self._linhas[iid] = (valores, tags)
+        self._ordem.insert(indice, iid)
+
+    def anexar(self, linhas):
+        """Acrescenta linhas no fim (as que já estão na tabela só são atualizadas)"""
+        for iid, valores, tags in linhas:
+            self.definir(iid, valores, tags)
+
+    def remover(self, iid):
+        """Remove uma linha, se estiver na tabela"""
+        if iid in self._linhas:
+            self.tabela.delete(iid)
+            del self._linhas[iid]
+            self._ordem.remove(iid)